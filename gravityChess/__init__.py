@@ -0,0 +1,3 @@
+#the rules of gravity chess, usable without pygame or a display
+from gravityChess.rules import SquareState, PieceType, EndType, Piece, GameState, promotionTypes, startingBoard, emptyPlatforms, gravity, getSquareState, getPiece, getValidMoves, isCheck, checkPlatform, setPlatforms
+from gravityChess.bitboard import Bitboards
@@ -0,0 +1,53 @@
+import os
+from gravityChess.rules import pieceTypes
+
+#the pictures the window draws, packed into one atlas so startup loads a single small file
+#python -m gravityChess.assets packs assets/atlas.png again after a picture in assets changes
+
+#where the pictures are
+assetsDirectory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+atlasPath = os.path.join(assetsDirectory, "atlas.png")
+#the piece pictures by pieceIndex, white first
+pieceNames = [("light" if isWhite else "dark") + type.value for isWhite in (True, False) for type in pieceTypes]
+#pieces are 60 pixels square and laid out 6 to a row, white's row first
+iconSize = 60
+#the lock picture is drawn far smaller than it's stored, it goes in the atlas already shrunk, under the pieces
+lockScale = .01
+lockArea = (0, 2*iconSize, 13, 16)
+atlasSize = (6*iconSize, 2*iconSize+lockArea[3])
+
+#imports pygame once the settings it reads at import are in place, for now only hiding its support prompt
+def importPygame():
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    import pygame
+    return pygame
+
+#where a piece's icon is in the atlas
+def iconArea(index):
+    return ((index % 6) * iconSize, (index // 6) * iconSize, iconSize, iconSize)
+
+#packs the pictures into one surface, from the separate files in assets
+def packAtlas():
+    import pygame
+    atlas = pygame.Surface(atlasSize, pygame.SRCALPHA)
+    for index, name in enumerate(pieceNames):
+        atlas.blit(pygame.image.load(os.path.join(assetsDirectory, name + ".png")), iconArea(index))
+    lock = pygame.transform.rotozoom(pygame.image.load(os.path.join(assetsDirectory, "lock.png")), 0, lockScale)
+    if lock.get_size() != lockArea[2:]:
+        raise ValueError(f"the shrunk lock is {lock.get_size()}, lockArea has to be changed to fit it")
+    atlas.blit(lock, lockArea)
+    return atlas
+
+#the piece icons by pieceIndex and the lock icon, converted to the display's pixel format so drawing them is a plain copy
+#the display has to be set up first, the atlas is packed from the separate pictures if it hasn't been built
+def loadSprites():
+    import pygame
+    atlas = pygame.image.load(atlasPath) if os.path.exists(atlasPath) else packAtlas()
+    atlas = atlas.convert_alpha()
+    pieceIcons = [atlas.subsurface(iconArea(index)) for index in range(len(pieceNames))]
+    return pieceIcons, atlas.subsurface(lockArea)
+
+if __name__ == "__main__":
+    pygame = importPygame()
+    pygame.image.save(packAtlas(), atlasPath)
+    print(f"packed {len(pieceNames)} pieces and the lock into {atlasPath}, {os.path.getsize(atlasPath)} bytes")
@@ -0,0 +1,135 @@
+#scores many positions at once with numpy, for tuning and training an evaluation
+#numpy is only needed for this module, the rules, search and display work without it
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("the batch evaluator needs numpy, install it with pip install numpy")
+from gravityChess.rules import typeIndexes
+from gravityChess.search import pieceValues, pawnAdvance
+
+#pieces are stored as int8, 0 for empty, typeIndexes+1 for white and -(typeIndexes+1) for black
+#so PAWN is 1, KNIGHT 2, BISHOP 3, ROOK 4, QUEEN 5 and KING 6
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(1, 7)
+
+#the value of each code, indexed by code+6
+codeValues = np.zeros(13, dtype=np.int32)
+for type, index in typeIndexes.items():
+    codeValues[index+7] = pieceValues[type]
+    codeValues[5-index] = -pieceValues[type]
+
+#the names of the features, in the order evaluateBatch's columns are
+featureNames = ["material", "pawnAdvance", "mobility", "kingExposure", "platformSupport"]
+#weights that score the features, material and pawnAdvance give the same scores as search.evaluate
+defaultWeights = np.array([1, pawnAdvance, 2, -10, 5], dtype=np.float32)
+
+#the directions the pieces move in as (row, col) steps
+knightSteps = [(1, 2), (2, 1), (-1, 2), (-2, 1), (1, -2), (2, -1), (-1, -2), (-2, -1)]
+kingSteps = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+rookSteps = kingSteps[:4]
+bishopSteps = kingSteps[4:]
+
+#turns games into the arrays the batch functions take: pieces (N, 8, 8), platforms (N, 7, 8) and the side to move (N,)
+def encodeGames(games):
+    pieces = np.zeros((len(games), 8, 8), dtype=np.int8)
+    platforms = np.zeros((len(games), 7, 8), dtype=np.int8)
+    isWhiteTurn = np.zeros(len(games), dtype=bool)
+    for index, game in enumerate(games):
+        for row, rowPieces in enumerate(game.board):
+            for col, piece in enumerate(rowPieces):
+                if piece is not None:
+                    code = typeIndexes[piece.type] + 1
+                    pieces[index, row, col] = code if piece.isWhite else -code
+        platforms[index] = game.platforms
+        isWhiteTurn[index] = game.isWhiteTurn
+    return pieces, platforms, isWhiteTurn
+
+#lets every piece of every position fall, like dropPieces does for one board
+#a piece lands on the lowest free square above row 7 or the first movable or locked platform under it
+def settleBatch(pieces, platforms):
+    amount = len(pieces)
+    rows = np.arange(8).reshape(1, 8, 1)
+    #the rows a stack rests on, the bottom row and every row with a platform under it
+    floors = np.zeros((amount, 8, 8), dtype=bool)
+    floors[:, 7, :] = True
+    floors[:, :7, :] |= platforms > 0
+    #the floor each square's stack rests on, the nearest floor row at or below it
+    floorRows = np.where(floors, rows, 8)
+    floorRows = np.minimum.accumulate(floorRows[:, ::-1, :], axis=1)[:, ::-1, :]
+    #how many pieces are at or below each square, with an extra zero row under the board
+    occupied = pieces != 0
+    below = np.zeros((amount, 9, 8), dtype=np.int16)
+    below[:, :8, :] = np.cumsum(occupied[:, ::-1, :], axis=1)[:, ::-1, :]
+    #a piece lands above the pieces between it and its floor
+    between = np.take_along_axis(below, rows.repeat(amount, 0).repeat(8, 2)+1, axis=1) - np.take_along_axis(below, floorRows+1, axis=1)
+    targets = floorRows - between
+    settled = np.zeros_like(pieces)
+    index, row, col = np.nonzero(occupied)
+    settled[index, targets[index, row, col], col] = pieces[index, row, col]
+    return settled
+
+#moves a mask by a number of rows and columns, squares moved off the board are dropped
+def shifted(mask, dRow, dCol):
+    moved = np.zeros_like(mask)
+    moved[:, max(dRow, 0):8+min(dRow, 0), max(dCol, 0):8+min(dCol, 0)] = mask[:, max(-dRow, 0):8+min(-dRow, 0), max(-dCol, 0):8+min(-dCol, 0)]
+    return moved
+
+#counts the squares the pieces in a mask can move to, stepping once or sliding until blocked
+def countReach(mask, steps, sliding, empty, reachable):
+    count = np.zeros(len(mask), dtype=np.int32)
+    for dRow, dCol in steps:
+        reach = mask
+        for distance in range(7 if sliding else 1):
+            reach = shifted(reach, dRow, dCol)
+            count += (reach & reachable).sum(axis=(1, 2))
+            reach = reach & empty
+            if not reach.any():
+                break
+    return count
+
+#the squares each side's pieces can move to, ignoring checks, pawns and gravity after the move
+def mobility(pieces, isWhite):
+    own = pieces > 0 if isWhite else pieces < 0
+    empty = pieces == 0
+    reachable = ~own
+    codes = np.abs(pieces)
+    count = countReach(own & (codes == KNIGHT), knightSteps, False, empty, reachable)
+    count += countReach(own & (codes == KING), kingSteps, False, empty, reachable)
+    count += countReach(own & ((codes == ROOK) | (codes == QUEEN)), rookSteps, True, empty, reachable)
+    count += countReach(own & ((codes == BISHOP) | (codes == QUEEN)), bishopSteps, True, empty, reachable)
+    return count
+
+#how many squares around each side's king aren't covered by its own pieces
+def kingExposure(pieces, isWhite):
+    king = pieces == (KING if isWhite else -KING)
+    own = pieces > 0 if isWhite else pieces < 0
+    exposure = np.zeros(len(pieces), dtype=np.int32)
+    for dRow, dCol in kingSteps:
+        exposure += (shifted(king, dRow, dCol) & ~own).sum(axis=(1, 2))
+    return exposure
+
+#how many of each side's pieces stand right on top of a platform, removing it drops them
+def platformSupport(pieces, platforms, isWhite):
+    own = pieces[:, :7, :] > 0 if isWhite else pieces[:, :7, :] < 0
+    return (own & (platforms > 0)).sum(axis=(1, 2))
+
+#works out the features of every position from white's point of view, as an (N, len(featureNames)) array
+def batchFeatures(pieces, platforms, settle=True):
+    pieces = np.asarray(pieces, dtype=np.int8)
+    platforms = np.asarray(platforms, dtype=np.int8)
+    if settle:
+        pieces = settleBatch(pieces, platforms)
+    features = np.zeros((len(pieces), len(featureNames)), dtype=np.int32)
+    features[:, 0] = codeValues[pieces.astype(np.int32)+6].sum(axis=(1, 2))
+    cols = np.arange(8).reshape(1, 1, 8)
+    features[:, 1] = (np.where(pieces == PAWN, cols-1, 0) - np.where(pieces == -PAWN, 6-cols, 0)).sum(axis=(1, 2))
+    features[:, 2] = mobility(pieces, True) - mobility(pieces, False)
+    features[:, 3] = kingExposure(pieces, True) - kingExposure(pieces, False)
+    features[:, 4] = platformSupport(pieces, platforms, True) - platformSupport(pieces, platforms, False)
+    return features
+
+#scores every position for its side to move, all of them white to move if isWhiteTurn isn't given
+def evaluateBatch(pieces, platforms, isWhiteTurn=None, weights=defaultWeights, settle=True):
+    scores = batchFeatures(pieces, platforms, settle) @ np.asarray(weights, dtype=np.float32)
+    if isWhiteTurn is None:
+        return scores
+    return np.where(isWhiteTurn, scores, -scores)
@@ -0,0 +1,164 @@
+import argparse
+import copy
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from gravityChess.rules import SquareState, GameState, getSquareState, getValidMoves, gravity, findKing
+from gravityChess.bitboard import Bitboards
+from gravityChess.search import Searcher
+
+#isCheck as it was before attack lookups, generating every enemy move
+def scanningIsCheck(board, isWhiteTurn):
+    king = findKing(board, isWhiteTurn)
+    for row in range(0, len(board)):
+        for col in range(0, len(board[row])):
+            if getSquareState(board, row, col) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
+                if king in getValidMoves(board, None, row, col, not isWhiteTurn, False):
+                    return True
+    return False
+
+#the legality filter as it was before make/unmake, kept to compare against
+def deepcopyValidMoves(board, platforms, row, col, isWhiteTurn):
+    safeMoves = []
+    for move in getValidMoves(board, platforms, row, col, isWhiteTurn, False):
+        tempBoard = copy.deepcopy(board)
+        tempBoard[move[0]][move[1]] = tempBoard[row][col]
+        tempBoard[row][col] = None
+        tempBoard = gravity(tempBoard, platforms, lambda board: None)
+        if not scanningIsCheck(tempBoard, isWhiteTurn):
+            safeMoves.append(move)
+    return safeMoves
+
+#finds every legal move of the side to move with the current rules
+def legalMoves(game):
+    moves = []
+    for row in range(8):
+        for col in range(8):
+            if getSquareState(game.board, row, col) == (SquareState.LIGHT if game.isWhiteTurn else SquareState.DARK):
+                moves.extend(getValidMoves(game.board, game.platforms, row, col, game.isWhiteTurn, True))
+    return moves
+
+#finds every legal move of the side to move by copying the board for each candidate
+def deepcopyLegalMoves(game):
+    moves = []
+    for row in range(8):
+        for col in range(8):
+            if getSquareState(game.board, row, col) == (SquareState.LIGHT if game.isWhiteTurn else SquareState.DARK):
+                moves.extend(deepcopyValidMoves(game.board, game.platforms, row, col, game.isWhiteTurn))
+    return moves
+
+#runs a function until enough time has passed and returns the calls per second
+def timeCalls(function, seconds):
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return calls / elapsed
+
+#how many times faster than the deepcopy filter legal move generation has to be
+legalMovesTarget = 10
+
+#compares legal move generation from the opening position
+def benchLegalMoves(seconds):
+    game = GameState()
+    if legalMoves(game) != deepcopyLegalMoves(game):
+        raise AssertionError("make/unmake and deepcopy legal moves disagree")
+    fast = timeCalls(lambda: legalMoves(game), seconds)
+    slow = timeCalls(lambda: deepcopyLegalMoves(game), seconds)
+    print(f"legal moves (make/unmake, attack lookups): {fast:10.1f} positions/s")
+    print(f"legal moves (deepcopy, enemy move scan):   {slow:10.1f} positions/s")
+    print(f"speedup: {fast/slow:.1f}x, {'meets' if fast/slow >= legalMovesTarget else 'misses'} the {legalMovesTarget}x target")
+
+#plays random legal moves to get a spread of positions to time
+def samplePositions(amount, seed=0):
+    rng = random.Random(seed)
+    positions = []
+    game = GameState()
+    while len(positions) < amount:
+        moves = []
+        for row in range(8):
+            for col in range(8):
+                if getSquareState(game.board, row, col) == (SquareState.LIGHT if game.isWhiteTurn else SquareState.DARK):
+                    moves.extend([[row, col], move] for move in getValidMoves(game.board, game.platforms, row, col, game.isWhiteTurn, True))
+        if not moves:
+            game = GameState()
+            continue
+        positions.append(game.copy())
+        game.makeMove(*rng.choice(moves))
+    return positions
+
+#how many positions a second full bitboard move generation was asked to reach
+bitboardTarget = 100000
+
+#times the bitboard representation over positions from random games
+#a tried move is one candidate moved, fallen and checked, a position is every legal move of the side to move found
+def benchBitboards(seconds):
+    boards = [Bitboards.fromGameState(game) for game in samplePositions(200)]
+    tries = [(bitboards, fromSq, bitboards.pseudoMoves(fromSq, bitboards.isWhiteTurn)) for bitboards in boards for fromSq in range(64) if (bitboards.white if bitboards.isWhiteTurn else bitboards.black) >> fromSq & 1]
+    tries = [(bitboards, fromSq, (targets & -targets).bit_length() - 1) for bitboards, fromSq, targets in tries if targets]
+    def tryMoves():
+        for bitboards, fromSq, toSq in tries:
+            bitboards.isSafe(fromSq, toSq, bitboards.isWhiteTurn)
+    def generate():
+        for bitboards in boards:
+            bitboards.legalMoves()
+    print(f"bitboard move + gravity + check:     {timeCalls(tryMoves, seconds)*len(tries):10.1f} tried moves/s")
+    rate = timeCalls(generate, seconds)*len(boards)
+    print(f"bitboard full legal move generation: {rate:10.1f} positions/s, {'meets' if rate >= bitboardTarget else 'misses'} the {bitboardTarget} target")
+
+#times the search from the opening position
+def benchSearch(seconds):
+    result = Searcher(int(seconds*1000)).findBestMove(GameState())
+    print(f"search: {result}")
+
+#times the numpy batch evaluator over positions from random games, numpy is only needed for this one
+def benchBatch(seconds):
+    try:
+        from gravityChess.batch import encodeGames, evaluateBatch
+    except ImportError as error:
+        print(f"batch: skipped, {error}")
+        return
+    pieces, platforms, isWhiteTurn = encodeGames(samplePositions(1000))
+    repeats = 20
+    pieces, platforms, isWhiteTurn = pieces.repeat(repeats, 0), platforms.repeat(repeats, 0), isWhiteTurn.repeat(repeats, 0)
+    rate = timeCalls(lambda: evaluateBatch(pieces, platforms, isWhiteTurn), seconds) * len(pieces)
+    print(f"batch evaluation: {rate:10.1f} positions/s ({rate*60/1e6:.1f} million per minute)")
+
+#times how long the window takes to show its first frame, in a fresh process each time like a cold start
+#without a display to open a window on, the window is drawn to memory instead
+def benchStartup(seconds):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environment = dict(os.environ)
+    if sys.platform.startswith("linux") and not environment.get("DISPLAY") and not environment.get("WAYLAND_DISPLAY"):
+        environment["SDL_VIDEODRIVER"] = "dummy"
+    environment["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+    firstFrames, walls = [], []
+    end = time.perf_counter() + seconds
+    while len(firstFrames) < 3 or time.perf_counter() < end:
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "main.py", "--startup"], cwd=root, env=environment, capture_output=True, text=True, check=True).stdout
+        walls.append(time.perf_counter() - start)
+        firstFrames.append(float(output.split("first frame after ")[1].split()[0]))
+    print(f"startup: first frame after {statistics.median(firstFrames):.1f} ms, {statistics.median(walls)*1000:.1f} ms with the interpreter and closing, median of {len(walls)} runs")
+
+benchmarks = {
+    "legal": benchLegalMoves,
+    "bitboard": benchBitboards,
+    "search": benchSearch,
+    "batch": benchBatch,
+    "startup": benchStartup,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Times the gravity chess rules")
+    parser.add_argument("names", nargs="*", default=list(benchmarks), help="benchmarks to run: " + ", ".join(benchmarks))
+    parser.add_argument("--seconds", type=float, default=2, help="how long to time each implementation")
+    args = parser.parse_args()
+    for name in args.names:
+        benchmarks[name](args.seconds)
@@ -0,0 +1,385 @@
+from gravityChess.rules import PieceType, Piece, pieceTypes, typeIndexes
+
+#squares are numbered col*8 + row, so each column is one byte of the board
+#and a piece falling one row is a shift left by one
+def square(row, col):
+    return col*8 + row
+
+#the type bitboards are stored in the order of pieceTypes
+pawnIndex = typeIndexes[PieceType.PAWN]
+knightIndex = typeIndexes[PieceType.KNIGHT]
+bishopIndex = typeIndexes[PieceType.BISHOP]
+rookIndex = typeIndexes[PieceType.ROOK]
+queenIndex = typeIndexes[PieceType.QUEEN]
+kingIndex = typeIndexes[PieceType.KING]
+
+#every square on the bottom row, pieces there can't fall any further
+bottomRow = 0
+for col in range(8):
+    bottomRow |= 1 << square(7, col)
+
+#builds a table of the squares a piece can jump to from every square
+def jumpTable(shape):
+    table = []
+    for sq in range(64):
+        row, col = sq % 8, sq // 8
+        mask = 0
+        for dRow, dCol in shape:
+            if 0 <= row+dRow < 8 and 0 <= col+dCol < 8:
+                mask |= 1 << square(row+dRow, col+dCol)
+        table.append(mask)
+    return table
+
+#builds a table of the squares along a ray from every square, not including the square itself
+def rayTable(dRow, dCol):
+    table = []
+    for sq in range(64):
+        row, col = sq % 8 + dRow, sq // 8 + dCol
+        mask = 0
+        while 0 <= row < 8 and 0 <= col < 8:
+            mask |= 1 << square(row, col)
+            row, col = row + dRow, col + dCol
+        table.append(mask)
+    return table
+
+knightMoves = jumpTable([[1,2], [2,1], [-1,2], [-2,1], [1,-2], [2,-1], [-1,-2], [-2,-1]])
+kingMoves = jumpTable([[1,1], [-1,1], [0,1], [1,0], [1,-1], [-1,-1], [0,-1], [-1,0]])
+#squares a pawn attacks, white pawns move towards column 7 and black pawns towards column 0
+pawnAttacks = {True: jumpTable([[1,1], [-1,1]]), False: jumpTable([[1,-1], [-1,-1]])}
+
+#each ray is stored with whether the squares along it get higher numbers,
+#which tells whether the first blocker is the lowest or highest bit
+rookRays = [(rayTable(1, 0), True), (rayTable(0, 1), True), (rayTable(-1, 0), False), (rayTable(0, -1), False)]
+bishopRays = [(rayTable(1, 1), True), (rayTable(-1, 1), True), (rayTable(1, -1), False), (rayTable(-1, -1), False)]
+
+#finds the squares a sliding piece reaches, stopping at the first piece along each ray
+def slidingAttacks(sq, occupied, rays):
+    attacks = 0
+    for ray, increasing in rays:
+        line = ray[sq]
+        blockers = line & occupied
+        if blockers:
+            if increasing:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            line ^= ray[first]
+        attacks |= line
+    return attacks
+
+#for the occupied rows of a column and the rows holding pieces up, the pieces that fall grouped by how far they fall
+#as (rows, mask of their squares) pairs, a column is a byte with row 0 in the lowest bit
+#the falls are worked out the first time a column needs them
+columnFalls = {}
+def columnFall(occupied, supported):
+    key = supported << 8 | occupied
+    falls = columnFalls.get(key)
+    if falls is not None:
+        return falls
+    byDistance = {}
+    bottom = 7
+    for row in range(7, -1, -1):
+        #a platform under this row starts a new stack
+        if supported >> row & 1:
+            bottom = row
+        if occupied >> row & 1:
+            if bottom != row:
+                byDistance[bottom - row] = byDistance.get(bottom - row, 0) | 1 << row
+            bottom -= 1
+    falls = columnFalls[key] = list(byDistance.items())
+    return falls
+
+#lets every piece fall, boards[0] and boards[1] must be the two colour boards
+#the falls of the columns with a piece over an empty square are gathered by distance first,
+#so each board is moved in a single step, one shift per distance instead of one per row fallen
+def fall(boards, platformMask):
+    supported = platformMask | bottomRow
+    occupied = boards[0] | boards[1]
+    falling = occupied & ~(occupied >> 1) & ~supported
+    if not falling:
+        return boards
+    byDistance = {}
+    while falling:
+        shift = (falling & -falling).bit_length() - 1 & ~7
+        falling &= ~(255 << shift)
+        for distance, rows in columnFall(occupied >> shift & 255, supported >> shift & 255):
+            byDistance[distance] = byDistance.get(distance, 0) | rows << shift
+    moving = 0
+    for rows in byDistance.values():
+        moving |= rows
+    falls = list(byDistance.items())
+    for i in range(len(boards)):
+        bits = boards[i]
+        if bits & moving:
+            landed = bits & ~moving
+            for distance, rows in falls:
+                landed |= (bits & rows) << distance
+            boards[i] = landed
+    return boards
+
+#finds the mask of the platforms that hold pieces up
+def platformMaskOf(platforms):
+    mask = 0
+    for row in range(len(platforms)):
+        for col in range(len(platforms[row])):
+            if platforms[row][col] > 0:
+                mask |= 1 << square(row, col)
+    return mask
+
+#whether a square is attacked by a side, given its colour board and the piece type boards
+def isAttacked(sq, attackers, occupied, types, byWhite):
+    if knightMoves[sq] & attackers & types[knightIndex]:
+        return True
+    if kingMoves[sq] & attackers & types[kingIndex]:
+        return True
+    #a pawn attacks sq from the squares a pawn of the other colour would attack from sq
+    if pawnAttacks[not byWhite][sq] & attackers & types[pawnIndex]:
+        return True
+    queens = types[queenIndex]
+    if slidingAttacks(sq, occupied, rookRays) & attackers & (types[rookIndex] | queens):
+        return True
+    if slidingAttacks(sq, occupied, bishopRays) & attackers & (types[bishopIndex] | queens):
+        return True
+    return False
+
+#a board stored as 64 bit integers, one per colour and piece type, plus the flags and platforms
+class Bitboards:
+    #constructor
+    def __init__(self):
+        self.white = 0
+        self.black = 0
+        self.types = [0] * len(pieceTypes)
+        self.hasMoved = 0
+        self.justMoved2 = 0
+        self.platformMask = 0
+        self.isWhiteTurn = True
+
+    #builds the bitboards from a list of lists board and its platforms
+    @staticmethod
+    def fromBoard(board, platforms, isWhiteTurn):
+        bitboards = Bitboards()
+        for row in range(8):
+            for col in range(8):
+                piece = board[row][col]
+                if piece is None:
+                    continue
+                bit = 1 << square(row, col)
+                if piece.isWhite:
+                    bitboards.white |= bit
+                else:
+                    bitboards.black |= bit
+                bitboards.types[typeIndexes[piece.type]] |= bit
+                if piece.hasMoved:
+                    bitboards.hasMoved |= bit
+                if piece.justMoved2:
+                    bitboards.justMoved2 |= bit
+        bitboards.platformMask = platformMaskOf(platforms)
+        bitboards.isWhiteTurn = isWhiteTurn
+        return bitboards
+
+    #builds the bitboards for a game
+    @staticmethod
+    def fromGameState(game):
+        return Bitboards.fromBoard(game.board, game.platforms, game.isWhiteTurn)
+
+    #makes an independent copy
+    def copy(self):
+        bitboards = Bitboards()
+        bitboards.white = self.white
+        bitboards.black = self.black
+        bitboards.types = self.types[:]
+        bitboards.hasMoved = self.hasMoved
+        bitboards.justMoved2 = self.justMoved2
+        bitboards.platformMask = self.platformMask
+        bitboards.isWhiteTurn = self.isWhiteTurn
+        return bitboards
+
+    #turns the bitboards back into a list of lists board
+    def toBoard(self):
+        board = [[None for col in range(8)] for row in range(8)]
+        for typeIndex, bits in enumerate(self.types):
+            while bits:
+                bit = bits & -bits
+                bits ^= bit
+                sq = bit.bit_length() - 1
+                piece = Piece(bool(self.white & bit), pieceTypes[typeIndex])
+                piece.hasMoved = bool(self.hasMoved & bit)
+                piece.justMoved2 = bool(self.justMoved2 & bit)
+                board[sq % 8][sq // 8] = piece
+        return board
+
+    #finds the index of the type of the piece on a square
+    def typeAt(self, bit):
+        for typeIndex, bits in enumerate(self.types):
+            if bits & bit:
+                return typeIndex
+        return -1
+
+    #enact gravity on the board
+    def gravity(self):
+        boards = [self.white, self.black, self.hasMoved, self.justMoved2] + self.types
+        fall(boards, self.platformMask)
+        self.white, self.black, self.hasMoved, self.justMoved2 = boards[:4]
+        self.types = boards[4:]
+
+    #finds whether a side's king is in check
+    def isCheck(self, isWhite):
+        own, enemy = (self.white, self.black) if isWhite else (self.black, self.white)
+        king = own & self.types[kingIndex]
+        if not king:
+            return False
+        return isAttacked(king.bit_length() - 1, enemy, own | enemy, self.types, not isWhite)
+
+    #finds the squares the piece on sq can move to, without checking for checks
+    def pseudoMoves(self, sq, isWhite):
+        bit = 1 << sq
+        own, enemy = (self.white, self.black) if isWhite else (self.black, self.white)
+        occupied = own | enemy
+        typeIndex = self.typeAt(bit)
+        if typeIndex == pawnIndex:
+            return self.pawnMoves(sq, isWhite, own, enemy)
+        if typeIndex == knightIndex:
+            return knightMoves[sq] & ~own
+        if typeIndex == bishopIndex:
+            return slidingAttacks(sq, occupied, bishopRays) & ~own
+        if typeIndex == rookIndex:
+            return slidingAttacks(sq, occupied, rookRays) & ~own
+        if typeIndex == queenIndex:
+            return (slidingAttacks(sq, occupied, rookRays) | slidingAttacks(sq, occupied, bishopRays)) & ~own
+        if typeIndex == kingIndex:
+            return self.kingMoves(sq, isWhite, own, occupied)
+        return 0
+
+    #finds valid moves for pawns
+    def pawnMoves(self, sq, isWhite, own, enemy):
+        row, col = sq % 8, sq // 8
+        empty = ~(own | enemy)
+        playerCoef = 1 if isWhite else -1
+        moves = 0
+        if isWhite and col == 1 and empty & (1 << square(row, 3)) and empty & (1 << square(row, 2)):
+            moves |= 1 << square(row, 3)
+        if not isWhite and col == 6 and empty & (1 << square(row, 4)) and empty & (1 << square(row, 5)):
+            moves |= 1 << square(row, 4)
+        #En Passant, the square it lands on is not checked, the same as rules.pawnMovement
+        if 0 <= col+playerCoef < 8:
+            for side in (row+1, row-1):
+                if 0 <= side < 8 and enemy & self.justMoved2 & (1 << square(side, col)):
+                    moves |= 1 << square(side, col+playerCoef)
+            #Move Forward
+            if empty & (1 << square(row, col+playerCoef)):
+                moves |= 1 << square(row, col+playerCoef)
+        #Attacking
+        return moves | (pawnAttacks[isWhite][sq] & enemy)
+
+    #finds valid moves for kings
+    def kingMoves(self, sq, isWhite, own, occupied):
+        moves = kingMoves[sq] & ~own
+        if self.hasMoved & (1 << sq):
+            return moves
+        #castling, with whatever unmoved piece of its own is in the corner
+        col = 0 if isWhite else 7
+        unmoved = own & ~self.hasMoved
+        if unmoved & (1 << square(0, col)) and not occupied & ((1 << square(1, col)) | (1 << square(2, col)) | (1 << square(3, col))):
+            moves |= 1 << square(2, col)
+        if unmoved & (1 << square(7, col)) and not occupied & ((1 << square(6, col)) | (1 << square(5, col))):
+            moves |= 1 << square(6, col)
+        return moves
+
+    #whether moving from one square to another leaves the mover's own king safe
+    #the move is tried as a plain move and fall, the same as rules.getValidMoves
+    def isSafe(self, fromSq, toSq, isWhite):
+        fromBit, toBit = 1 << fromSq, 1 << toSq
+        typeIndex = self.typeAt(fromBit)
+        boards = [self.white, self.black] + [bits & ~toBit for bits in self.types]
+        boards[2 + typeIndex] = (boards[2 + typeIndex] & ~fromBit) | toBit
+        own = 0 if isWhite else 1
+        boards[own] = (boards[own] & ~fromBit) | toBit
+        boards[1 - own] &= ~toBit
+        fall(boards, self.platformMask)
+        types = boards[2:]
+        king = boards[own] & types[kingIndex]
+        if not king:
+            return True
+        return not isAttacked(king.bit_length() - 1, boards[1 - own], boards[0] | boards[1], types, not isWhite)
+
+    #finds the squares the piece on sq can move to without leaving its king in check
+    def validMoves(self, sq, isWhite):
+        moves = 0
+        targets = self.pseudoMoves(sq, isWhite)
+        while targets:
+            bit = targets & -targets
+            targets ^= bit
+            if self.isSafe(sq, bit.bit_length() - 1, isWhite):
+                moves |= bit
+        return moves
+
+    #finds every legal move of the side to move as (fromSq, toSq) pairs
+    def legalMoves(self):
+        moves = []
+        pieces = self.white if self.isWhiteTurn else self.black
+        while pieces:
+            bit = pieces & -pieces
+            pieces ^= bit
+            fromSq = bit.bit_length() - 1
+            targets = self.validMoves(fromSq, self.isWhiteTurn)
+            while targets:
+                target = targets & -targets
+                targets ^= target
+                moves.append((fromSq, target.bit_length() - 1))
+        return moves
+
+    #takes every piece off a square
+    def clear(self, bit):
+        keep = ~bit
+        self.white &= keep
+        self.black &= keep
+        self.types = [bits & keep for bits in self.types]
+        self.hasMoved &= keep
+        self.justMoved2 &= keep
+
+    #moves whatever is on one square to another, capturing what was there
+    def relocate(self, fromBit, toBit):
+        self.clear(toBit)
+        def move(bits):
+            if bits & fromBit:
+                bits ^= fromBit
+                bits |= toBit
+            return bits
+        self.white = move(self.white)
+        self.black = move(self.black)
+        self.types = [move(bits) for bits in self.types]
+        self.hasMoved = move(self.hasMoved)
+        self.justMoved2 = move(self.justMoved2)
+
+    #updates the board once a move has been made, the same as GameState.makeMove
+    def makeMove(self, fromSq, toSq, promotion=PieceType.QUEEN):
+        isWhite = self.isWhiteTurn
+        own, enemy = (self.white, self.black) if isWhite else (self.black, self.white)
+        fromRow, fromCol, toRow, toCol = fromSq % 8, fromSq // 8, toSq % 8, toSq // 8
+        fromBit, toBit = 1 << fromSq, 1 << toSq
+        self.justMoved2 &= ~own
+        typeIndex = self.typeAt(fromBit)
+        promoting = False
+        if typeIndex == pawnIndex:
+            #En Passant Stuff
+            if abs(toCol - fromCol) == 2:
+                self.justMoved2 |= fromBit
+            passed = 1 << square(toRow, fromCol)
+            if fromRow != toRow and fromCol != toCol and enemy & self.justMoved2 & passed:
+                self.clear(passed)
+            promoting = toCol == 0 or toCol == 7
+        #Castling
+        if typeIndex == kingIndex and abs(toRow - fromRow) > 1:
+            if toRow == 6:
+                self.relocate(1 << square(7, fromCol), 1 << square(5, fromCol))
+            else:
+                self.relocate(1 << square(0, fromCol), 1 << square(3, fromCol))
+        self.relocate(fromBit, toBit)
+        self.hasMoved |= toBit
+        if promoting:
+            self.types[pawnIndex] &= ~toBit
+            self.types[typeIndexes[promotion]] |= toBit
+            self.hasMoved &= ~toBit
+            self.justMoved2 &= ~toBit
+        self.isWhiteTurn = not isWhite
+        self.gravity()
@@ -0,0 +1,244 @@
+import argparse
+import heapq
+import mmap
+import os
+import random
+import struct
+import tempfile
+from gravityChess.rules import ActionType, GameState, promotionTypes, actionName
+from gravityChess.notation import readRecords, parsePosition
+from gravityChess.perft import positionAfter
+
+#an opening book: for positions seen in recorded games, the actions played from them and how those games went
+#the file is sorted by zobrist key and read through a memory map, so a lookup is a binary search that only
+#touches the pages it needs and a book can be far bigger than memory
+
+#where the book is kept unless another path is given
+defaultPath = os.path.join(os.path.dirname(__file__), "book.gcob")
+#the first bytes of a book file and the version of the layout after them
+fileMagic = b"GCOB"
+fileVersion = 1
+#magic, version, the settings the games were played with, how many plies deep the book goes and how many entries it has
+header = struct.Struct("<4sHHHHQ")
+#one entry: position key, action, games, wins and draws for the side that played the action
+entry = struct.Struct("<QIIII")
+#the action types in the order they're numbered in a book
+actionTypes = list(ActionType)
+
+#packs an action into a number, every coordinate is stored one higher so -1 fits
+def encodeAction(action):
+    type, row, col, toRow, toCol, promotion = action
+    code = actionTypes.index(type)
+    for value in (row, col, toRow, toCol):
+        code = code << 4 | (value + 1)
+    return code << 4 | (0 if promotion is None else promotionTypes.index(promotion) + 1)
+
+#unpacks an action packed by encodeAction
+def decodeAction(code):
+    promotion = code & 15
+    row, col, toRow, toCol = [(code >> shift & 15) - 1 for shift in (16, 12, 8, 4)]
+    return (actionTypes[code >> 20], row, col, toRow, toCol, None if promotion == 0 else promotionTypes[promotion-1])
+
+#how an action from a position turned out, from the side that played it
+class BookMove:
+    #constructor
+    def __init__(self, action, games, wins, draws):
+        self.action = action
+        self.games = games
+        self.wins = wins
+        self.draws = draws
+        self.losses = games - wins - draws
+
+    #the share of points the action scored, a draw is half
+    def score(self):
+        return (self.wins + self.draws / 2) / self.games
+
+    #allows easier printing of the move
+    def __str__(self):
+        return f"{actionName(self.action)}: {self.games} games, +{self.wins} ={self.draws} -{self.losses}, {self.score()*100:.0f}%"
+
+#a book file, read through a memory map
+class Book:
+    #constructor, with a seed actions are picked at random by how often they were played, otherwise the most played is
+    def __init__(self, path, seed=None, minGames=1):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.maxPlatforms, self.platformCooldown, self.plies, self.count = header.unpack_from(self.map, 0)
+        if magic != fileMagic or version != fileVersion:
+            raise ValueError(f"{path} is not a version {fileVersion} opening book")
+        if header.size + self.count * entry.size > len(self.map):
+            raise ValueError(f"{path} is cut short, it should have {self.count} entries")
+        self.random = random.Random(seed) if seed is not None else None
+        self.minGames = minGames
+        self.lookups = 0
+        self.hits = 0
+
+    #the key of an entry
+    def keyAt(self, index):
+        return struct.unpack_from("<Q", self.map, header.size + index * entry.size)[0]
+
+    #the first entry with a key at least as big as the one given
+    def lowerBound(self, key):
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.keyAt(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    #every action the book has for a key, most played first
+    def movesFor(self, key):
+        moves = []
+        index = self.lowerBound(key)
+        while index < self.count:
+            entryKey, code, games, wins, draws = entry.unpack_from(self.map, header.size + index * entry.size)
+            if entryKey != key:
+                break
+            moves.append(BookMove(decodeAction(code), games, wins, draws))
+            index += 1
+        moves.sort(key=lambda move: (-move.games, -move.score()))
+        return moves
+
+    #the actions the book has for a game's position, ones a key collision made up are left out
+    def moves(self, game):
+        if game.maxPlatforms != self.maxPlatforms or game.platformCooldown != self.platformCooldown:
+            return []
+        return [move for move in self.movesFor(game.key) if move.games >= self.minGames and game.isLegal(move.action)]
+
+    #an action to play from the book, None when it doesn't know the position
+    def chooseAction(self, game):
+        self.lookups += 1
+        moves = self.moves(game)
+        if not moves:
+            return None
+        self.hits += 1
+        if self.random is None:
+            return moves[0].action
+        return self.random.choices([move.action for move in moves], [move.games for move in moves])[0]
+
+    #closes the map and the file
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+#opens a book, None if there isn't one so callers can skip it
+def openBook(path=defaultPath, seed=None, minGames=1):
+    return Book(path, seed, minGames) if os.path.exists(path) else None
+
+#goes through the (key, action, games, wins, draws) of the first plies of every game in the record files
+def recordEntries(paths, plies, maxPlatforms, platformCooldown):
+    for path in paths:
+        for record in readRecords(path):
+            if record.maxPlatforms != maxPlatforms or record.platformCooldown != platformCooldown:
+                continue
+            for ply, (game, action) in enumerate(record.replay()):
+                if ply >= plies:
+                    break
+                mover = "white" if game.isWhiteTurn else "black"
+                won = record.winner == mover
+                drawn = record.winner is None
+                yield game.key, encodeAction(action), 1, int(won), int(drawn)
+
+#writes sorted entries to an open file
+def writeEntries(file, entries):
+    for key, code, games, wins, draws in entries:
+        file.write(entry.pack(key, code, games, wins, draws))
+
+#reads back the entries of a file written by writeEntries, a block at a time
+def readEntries(path, blockEntries=4096):
+    with open(path, "rb") as file:
+        while True:
+            block = file.read(entry.size * blockEntries)
+            if not block:
+                return
+            yield from entry.iter_unpack(block)
+
+#adds up the entries of the same key and action, the entries have to come sorted
+def mergeEntries(entries):
+    current = None
+    for key, code, games, wins, draws in entries:
+        if current is not None and current[0] == key and current[1] == code:
+            current[2] += games
+            current[3] += wins
+            current[4] += draws
+            continue
+        if current is not None:
+            yield tuple(current)
+        current = [key, code, games, wins, draws]
+    if current is not None:
+        yield tuple(current)
+
+#builds a book from record files, the counts are gathered in memory up to runEntries at a time and
+#spilled to sorted runs on disk, which are merged at the end, so neither the games nor the book have to fit in memory
+def buildBook(recordPaths, path=defaultPath, plies=16, minGames=1, maxPlatforms=4, platformCooldown=7, runEntries=1000000):
+    directory = os.path.dirname(os.path.abspath(path))
+    runs = []
+    counts = {}
+    #writes what's been counted so far to a run
+    def spill():
+        run = tempfile.NamedTemporaryFile("wb", dir=directory, suffix=".run", delete=False)
+        with run:
+            writeEntries(run, (key + tuple(value) for key, value in sorted(counts.items())))
+        runs.append(run.name)
+        counts.clear()
+    for key, code, played, wins, draws in recordEntries(recordPaths, plies, maxPlatforms, platformCooldown):
+        value = counts.get((key, code))
+        if value is None:
+            counts[(key, code)] = [played, wins, draws]
+        else:
+            value[0] += played
+            value[1] += wins
+            value[2] += draws
+        if len(counts) >= runEntries:
+            spill()
+    try:
+        if runs:
+            if counts:
+                spill()
+            entries = mergeEntries(heapq.merge(*[readEntries(run) for run in runs]))
+        else:
+            entries = (key + tuple(value) for key, value in sorted(counts.items()))
+        count = 0
+        with open(path + ".tmp", "wb") as file:
+            file.write(header.pack(fileMagic, fileVersion, maxPlatforms, platformCooldown, plies, 0))
+            for key, code, games, wins, draws in entries:
+                if games >= minGames:
+                    file.write(entry.pack(key, code, games, wins, draws))
+                    count += 1
+            #the count is only known at the end
+            file.seek(0)
+            file.write(header.pack(fileMagic, fileVersion, maxPlatforms, platformCooldown, plies, count))
+        os.replace(path + ".tmp", path)
+    finally:
+        for run in runs:
+            os.remove(run)
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds and reads gravity chess opening books")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="builds a book from game record files")
+    build.add_argument("records", nargs="+", help="game record files, as tournament.py --records writes them")
+    build.add_argument("--book", default=defaultPath, help="the book file to write")
+    build.add_argument("--plies", type=int, default=16, help="how many plies of each game go in the book")
+    build.add_argument("--min-games", type=int, default=1, help="actions played in fewer games are left out")
+    build.add_argument("--max-platforms", type=int, default=4, help="only games played with this many platforms are used")
+    build.add_argument("--platform-cooldown", type=int, default=7, help="only games played with this cooldown are used")
+    build.add_argument("--run-entries", type=int, default=1000000, help="how many entries are counted in memory before spilling to disk")
+    show = commands.add_parser("show", help="lists what a book has for a position")
+    show.add_argument("--book", default=defaultPath, help="the book file to read")
+    show.add_argument("--actions", default="", help="actions to play from the start first, e.g. \"41-43 +25\"")
+    show.add_argument("--position", help="a position string to start from instead of the start")
+    args = parser.parse_args()
+    if args.command == "build":
+        count = buildBook(args.records, args.book, args.plies, args.min_games, args.max_platforms, args.platform_cooldown, args.run_entries)
+        print(f"{args.book}: {count} entries, {os.path.getsize(args.book)} bytes")
+    else:
+        book = Book(args.book)
+        game = positionAfter(args.actions.split(), parsePosition(args.position, book.maxPlatforms, book.platformCooldown) if args.position else GameState(maxPlatforms=book.maxPlatforms, platformCooldown=book.platformCooldown))
+        moves = book.moves(game)
+        print(f"{len(moves)} book actions, {book.count} entries in the book")
+        for move in moves:
+            print(f"  {move}")
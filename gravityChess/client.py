@@ -0,0 +1,45 @@
+import json
+import queue
+import socket
+import threading
+
+#talks to a game server from a program that can't wait on the network, like the display
+#messages are read on a background thread and handed out by poll, the way SearchWorker hands out results
+class GameClient:
+    #constructor, connects straight away
+    def __init__(self, host, port):
+        self.socket = socket.create_connection((host, port))
+        self.messages = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    #reads messages until the connection closes, then hands out None
+    def run(self):
+        try:
+            with self.socket.makefile("r") as file:
+                for line in file:
+                    self.messages.put(json.loads(line))
+        except (OSError, ValueError):
+            pass
+        self.messages.put(None)
+
+    #sends a message to the server
+    def send(self, message):
+        self.socket.sendall((json.dumps(message) + "\n").encode())
+
+    #returns the next message from the server, or False if there isn't one yet, never waits
+    #None means the connection is closed
+    def poll(self):
+        try:
+            return self.messages.get_nowait()
+        except queue.Empty:
+            return False
+
+    #leaves the game and closes the connection
+    def close(self):
+        try:
+            self.send({"type": "leave"})
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.socket.close()
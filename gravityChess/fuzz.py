@@ -0,0 +1,469 @@
+import argparse
+import random
+import sys
+import time
+from gravityChess import reference, rules
+from gravityChess.rules import ActionType, EndType, PieceType, actionName, promotionTypes
+from gravityChess.bitboard import Bitboards, square
+from gravityChess.notation import positionString, parsePosition
+
+#plays random games with the frozen reference rules and checks that the faster implementations agree with them
+#after every ply, any disagreement is shrunk to a small position that still shows it:
+#    python -m gravityChess.fuzz --games 200 --candidates rules bitboard
+
+#a position as plain values, so each implementation can build its own copy of it
+#pieces are (isWhite, type value, hasMoved, justMoved2) or None
+class Position:
+    #constructor
+    def __init__(self, board, platforms, isWhiteTurn, amtPlatforms, whiteJustPlatformed, blackJustPlatformed, maxPlatforms, platformCooldown):
+        self.board = board
+        self.platforms = platforms
+        self.isWhiteTurn = isWhiteTurn
+        self.amtPlatforms = amtPlatforms
+        self.whiteJustPlatformed = whiteJustPlatformed
+        self.blackJustPlatformed = blackJustPlatformed
+        self.maxPlatforms = maxPlatforms
+        self.platformCooldown = platformCooldown
+
+    #the position of a game of either the reference or the rules
+    @staticmethod
+    def fromGame(game):
+        board = [[None if piece is None else (piece.isWhite, piece.type.value, piece.hasMoved, piece.justMoved2) for piece in row] for row in game.board]
+        return Position(board, [row[:] for row in game.platforms], game.isWhiteTurn, game.amtPlatforms, game.whiteJustPlatformed, game.blackJustPlatformed, game.maxPlatforms, game.platformCooldown)
+
+    #a copy that can be changed without changing this one
+    def copy(self):
+        return Position([row[:] for row in self.board], [row[:] for row in self.platforms], self.isWhiteTurn, self.amtPlatforms, self.whiteJustPlatformed, self.blackJustPlatformed, self.maxPlatforms, self.platformCooldown)
+
+    #builds a game of a rules module, the reference or the rules
+    def game(self, module):
+        game = module.GameState(piecesOf(self.board, module), [row[:] for row in self.platforms], self.isWhiteTurn, self.maxPlatforms, self.platformCooldown)
+        game.amtPlatforms = self.amtPlatforms
+        game.whiteJustPlatformed = self.whiteJustPlatformed
+        game.blackJustPlatformed = self.blackJustPlatformed
+        if module is rules:
+            game.key = rules.zobristKey(game)
+        return game
+
+    #the position written the way positionString does, to start from again with --position
+    def text(self):
+        return positionString(self.game(rules))
+
+    #lets the pieces fall after the position has been changed by hand, the way the reference does it
+    def settle(self):
+        board = piecesOf(self.board, reference)
+        reference.gravity(board, self.platforms)
+        self.board = plainBoard(board)
+
+#builds the pieces of a plain board for a rules module
+def piecesOf(board, module):
+    pieces = []
+    for row in board:
+        pieces.append([])
+        for value in row:
+            if value is None:
+                pieces[-1].append(None)
+                continue
+            isWhite, type, hasMoved, justMoved2 = value
+            piece = module.Piece(isWhite, module.PieceType(type))
+            piece.hasMoved = hasMoved
+            piece.justMoved2 = justMoved2
+            pieces[-1].append(piece)
+    return pieces
+
+#the plain values of a board of pieces
+def plainBoard(board):
+    return [[None if piece is None else (piece.isWhite, piece.type.value, piece.hasMoved, piece.justMoved2) for piece in row] for row in board]
+
+#moves the pieces of each column to random rows, keeping their order, for checking gravity on boards that aren't settled
+def scramble(board, rng):
+    scrambled = [[None]*8 for row in range(8)]
+    for col in range(8):
+        pieces = [board[row][col] for row in range(8) if board[row][col] is not None]
+        for row, piece in zip(sorted(rng.sample(range(8), len(pieces))), pieces):
+            scrambled[row][col] = piece
+    return scrambled
+
+#the names of the actions the side to move has from its piece moves and platform actions, promotions four times
+def actionNames(game, moves, platformActions):
+    names = []
+    for row, col, toRow, toCol in moves:
+        if game.isPromotion([row, col], [toRow, toCol]):
+            names.extend(actionName((ActionType.MOVE, row, col, toRow, toCol, promotion)) for promotion in promotionTypes)
+        else:
+            names.append(actionName((ActionType.MOVE, row, col, toRow, toCol, None)))
+    return sorted(names + [actionName(action) for action in platformActions])
+
+#the rules as first written, what every other implementation is checked against
+class ReferenceEngine:
+    name = "reference"
+    supportsPlatforms = True
+
+    #starts from a position
+    def load(self, position):
+        self.game = position.game(reference)
+
+    #every piece move of the side to move as (row, col, toRow, toCol)
+    def moves(self):
+        game = self.game
+        moves = set()
+        for row in range(8):
+            for col in range(8):
+                piece = game.board[row][col]
+                if piece is not None and piece.isWhite == game.isWhiteTurn:
+                    moves.update((row, col, toRow, toCol) for toRow, toCol in game.getValidMoves(row, col))
+        return sorted(moves)
+
+    #every platform action of the side to move, tried one slot at a time
+    def platformActions(self):
+        game = self.game
+        actions = []
+        for row in range(7):
+            for col in range(8):
+                if game.canPlacePlatform(row, col):
+                    actions.append((ActionType.PLACE, row, col, -1, -1, None))
+                if game.canRemovePlatform(row, col):
+                    actions.append((ActionType.REMOVE, row, col, -1, -1, None))
+                if game.platforms[row][col] == 1:
+                    for newRow in range(7):
+                        for newCol in range(8):
+                            if game.canMovePlatform(row, col, newRow, newCol):
+                                actions.append((ActionType.SHIFT, row, col, newRow, newCol, None))
+        return actions
+
+    #what the engine says about the position, and about gravity on a scrambled board
+    def facts(self, scrambled):
+        game = self.game
+        position = Position.fromGame(game)
+        moves = self.moves()
+        platformActions = self.platformActions()
+        settled = plainBoard(reference.gravity(piecesOf(scrambled, reference), game.platforms))
+        return {
+            "board": position.board,
+            "side": game.isWhiteTurn,
+            "platforms": (position.platforms, position.amtPlatforms, position.whiteJustPlatformed, position.blackJustPlatformed),
+            "moves": moves,
+            "checks": (reference.isCheck(game.board, True), reference.isCheck(game.board, False)),
+            "ending": game.checkEnding().value,
+            "platformActions": sorted(actionName(action) for action in platformActions),
+            "actions": actionNames(game, moves, platformActions),
+            "gravity": settled,
+            "dropPieces": settled,
+        }
+
+    #takes an action
+    def play(self, action):
+        type, row, col, toRow, toCol, promotion = action
+        game = self.game
+        if type == ActionType.MOVE:
+            game.makeMove([row, col], [toRow, toCol], reference.PieceType(promotion.value) if promotion is not None else reference.PieceType.QUEEN)
+        elif type == ActionType.PLACE:
+            game.placePlatform(row, col)
+        elif type == ActionType.REMOVE:
+            game.removePlatform(row, col)
+        else:
+            game.movePlatform(row, col, toRow, toCol)
+
+#the rules the game runs on, played incrementally with doAction so its keys and caches are checked too
+class RulesEngine:
+    name = "rules"
+    supportsPlatforms = True
+
+    #starts from a position
+    def load(self, position):
+        self.game = position.game(rules)
+
+    #what the engine says about the position, and about gravity on a scrambled board
+    def facts(self, scrambled):
+        game = self.game
+        position = Position.fromGame(game)
+        moves = set()
+        for row in range(8):
+            for col in range(8):
+                piece = game.board[row][col]
+                if piece is not None and piece.isWhite == game.isWhiteTurn:
+                    moves.update((row, col, toRow, toCol) for toRow, toCol in game.getValidMoves(row, col))
+        gravityBoard = piecesOf(scrambled, rules)
+        rules.gravity(gravityBoard, game.platforms)
+        dropBoard = piecesOf(scrambled, rules)
+        rules.dropPieces(dropBoard, game.platforms)
+        return {
+            "board": position.board,
+            "side": game.isWhiteTurn,
+            "platforms": (position.platforms, position.amtPlatforms, position.whiteJustPlatformed, position.blackJustPlatformed),
+            "moves": sorted(moves),
+            "checks": (game.isCheck(True), game.isCheck(False)),
+            "ending": game.checkEnding().value,
+            "platformActions": sorted(actionName(action) for action in game.getPlatformActions()),
+            "actions": sorted(actionName(action) for action in game.getActions()),
+            "gravity": plainBoard(gravityBoard),
+            "dropPieces": plainBoard(dropBoard),
+            "key": game.key == rules.zobristKey(game),
+        }
+
+    #takes an action
+    def play(self, action):
+        self.game.doAction(action)
+
+#the bitboard move generator, it only knows about piece moves, so it's loaded again after a platform action
+class BitboardEngine:
+    name = "bitboard"
+    supportsPlatforms = False
+
+    #starts from a position
+    def load(self, position):
+        self.bitboards = Bitboards.fromBoard(piecesOf(position.board, rules), position.platforms, position.isWhiteTurn)
+        self.platforms = position.platforms
+
+    #what the engine says about the position, and about gravity on a scrambled board
+    def facts(self, scrambled):
+        bitboards = self.bitboards
+        settled = Bitboards.fromBoard(piecesOf(scrambled, rules), self.platforms, True)
+        settled.gravity()
+        return {
+            "board": plainBoard(bitboards.toBoard()),
+            "side": bitboards.isWhiteTurn,
+            "moves": sorted((fromSq % 8, fromSq // 8, toSq % 8, toSq // 8) for fromSq, toSq in bitboards.legalMoves()),
+            "checks": (bitboards.isCheck(True), bitboards.isCheck(False)),
+            "gravity": plainBoard(settled.toBoard()),
+        }
+
+    #takes a piece move
+    def play(self, action):
+        type, row, col, toRow, toCol, promotion = action
+        self.bitboards.makeMove(square(row, col), square(toRow, toCol), promotion if promotion is not None else PieceType.QUEEN)
+
+#positions random games from the start hardly ever reach, games take turns starting from them and from the start
+#both sides can castle either way with platforms holding up their back ranks, one locked and one cooling down,
+#white can take en passant, and both sides have pawns a move from promoting, taking and not taking
+edgePositions = [
+    "RP4pr/1P4p1/1P4p1/1P4p1/KP4pk/1P4p1/1P4p1/RP4pr w 00:1,07:1,35:-2,40:3,47:1 3 -",
+    "8/8/8/8/8/4P+3/4p+^3/K3N2k w - 0 -",
+    "8/8/8/8/8/8/1p4P1/NBk1K1Nr w - 0 -",
+]
+
+#the implementations that can be checked, by name
+candidateEngines = {
+    "rules": RulesEngine,
+    "bitboard": BitboardEngine,
+}
+
+#the facts two engines disagree on, as (name, what the reference says, what the candidate says)
+#facts the candidate doesn't know about aren't compared, the key check only needs to hold
+def disagreements(expected, got):
+    found = []
+    for name, value in got.items():
+        if name == "key":
+            if not value:
+                found.append((name, True, value))
+        elif name == "error":
+            found.append((name, None, value))
+        elif expected[name] != value:
+            found.append((name, expected[name], value))
+    return found
+
+#the facts of a candidate, an exception is a disagreement too
+def safeFacts(engine, scrambled):
+    try:
+        return engine.facts(scrambled)
+    except Exception as error:
+        return {"error": f"{type(error).__name__}: {error}"}
+
+#loads a position into an engine and takes an action on it, returning the exception text if it fails
+def safeStep(engine, position, action):
+    try:
+        engine.load(position)
+        if action is not None:
+            if action[0] != ActionType.MOVE and not engine.supportsPlatforms:
+                return None
+            engine.play(action)
+    except Exception as error:
+        return f"{type(error).__name__}: {error}"
+    return None
+
+#what goes wrong for a candidate from a position, with an action taken if there is one, an empty list if nothing does
+#the reference has to allow the action, otherwise it isn't a case the candidate can be blamed for,
+#and the side that just moved can't be left in check, shrinking makes positions like that
+def check(candidate, position, action, scrambled):
+    engine = ReferenceEngine()
+    engine.load(position)
+    expected = engine.facts(scrambled)
+    if expected["checks"][not position.isWhiteTurn]:
+        return []
+    if action is not None and actionName(action) not in expected["actions"]:
+        return []
+    error = safeStep(candidate, position, None)
+    if error is not None:
+        return [("error", None, error)]
+    found = disagreements(expected, safeFacts(candidate, scrambled))
+    if found or action is None:
+        return found
+    engine.play(action)
+    after = Position.fromGame(engine.game)
+    error = safeStep(candidate, position, action)
+    if error is not None:
+        return [("error", None, error)]
+    if action[0] != ActionType.MOVE and not candidate.supportsPlatforms:
+        candidate.load(after)
+    return disagreements(engine.facts(scrambled), safeFacts(candidate, scrambled))
+
+#smaller versions of a position: each piece taken off, each flag cleared, each platform and platform flag taken away
+def simplifications(position):
+    for row in range(8):
+        for col in range(8):
+            piece = position.board[row][col]
+            if piece is None:
+                continue
+            isWhite, type, hasMoved, justMoved2 = piece
+            if type != PieceType.KING.value:
+                smaller = position.copy()
+                smaller.board[row][col] = None
+                smaller.settle()
+                yield smaller
+            if hasMoved or justMoved2:
+                smaller = position.copy()
+                smaller.board[row][col] = (isWhite, type, False, False)
+                yield smaller
+    for row in range(7):
+        for col in range(8):
+            if position.platforms[row][col] != 0:
+                smaller = position.copy()
+                smaller.platforms[row][col] = 0
+                smaller.amtPlatforms = sum(1 for values in smaller.platforms for value in values if value > 0)
+                smaller.settle()
+                yield smaller
+    if position.whiteJustPlatformed or position.blackJustPlatformed:
+        smaller = position.copy()
+        smaller.whiteJustPlatformed = smaller.blackJustPlatformed = False
+        yield smaller
+
+#keeps simplifying a failing case while it still fails, the scrambled board is left as it was
+def shrink(candidate, position, action, scrambled):
+    tries = 0
+    changed = True
+    while changed:
+        changed = False
+        for smaller in simplifications(position):
+            tries += 1
+            if check(candidate, smaller, action, scrambled):
+                position = smaller
+                changed = True
+                break
+    return position, tries
+
+#prints what a candidate disagreed on, lists only show what's missing from each side
+def printDisagreements(candidate, found):
+    for name, expected, got in found:
+        if isinstance(expected, list) and isinstance(got, list) and name in ("moves", "platformActions", "actions"):
+            print(f"    {name}: only the reference has {[value for value in expected if value not in got]}, only {candidate.name} has {[value for value in got if value not in expected]}")
+        else:
+            print(f"    {name}: the reference says {expected}, {candidate.name} says {got}")
+
+#plays the games, checking every candidate against the reference after every ply
+#every other game takes no platform actions at all, the rest take one when the platform rate comes up
+#without a start given, games take turns starting from the start and from each of the edge positions
+#returns whether every candidate agreed throughout
+def fuzz(candidates, games=20, plies=150, seed=0, platformRate=.3, start=None, maxPlatforms=4, platformCooldown=7):
+    rng = random.Random(seed)
+    referenceEngine = ReferenceEngine()
+    engines = [referenceEngine] + candidates
+    seconds = {engine.name: 0 for engine in engines}
+    checkedPlies = 0
+    startTime = time.perf_counter()
+    for gameIndex in range(games):
+        rate = 0 if gameIndex % 2 == 0 else platformRate
+        startIndex = gameIndex // 2 % (len(edgePositions)+1)
+        if start is not None:
+            position = start.copy()
+        elif startIndex == 0:
+            position = Position.fromGame(rules.GameState(maxPlatforms=maxPlatforms, platformCooldown=platformCooldown))
+        else:
+            position = Position.fromGame(parsePosition(edgePositions[startIndex-1], maxPlatforms, platformCooldown))
+        gameStart = position
+        for engine in engines:
+            engine.load(position)
+        previous = None
+        actions = []
+        for ply in range(plies):
+            scrambled = scramble(position.board, rng)
+            timer = time.perf_counter()
+            expected = referenceEngine.facts(scrambled)
+            seconds[referenceEngine.name] += time.perf_counter() - timer
+            for candidate in candidates:
+                timer = time.perf_counter()
+                got = safeFacts(candidate, scrambled)
+                seconds[candidate.name] += time.perf_counter() - timer
+                found = disagreements(expected, got)
+                if found:
+                    reportMismatch(candidate, gameIndex, ply, gameStart, actions, position, previous, scrambled, found)
+                    return False
+            checkedPlies += 1
+            if expected["ending"] != EndType.PLAYING.value:
+                break
+            moves = expected["moves"]
+            platformActions = referenceEngine.platformActions()
+            if platformActions and (not moves or rng.random() < rate):
+                action = rng.choice(platformActions)
+            elif moves:
+                row, col, toRow, toCol = rng.choice(moves)
+                promotion = rng.choice(promotionTypes) if referenceEngine.game.isPromotion([row, col], [toRow, toCol]) else None
+                action = (ActionType.MOVE, row, col, toRow, toCol, promotion)
+            else:
+                break
+            previous = (position, action)
+            actions.append(action)
+            timer = time.perf_counter()
+            referenceEngine.play(action)
+            seconds[referenceEngine.name] += time.perf_counter() - timer
+            position = Position.fromGame(referenceEngine.game)
+            for candidate in candidates:
+                timer = time.perf_counter()
+                if action[0] != ActionType.MOVE and not candidate.supportsPlatforms:
+                    candidate.load(position)
+                else:
+                    try:
+                        candidate.play(action)
+                    except Exception as exception:
+                        seconds[candidate.name] += time.perf_counter() - timer
+                        reportMismatch(candidate, gameIndex, ply+1, gameStart, actions, position, previous, scrambled, [("error", None, f"{type(exception).__name__}: {exception}")])
+                        return False
+                seconds[candidate.name] += time.perf_counter() - timer
+        print(f"game {gameIndex:4}: {len(actions)} plies{' with platform actions' if rate else ''}, {expected['ending']}")
+    elapsed = time.perf_counter() - startTime
+    print(f"{checkedPlies} plies checked in {elapsed:.1f}s, every candidate agreed with the reference")
+    for engine in engines:
+        pliesPerSecond = checkedPlies / seconds[engine.name] if seconds[engine.name] > 0 else 0
+        print(f"  {engine.name:10} {seconds[engine.name]:8.2f}s {pliesPerSecond:10.1f} plies/s {seconds[referenceEngine.name]/max(seconds[engine.name], 1e-9):6.1f}x the reference")
+    return True
+
+#shrinks a disagreement found during a game and prints it
+#the disagreement is tried from the position alone first, then from the position before with the action that led to it
+#if neither shows it from scratch it came from state carried along the game, and the whole game is printed instead
+def reportMismatch(candidate, gameIndex, ply, gameStart, actions, position, previous, scrambled, found):
+    print(f"{candidate.name} disagrees with the reference in game {gameIndex} at ply {ply}")
+    printDisagreements(candidate, found)
+    print(f"  the game started from {gameStart.text()}" + (f" with {' '.join(actionName(action) for action in actions)}" if actions else ""))
+    for start, action in ((position, None), previous):
+        if start is None or not check(candidate, start, action, scrambled):
+            continue
+        start, tries = shrink(candidate, start, action, scrambled)
+        print(f"  shrunk in {tries} tries to {start.text()}" + (f" then {actionName(action)}" if action is not None else ""))
+        printDisagreements(candidate, check(candidate, start, action, scrambled))
+        print(f"  scrambled board for gravity: {Position(scrambled, start.platforms, True, 0, False, False, 4, 7).text().split()[0]}")
+        return
+    print("  the disagreement doesn't show from a fresh position, it comes from state kept during the game")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checks the faster gravity chess implementations against the reference rules on random games")
+    parser.add_argument("--candidates", nargs="+", choices=list(candidateEngines), default=list(candidateEngines), help="implementations to check")
+    parser.add_argument("--games", type=int, default=20, help="how many games to play")
+    parser.add_argument("--plies", type=int, default=150, help="the most plies a game goes on for")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random games")
+    parser.add_argument("--platform-rate", type=float, default=.3, help="how often a game with platforms takes a platform action instead of a move")
+    parser.add_argument("--position", help="a position string to start every game from instead of the start")
+    parser.add_argument("--max-platforms", type=int, default=4, help="how many platforms can be on the board")
+    parser.add_argument("--platform-cooldown", type=int, default=7, help="how many turns a platform stays locked")
+    args = parser.parse_args()
+    start = Position.fromGame(parsePosition(args.position, args.max_platforms, args.platform_cooldown)) if args.position else None
+    agreed = fuzz([candidateEngines[name]() for name in args.candidates], args.games, args.plies, args.seed, args.platform_rate, start, args.max_platforms, args.platform_cooldown)
+    sys.exit(0 if agreed else 1)
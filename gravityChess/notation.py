@@ -0,0 +1,141 @@
+import json
+from gravityChess.rules import PieceType, Piece, GameState, emptyPlatforms, dropPieces, actionName, parseAction, zobristKey
+
+#the letter of each piece in a position, white is upper case and black lower case
+pieceLetters = {PieceType.PAWN: "P", PieceType.KNIGHT: "N", PieceType.BISHOP: "B", PieceType.ROOK: "R", PieceType.QUEEN: "Q", PieceType.KING: "K"}
+letterTypes = {letter: type for type, letter in pieceLetters.items()}
+#written after a piece's letter for its flags
+hasMovedMark = "+"
+justMoved2Mark = "^"
+
+#writes a position down as one line of text, the fields are split by spaces:
+#the board row by row from row 0 with "/" between rows, letters for pieces and digits for runs of empty squares
+#the side to move, "w" or "b"
+#the platform slots that aren't 0 as row digit, column digit, ":" and the value, split by ",", or "-" for none
+#how many platforms are on the board
+#the sides that used a platform on their last turn, "w", "b", "wb" or "-"
+#e.g. the start is "RP4pr/NP4pn/BP4pb/QP4pq/KP4pk/BP4pb/NP4pn/RP4pr w - 0 -"
+def positionString(game):
+    rows = []
+    for pieces in game.board:
+        text = ""
+        empty = 0
+        for piece in pieces:
+            if piece is None:
+                empty += 1
+                continue
+            if empty:
+                text += str(empty)
+                empty = 0
+            letter = pieceLetters[piece.type]
+            text += letter if piece.isWhite else letter.lower()
+            if piece.hasMoved:
+                text += hasMovedMark
+            if piece.justMoved2:
+                text += justMoved2Mark
+        if empty:
+            text += str(empty)
+        rows.append(text)
+    platforms = [f"{row}{col}:{value}" for row, values in enumerate(game.platforms) for col, value in enumerate(values) if value != 0]
+    justPlatformed = ("w" if game.whiteJustPlatformed else "") + ("b" if game.blackJustPlatformed else "")
+    return " ".join(["/".join(rows), "w" if game.isWhiteTurn else "b", ",".join(platforms) or "-", str(game.amtPlatforms), justPlatformed or "-"])
+
+#reads a position written by positionString, the settings aren't part of the position so they're passed in
+def parsePosition(text, maxPlatforms=4, platformCooldown=7):
+    fields = text.split()
+    if len(fields) != 5:
+        raise ValueError(f"a position needs 5 fields, not {len(fields)}: {text}")
+    boardField, side, platformField, amtPlatforms, justPlatformed = fields
+    rows = boardField.split("/")
+    if len(rows) != 8:
+        raise ValueError(f"a board needs 8 rows, not {len(rows)}: {boardField}")
+    board = []
+    for rowText in rows:
+        pieces = []
+        for char in rowText:
+            if char.isdigit():
+                pieces.extend([None] * int(char))
+            elif char == hasMovedMark and pieces and pieces[-1] is not None:
+                pieces[-1].hasMoved = True
+            elif char == justMoved2Mark and pieces and pieces[-1] is not None:
+                pieces[-1].justMoved2 = True
+            elif char.upper() in letterTypes:
+                pieces.append(Piece(char.isupper(), letterTypes[char.upper()]))
+            else:
+                raise ValueError(f"unknown piece {char} in {rowText}")
+        if len(pieces) != 8:
+            raise ValueError(f"a row needs 8 squares, not {len(pieces)}: {rowText}")
+        board.append(pieces)
+    if side not in ("w", "b"):
+        raise ValueError(f"the side to move is w or b, not {side}")
+    platforms = emptyPlatforms()
+    if platformField != "-":
+        for slot in platformField.split(","):
+            square, _, value = slot.partition(":")
+            row, col = int(square[0]), int(square[1])
+            if row > 6 or col > 7:
+                raise ValueError(f"no platform slot at {square}")
+            platforms[row][col] = int(value)
+    #the rules only let the columns an action touched fall, so a position has to start settled
+    dropPieces(board, platforms)
+    game = GameState(board, platforms, side == "w", maxPlatforms, platformCooldown)
+    game.amtPlatforms = int(amtPlatforms)
+    game.whiteJustPlatformed = "w" in justPlatformed
+    game.blackJustPlatformed = "b" in justPlatformed
+    game.key = zobristKey(game)
+    return game
+
+#a played game, the start is None for the usual starting position
+class GameRecord:
+    #constructor
+    def __init__(self, actions=None, ending=None, winner=None, start=None, maxPlatforms=4, platformCooldown=7):
+        self.actions = actions if actions is not None else []
+        self.ending = ending
+        self.winner = winner
+        self.start = start
+        self.maxPlatforms = maxPlatforms
+        self.platformCooldown = platformCooldown
+
+    #sets up the position the game started from
+    def startingGame(self):
+        if self.start is None:
+            return GameState(maxPlatforms=self.maxPlatforms, platformCooldown=self.platformCooldown)
+        return parsePosition(self.start, self.maxPlatforms, self.platformCooldown)
+
+    #goes through the game, giving the position before each action and the action
+    #the same game is played on as it goes, copy it to keep a position
+    def replay(self):
+        game = self.startingGame()
+        for action in self.actions:
+            yield game, action
+            game.doAction(action)
+
+    #writes the record as one line of json, the actions are written the way actionName does
+    def toLine(self):
+        record = {"actions": " ".join(actionName(action) for action in self.actions), "ending": self.ending, "winner": self.winner}
+        if self.start is not None:
+            record["start"] = self.start
+        if self.maxPlatforms != 4 or self.platformCooldown != 7:
+            record["maxPlatforms"] = self.maxPlatforms
+            record["platformCooldown"] = self.platformCooldown
+        return json.dumps(record, separators=(",", ":")) + "\n"
+
+    #reads a record written by toLine
+    @staticmethod
+    def fromLine(line):
+        record = json.loads(line)
+        return GameRecord([parseAction(name) for name in record["actions"].split()], record.get("ending"), record.get("winner"), record.get("start"), record.get("maxPlatforms", 4), record.get("platformCooldown", 7))
+
+#adds a game to the end of an open record file, each game is one line so files can be appended to and concatenated
+def writeRecord(file, record):
+    file.write(record.toLine())
+
+#goes through the games in a record file one line at a time, so archives never have to fit in memory
+#a last line without its newline is a game still being written and is left out
+def readRecords(path):
+    with open(path) as file:
+        for line in file:
+            if not line.endswith("\n"):
+                return
+            if line.strip():
+                yield GameRecord.fromLine(line)
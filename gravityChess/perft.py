@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+import time
+from gravityChess.rules import EndType, GameState, actionName, parseAction
+
+#the positions with known counts, checked by --verify
+referencePath = os.path.join(os.path.dirname(__file__), "perft.json")
+
+#plays a list of written actions from the starting position, or from the given game
+def positionAfter(names, game=None):
+    game = game if game is not None else GameState()
+    for name in names:
+        game.doAction(parseAction(name))
+    return game
+
+#finds the actions a position allows, there are none once the game is over
+def legalActions(game):
+    if game.checkEnding() != EndType.PLAYING:
+        return []
+    return game.getActions()
+
+#counts the positions reached after exactly depth turns
+def perft(game, depth):
+    if depth == 0:
+        return 1
+    actions = legalActions(game)
+    if depth == 1:
+        return len(actions)
+    nodes = 0
+    for action in actions:
+        child = game.copy()
+        child.doAction(action)
+        nodes += perft(child, depth-1)
+    return nodes
+
+#counts the positions under each first action
+def divide(game, depth):
+    counts = []
+    for action in legalActions(game):
+        child = game.copy()
+        child.doAction(action)
+        counts.append((actionName(action), perft(child, depth-1)))
+    return counts
+
+#loads the reference positions and their counts
+def loadReferences():
+    with open(referencePath) as file:
+        return json.load(file)
+
+#checks every reference position against its counts, returns whether they all matched
+def verify(maxDepth):
+    allMatched = True
+    totalNodes = 0
+    totalTime = 0
+    for name, reference in loadReferences().items():
+        game = positionAfter(reference["actions"])
+        for depth, expected in enumerate(reference["counts"], 1):
+            if depth > maxDepth:
+                break
+            start = time.perf_counter()
+            nodes = perft(game, depth)
+            elapsed = time.perf_counter() - start
+            totalNodes += nodes
+            totalTime += elapsed
+            matched = nodes == expected
+            allMatched = allMatched and matched
+            print(f"{name:12} depth {depth}: {nodes:9} {'ok' if matched else f'expected {expected}'} ({nodes/max(elapsed, 1e-9):.0f} nodes/s)")
+    print(f"{totalNodes} nodes in {totalTime:.2f}s, {totalNodes/max(totalTime, 1e-9):.0f} nodes/s")
+    return allMatched
+
+#recomputes the counts of every reference position to the depth it already has
+def update():
+    references = loadReferences()
+    for name, reference in references.items():
+        game = positionAfter(reference["actions"])
+        reference["counts"] = [perft(game, depth) for depth in range(1, len(reference["counts"])+1)]
+        print(name, reference["counts"])
+    with open(referencePath, "w") as file:
+        json.dump(references, file, indent=4)
+        file.write("\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Counts gravity chess positions to a depth, including platform actions")
+    parser.add_argument("depth", nargs="?", type=int, default=2, help="how many turns deep to count")
+    parser.add_argument("--actions", default="", help="actions to play from the start first, e.g. \"41-43 +25\"")
+    parser.add_argument("--reference", help="start from the reference position with this name instead, as perft.json has them")
+    parser.add_argument("--divide", action="store_true", help="show the count under each first action")
+    parser.add_argument("--verify", action="store_true", help="check the reference counts, up to depth")
+    parser.add_argument("--update", action="store_true", help="rewrite the reference counts after a deliberate rules change")
+    args = parser.parse_args()
+    if args.verify:
+        raise SystemExit(0 if verify(args.depth) else 1)
+    if args.update:
+        update()
+        raise SystemExit(0)
+    names = loadReferences()[args.reference]["actions"] if args.reference else args.actions.split()
+    game = positionAfter(names)
+    start = time.perf_counter()
+    if args.divide:
+        counts = divide(game, args.depth)
+        for name, nodes in counts:
+            print(f"{name}: {nodes}")
+        nodes = sum(nodes for name, nodes in counts)
+    else:
+        nodes = perft(game, args.depth)
+    elapsed = time.perf_counter() - start
+    print(f"nodes {nodes}, {elapsed:.2f}s, {nodes/max(elapsed, 1e-9):.0f} nodes/s")
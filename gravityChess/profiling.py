@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+
+#setting this environment variable to anything but 0 turns profiling on, like passing --profile
+profileVariable = "GRAVITYCHESS_PROFILE"
+#the functions of the rules that get timed, dropPieces is the gravity the rules actually run
+rulesFunctions = ["getValidMoves", "isCheck", "gravity", "dropPieces", "checkPlatform"]
+#how many recent frames the live numbers are worked out over
+recentFrames = 120
+
+#whether profiling was asked for through the environment
+def profilingRequested():
+    return os.environ.get(profileVariable, "0") not in ("", "0")
+
+#how often a function was called and how long it took altogether
+class Stat:
+    __slots__ = ("calls", "seconds")
+    #constructor
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0
+
+#records call counts and times of wrapped functions, frame times and how long input takes to show
+#nothing is wrapped until instrument is called, so without a profiler the game runs untouched
+class Profiler:
+    #constructor, calls from other threads than this one are counted separately
+    def __init__(self):
+        self.thread = threading.current_thread()
+        self.stats = {}
+        self.frameCount = 0
+        self.frameSeconds = 0
+        self.frameMax = 0
+        self.frameTimes = []
+        self.frameStart = None
+        self.inputCount = 0
+        self.inputSeconds = 0
+        self.inputMax = 0
+        self.inputTimes = []
+        self.inputStart = None
+        #how long the program took to show its first frame, set by the display
+        self.startupSeconds = None
+        self.start = time.perf_counter()
+
+    #the stat for a name, made the first time it's asked for
+    def stat(self, name):
+        if name not in self.stats:
+            self.stats[name] = Stat()
+        return self.stats[name]
+
+    #wraps a function so every call is counted and timed, calls inside it are timed as part of it too
+    def wrap(self, function, name):
+        stat = self.stat(name)
+        #the search thread calls the rules too, its time isn't part of a frame
+        otherStat = self.stat(name + " (search)")
+        thread = self.thread
+        #the timed function
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                counted = stat if threading.current_thread() is thread else otherStat
+                counted.calls += 1
+                counted.seconds += time.perf_counter() - start
+        timed.__wrapped__ = function
+        return timed
+
+    #replaces functions of a module or methods of a class with timed ones
+    def instrument(self, owner, names):
+        for name in names:
+            setattr(owner, name, self.wrap(getattr(owner, name), name))
+
+    #marks the start of the work of a frame, after the frame rate wait
+    def startFrame(self):
+        self.frameStart = time.perf_counter()
+
+    #marks that input was picked up this frame, it counts as handled once the frame is done
+    def inputSeen(self):
+        if self.inputStart is None:
+            self.inputStart = time.perf_counter()
+
+    #marks the end of the work of a frame
+    def endFrame(self):
+        if self.frameStart is None:
+            return
+        end = time.perf_counter()
+        self.frameTimes = addRecent(self.frameTimes, end - self.frameStart)
+        self.frameCount += 1
+        self.frameSeconds += end - self.frameStart
+        self.frameMax = max(self.frameMax, end - self.frameStart)
+        self.frameStart = None
+        if self.inputStart is not None:
+            self.inputTimes = addRecent(self.inputTimes, end - self.inputStart)
+            self.inputCount += 1
+            self.inputSeconds += end - self.inputStart
+            self.inputMax = max(self.inputMax, end - self.inputStart)
+            self.inputStart = None
+
+    #short lines about the recent frames and the totals of the timed functions, for a live overlay
+    def liveLines(self):
+        lines = [
+            f"frame {average(self.frameTimes)*1000:5.1f} ms avg, {max(self.frameTimes, default=0)*1000:5.1f} ms max",
+            f"input to screen {average(self.inputTimes)*1000:5.1f} ms avg, {max(self.inputTimes, default=0)*1000:5.1f} ms max",
+        ]
+        for name, stat in self.stats.items():
+            if stat.calls:
+                lines.append(f"{name}: {stat.calls} calls, {stat.seconds*1000:.0f} ms")
+        return lines
+
+    #everything recorded since the start, for when the game closes
+    def summary(self):
+        elapsed = time.perf_counter() - self.start
+        lines = [f"profile over {elapsed:.1f}s"]
+        if self.startupSeconds is not None:
+            lines.append(f"  first frame after {self.startupSeconds*1000:.1f} ms")
+        lines.append(f"  frames: {self.frameCount}, {self.frameSeconds/max(self.frameCount, 1)*1000:.2f} ms avg, {self.frameMax*1000:.2f} ms max")
+        lines.append(f"  input to screen: {self.inputCount} frames with input, {self.inputSeconds/max(self.inputCount, 1)*1000:.2f} ms avg, {self.inputMax*1000:.2f} ms max")
+        lines.append(f"  {'function':28} {'calls':>9} {'total ms':>10} {'per call us':>12}")
+        for name, stat in sorted(self.stats.items(), key=lambda item: -item[1].seconds):
+            if stat.calls:
+                lines.append(f"  {name:28} {stat.calls:9} {stat.seconds*1000:10.1f} {stat.seconds/stat.calls*1e6:12.1f}")
+        return "\n".join(lines)
+
+#keeps a list to the last recentFrames values
+def addRecent(values, value):
+    values.append(value)
+    if len(values) > recentFrames:
+        del values[0]
+    return values
+
+#the average of a list, 0 when it's empty
+def average(values):
+    return sum(values) / len(values) if values else 0
@@ -0,0 +1,493 @@
+from enum import Enum
+import copy
+
+#the rules as they were first written, before any of them were made faster, frozen as the oracle fuzz.py checks against
+#every scan goes square by square and every check works on a deepcopy, that is the point, so don't optimise this file
+
+#set up an enum for the state of squares
+class SquareState(Enum):
+    INVALID = -1
+    EMPTY = 0
+    LIGHT = 1
+    DARK = 2
+
+#set up an enum for the type of a piece
+class PieceType(Enum):
+    PAWN = "Pawn"
+    KNIGHT = "Knight"
+    BISHOP = "Bishop"
+    ROOK = "Rook"
+    QUEEN = "Queen"
+    KING = "King"
+
+#set up an enum for the ways a game can end
+class EndType(Enum):
+    PLAYING = "Still Playing"
+    CHECKMATE = "Checkmate"
+    STALEMATE = "Stalemate"
+    INSUFFICIENT = "Insufficient Material"
+
+#set up a class for pieces
+class Piece:
+    #constructor
+    def __init__(self, isWhite, type):
+        self.isWhite = isWhite
+        self.type = type
+        self.justMoved2 = False
+        self.hasMoved = False
+    #allows easier printing of the pieces
+    def __str__(self):
+        return f"{self.isWhite} {self.type.value}"
+    #allows for better direct comparisons of pieces
+    def __eq__(self, other):
+        if isinstance(other, Piece):
+            return self.type == other.type and self.isWhite == other.isWhite
+        return False
+
+#the pieces a pawn can promote to, in the order the promotion menu shows them
+promotionTypes = [PieceType.QUEEN, PieceType.ROOK, PieceType.BISHOP, PieceType.KNIGHT]
+
+#the back rank of both sides, from the top of the board to the bottom
+backRank = [PieceType.ROOK, PieceType.KNIGHT, PieceType.BISHOP, PieceType.QUEEN, PieceType.KING, PieceType.BISHOP, PieceType.KNIGHT, PieceType.ROOK]
+
+#builds the board with the pieces in their starting squares
+def startingBoard():
+    board = []
+    for type in backRank:
+        board.append([Piece(True, type), Piece(True, PieceType.PAWN), None, None, None, None, Piece(False, PieceType.PAWN), Piece(False, type)])
+    return board
+
+#builds the array with the moveable platforms
+#0 means no platform,
+#1 means it can be moved or removed,
+#>2 means it's locked,
+#<0 means none can be placed
+def emptyPlatforms():
+    return [[0 for col in range(8)] for row in range(7)]
+
+#the full state of a game, with no display attached
+class GameState:
+    #constructor
+    def __init__(self, board=None, platforms=None, isWhiteTurn=True, maxPlatforms=4, platformCooldown=7):
+        self.board = board if board is not None else startingBoard()
+        self.platforms = platforms if platforms is not None else emptyPlatforms()
+        self.isWhiteTurn = isWhiteTurn
+        self.amtPlatforms = sum(1 for row in self.platforms for value in row if value > 0)
+        self.whiteJustPlatformed = False
+        self.blackJustPlatformed = False
+        self.maxPlatforms = maxPlatforms
+        self.platformCooldown = platformCooldown
+
+    #makes an independent copy of the state
+    def copy(self):
+        return copy.deepcopy(self)
+
+    #finds the state of a square
+    def getSquareState(self, row, col):
+        return getSquareState(self.board, row, col)
+
+    #finds all the valid moves for the piece on a square
+    def getValidMoves(self, row, col, checkingChecks=True):
+        return getValidMoves(self.board, self.platforms, row, col, self.isWhiteTurn, checkingChecks)
+
+    #finds whether the current players king is in check
+    def isCheck(self, isWhite=None):
+        return isCheck(self.board, self.isWhiteTurn if isWhite is None else isWhite)
+
+    #whether moving a piece there would promote it
+    def isPromotion(self, pieceFrom, pieceTo):
+        return getPiece(self.board, pieceFrom[0], pieceFrom[1]).type == PieceType.PAWN and (pieceTo[1] == 0 or pieceTo[1] == 7)
+
+    #whether the side to move has used a platform on their last turn
+    def justPlatformed(self):
+        return self.whiteJustPlatformed if self.isWhiteTurn else self.blackJustPlatformed
+
+    #hands the turn over once a move or platform action is done
+    def endTurn(self, platformed):
+        if platformed:
+            if self.isWhiteTurn:
+                self.whiteJustPlatformed = True
+            else:
+                self.blackJustPlatformed = True
+        elif self.isWhiteTurn:
+            self.whiteJustPlatformed = False
+        else:
+            self.blackJustPlatformed = False
+        self.isWhiteTurn = not self.isWhiteTurn
+
+    #updates the board once a move has been made
+    def makeMove(self, pieceFrom, pieceTo, promotion=PieceType.QUEEN, onGravityPass=None):
+        board = self.board
+        for row in range(len(board)):
+            for col in range(len(board[row])):
+                if getSquareState(board, row, col) == (SquareState.LIGHT if self.isWhiteTurn else SquareState.DARK):
+                    board[row][col].justMoved2 = False
+        promoting = False
+        if getPiece(board, pieceFrom[0], pieceFrom[1]).type == PieceType.PAWN:
+            #En Passant Stuff
+            if abs(pieceTo[1]-pieceFrom[1]) == 2:
+                board[pieceFrom[0]][pieceFrom[1]].justMoved2 = True
+            if pieceFrom[0] != pieceTo[0] and pieceFrom[1] != pieceTo[1] and getSquareState(board, pieceTo[0], pieceFrom[1]) == (SquareState.DARK if self.isWhiteTurn else SquareState.LIGHT) and board[pieceTo[0]][pieceFrom[1]].justMoved2:
+                board[pieceTo[0]][pieceFrom[1]] = None
+            #Pawn promotion stuff
+            promoting = pieceTo[1] == 0 or pieceTo[1] == 7
+        #Castling
+        if getPiece(board, pieceFrom[0], pieceFrom[1]).type == PieceType.KING:
+            if abs(pieceTo[0]-pieceFrom[0]) > 1:
+                if pieceTo[0] == 6:
+                    board[5][pieceFrom[1]] = board[7][pieceFrom[1]]
+                    board[7][pieceFrom[1]] = None
+                else:
+                    board[3][pieceFrom[1]] = board[0][pieceFrom[1]]
+                    board[0][pieceFrom[1]] = None
+
+        board[pieceTo[0]][pieceTo[1]] = board[pieceFrom[0]][pieceFrom[1]]
+        board[pieceFrom[0]][pieceFrom[1]] = None
+        board[pieceTo[0]][pieceTo[1]].hasMoved = True
+        #the promoted piece is a fresh piece, it falls the same column as the pawn would have
+        if promoting:
+            board[pieceTo[0]][pieceTo[1]] = Piece(self.isWhiteTurn, promotion)
+        self.endTurn(False)
+        gravity(board, self.platforms, onGravityPass)
+        setPlatforms(self.platforms)
+
+    #whether the side to move can put a new platform there
+    def canPlacePlatform(self, row, col):
+        return self.platforms[row][col] == 0 and self.amtPlatforms < self.maxPlatforms and not self.justPlatformed() and not isCheck(self.board, self.isWhiteTurn)
+
+    #whether the side to move can move a platform from one line to another
+    def canMovePlatform(self, oldRow, oldCol, newRow, newCol):
+        if self.platforms[oldRow][oldCol] != 1 or self.platforms[newRow][newCol] != 0 or (oldRow == newRow and oldCol == newCol) or self.justPlatformed():
+            return False
+        return checkPlatform(self.board, self.platforms, self.isWhiteTurn, oldRow, oldCol, newRow, newCol)
+
+    #whether the side to move can remove a platform
+    def canRemovePlatform(self, row, col):
+        if self.platforms[row][col] != 1 or self.justPlatformed():
+            return False
+        return checkPlatform(self.board, self.platforms, self.isWhiteTurn, row, col, -1, -1)
+
+    #adds a platform, nothing can fall from adding one
+    def placePlatform(self, row, col):
+        self.amtPlatforms += 1
+        self.platforms[row][col] = self.platformCooldown
+        self.endTurn(True)
+        setPlatforms(self.platforms)
+
+    #moves a platform to a different line
+    def movePlatform(self, oldRow, oldCol, newRow, newCol, onGravityPass=None):
+        self.platforms[newRow][newCol] = self.platformCooldown
+        self.platforms[oldRow][oldCol] = -self.platformCooldown + 3
+        self.endTurn(True)
+        gravity(self.board, self.platforms, onGravityPass)
+        setPlatforms(self.platforms)
+
+    #removes a platform
+    def removePlatform(self, row, col, onGravityPass=None):
+        self.amtPlatforms -= 1
+        self.platforms[row][col] = -self.platformCooldown + 3
+        self.endTurn(True)
+        gravity(self.board, self.platforms, onGravityPass)
+        setPlatforms(self.platforms)
+
+    #determines whether the game is over
+    def checkEnding(self):
+        board = self.board
+        hasMove = False
+        pawnHasMove = False
+        for row in range(len(board)):
+            for col in range(len(board[row])):
+                #if no piece can move --> stalemate or checkmate
+                if not hasMove and getSquareState(board, row, col) == (SquareState.LIGHT if self.isWhiteTurn else SquareState.DARK) and len(getValidMoves(board, self.platforms, row, col, self.isWhiteTurn, True)) > 0:
+                    hasMove = True
+                #if a pawn can move --> still life in the position
+                if not pawnHasMove and getPiece(board, row, col) == Piece(True, PieceType.PAWN) and (len(getValidMoves(board, self.platforms, row, col, True, True)) > 0 or col == 7):
+                    pawnHasMove = True
+                elif not pawnHasMove and getPiece(board, row, col) == Piece(False, PieceType.PAWN) and (len(getValidMoves(board, self.platforms, row, col, False, True)) > 0 or col == 0):
+                    pawnHasMove = True
+                #if a pawn is not on the bottom --> still life in the position
+                elif not pawnHasMove and row < 7 and (getPiece(board, row, col) == Piece(False, PieceType.PAWN) or getPiece(board, row, col) == Piece(True, PieceType.PAWN)):
+                    pawnHasMove = True
+        #Checkmate vs Stalemate
+        if not hasMove:
+            if not isCheck(board, True) and not isCheck(board, False):
+                return EndType.STALEMATE
+            return EndType.CHECKMATE
+        #If any rook, queen, bishop, or more than 2 knights are on a team, checkmate is possible
+        if amtOfType(board, PieceType.ROOK) > 0 or amtOfType(board, PieceType.QUEEN) > 0 or amtOfType(board, PieceType.BISHOP) > 0 or amtOfPiece(board, Piece(True, PieceType.KNIGHT)) > 2 or amtOfPiece(board, Piece(False, PieceType.KNIGHT)) > 2:
+            return EndType.PLAYING
+        #If a pawn can move then play on
+        if pawnHasMove:
+            return EndType.PLAYING
+        #If no queens, rooks, bishops
+        if amtOfType(board, PieceType.ROOK) == 0 and amtOfType(board, PieceType.QUEEN) == 0 and amtOfType(board, PieceType.BISHOP) == 0:
+            #if no knights and pawns cant move --> insufficient material
+            if amtOfType(board, PieceType.KNIGHT) == 0 and not pawnHasMove:
+                return EndType.INSUFFICIENT
+            #if no pawns and not enough knights --> Insufficient material
+            if amtOfPiece(board, Piece(True, PieceType.PAWN)) == 0 and amtOfPiece(board, Piece(True, PieceType.KNIGHT)) <= 2 and amtOfPiece(board, Piece(False, PieceType.PAWN)) == 0 and amtOfPiece(board, Piece(False, PieceType.KNIGHT)) <= 2:
+                return EndType.INSUFFICIENT
+        return EndType.PLAYING
+
+#checks to see if removing the platform would result in its own king in check
+def checkPlatform(board, platforms, isWhiteTurn, oldRow, oldCol, newRow, newCol):
+    tempBoard = copy.deepcopy(board)
+    tempPlatforms = copy.deepcopy(platforms)
+    tempPlatforms[oldRow][oldCol] = 0
+    if newRow != -1:
+        tempPlatforms[newRow][newCol] = 1
+    if isCheck(gravity(tempBoard, tempPlatforms), isWhiteTurn):
+        return False
+    return True
+
+#finds amt of pieces of a type
+def amtOfType(board, type):
+    total = 0
+    for row in board:
+        total += row.count(Piece(True, type))+row.count(Piece(False, type))
+    return total
+
+#finds amt of pieces of a piece
+def amtOfPiece(board, piece):
+    total = 0
+    for row in board:
+        total += row.count(piece)
+    return total
+
+#runs the cooldowns on the platforms
+def setPlatforms(platforms):
+    for row in range(len(platforms)):
+        for col in range(len(platforms[row])):
+            if platforms[row][col] < 0:
+                platforms[row][col]+=1
+            elif platforms[row][col] > 1:
+                platforms[row][col]-=1
+    return platforms
+
+#enact gravity on the board, onPass is called with the board after every pass
+def gravity(board, platforms, onPass=None):
+    for stop in range(8):
+        for row in reversed(range(stop+1, 8)):
+            for col in range(len(board)):
+                if getSquareState(board, row, col) == SquareState.EMPTY and platforms[row-1][col] < 1:
+                    board[row][col] = board[row-1][col]
+                    board[row-1][col] = None
+            if onPass is not None:
+                onPass(board)
+    return board
+
+#finds the state of a square
+def getSquareState(board, row, col):
+    if row < 0 or row > 7 or col < 0 or col > 7:
+        return SquareState.INVALID
+    if getPiece(board, row, col) == None:
+        return SquareState.EMPTY
+    if getPiece(board, row, col).isWhite == True:
+        return SquareState.LIGHT
+    return SquareState.DARK
+
+#obtains the piece at a square
+def getPiece(board, row, col):
+    return board[row][col]
+
+#finds all the valid moves from a given position
+def getValidMoves(board, platforms, row, col, isWhiteTurn, checkingChecks):
+    validMoves = []
+    if getPiece(board, row, col).type == PieceType.PAWN:
+        validMoves = pawnMovement(board, row, col, isWhiteTurn)
+    elif getPiece(board, row, col).type == PieceType.ROOK:
+        validMoves = rookMovement(board, row, col, isWhiteTurn)
+    elif getPiece(board, row, col).type == PieceType.KNIGHT:
+        validMoves = knightMovement(board, row, col, isWhiteTurn)
+    elif getPiece(board, row, col).type == PieceType.BISHOP:
+        validMoves = bishopMovement(board, row, col, isWhiteTurn)
+    elif getPiece(board, row, col).type == PieceType.QUEEN:
+        validMoves = queenMovement(board, row, col, isWhiteTurn)
+    elif getPiece(board, row, col).type == PieceType.KING:
+        validMoves = kingMovement(board, row, col, isWhiteTurn)
+    else:
+        return False
+    if checkingChecks:
+        safeMoves = []
+        for move in validMoves:
+            tempBoard = copy.deepcopy(board)
+            tempBoard[move[0]][move[1]] = tempBoard[row][col]
+            tempBoard[row][col] = None
+            tempBoard = gravity(tempBoard, platforms)
+            if not isCheck(tempBoard, isWhiteTurn):
+                safeMoves.append(move)
+        return safeMoves
+    return validMoves
+
+#finds valid moves for pawns
+def pawnMovement(board, row, col, isWhiteTurn):
+    possibleMoves = []
+    playerCoef = 0
+    if isWhiteTurn:
+        playerCoef = 1
+        if col == 1 and getSquareState(board, row, 3) == SquareState.EMPTY and getSquareState(board, row, 2) == SquareState.EMPTY:
+            possibleMoves.append([row, 3])
+    else:
+        playerCoef = -1
+        if col == 6 and getSquareState(board, row, 4) == SquareState.EMPTY and getSquareState(board, row, 5) == SquareState.EMPTY:
+            possibleMoves.append([row, 4])
+    #En Passant
+    if getSquareState(board, row+1, col) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT) and board[row+1][col].justMoved2:
+        possibleMoves.append([row+1, col+playerCoef])
+    if getSquareState(board, row-1, col) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT) and board[row-1][col].justMoved2:
+        possibleMoves.append([row-1, col+playerCoef])
+    #Move Forward
+    if getSquareState(board, row, col+playerCoef) == SquareState.EMPTY:
+        possibleMoves.append([row, col+playerCoef])
+    #Attacking
+    if getSquareState(board, row-1, col+playerCoef) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
+        possibleMoves.append([row-1, col+playerCoef])
+    if getSquareState(board, row+1, col+playerCoef) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
+        possibleMoves.append([row+1, col+playerCoef])
+    return possibleMoves
+
+#finds valid moves for rooks
+def rookMovement(board, row, col, isWhiteTurn):
+    possibleMoves = []
+    for r in range(row+1, 8):
+        if getSquareState(board, r, col) == SquareState.EMPTY:
+            possibleMoves.append([r, col])
+        elif getSquareState(board, r, col) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
+            possibleMoves.append([r, col])
+            break
+        elif getSquareState(board, r, col) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
+            break
+        else:
+            break
+    for c in range(col+1, 8):
+        if getSquareState(board, row, c) == SquareState.EMPTY:
+            possibleMoves.append([row, c])
+        elif getSquareState(board, row, c) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
+            possibleMoves.append([row, c])
+            break
+        elif getSquareState(board, row, c) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
+            break
+        else:
+            break
+    for r in reversed(range(0, row)):
+        if getSquareState(board, r, col) == SquareState.EMPTY:
+            possibleMoves.append([r, col])
+        elif getSquareState(board, r, col) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
+            possibleMoves.append([r, col])
+            break
+        elif getSquareState(board, r, col) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
+            break
+        else:
+            break
+    for c in reversed(range(0, col)):
+        if getSquareState(board, row, c) == SquareState.EMPTY:
+            possibleMoves.append([row, c])
+        elif getSquareState(board, row, c) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
+            possibleMoves.append([row, c])
+            break
+        elif getSquareState(board, row, c) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
+            break
+        else:
+            break
+    return possibleMoves
+
+#finds valid moves for knights
+def knightMovement(board, row, col, isWhiteTurn):
+    possibleMoves = []
+    moveShape = [[1,2], [2,1], [-1,2], [-2,1], [1,-2], [2,-1], [-1,-2], [-2,-1]]
+    for move in moveShape:
+        if getSquareState(board, row+move[0], col+move[1]) == SquareState.EMPTY or getSquareState(board, row+move[0], col+move[1]) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
+            possibleMoves.append([row+move[0], col+move[1]])
+    return possibleMoves
+
+#finds valid moves for bishops
+def bishopMovement(board, row, col, isWhiteTurn):
+    possibleMoves = []
+    for r, c in zip(range(row+1, 8), range(col+1, 8)):
+        if getSquareState(board, r, c) == SquareState.EMPTY:
+            possibleMoves.append([r, c])
+        elif getSquareState(board, r, c) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
+            possibleMoves.append([r, c])
+            break
+        elif getSquareState(board, r, c) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
+            break
+        else:
+            break
+    for r, c in zip(range(row+1, 8), range(col-1, -1, -1)):
+        if getSquareState(board, r, c) == SquareState.EMPTY:
+            possibleMoves.append([r, c])
+        elif getSquareState(board, r, c) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
+            possibleMoves.append([r, c])
+            break
+        elif getSquareState(board, r, c) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
+            break
+        else:
+            break
+    for r, c in zip(range(row-1, -1, -1), range(col+1, 8)):
+        if getSquareState(board, r, c) == SquareState.EMPTY:
+            possibleMoves.append([r, c])
+        elif getSquareState(board, r, c) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
+            possibleMoves.append([r, c])
+            break
+        elif getSquareState(board, r, c) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
+            break
+        else:
+            break
+    for r, c in zip(range(row-1, -1, -1), range(col-1, -1, -1)):
+        if getSquareState(board, r, c) == SquareState.EMPTY:
+            possibleMoves.append([r, c])
+        elif getSquareState(board, r, c) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
+            possibleMoves.append([r, c])
+            break
+        elif getSquareState(board, r, c) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
+            break
+        else:
+            break
+    return possibleMoves
+
+#finds valid moves for queens
+def queenMovement(board, row, col, isWhiteTurn):
+    possibleMoves = []
+    possibleMoves.extend(rookMovement(board, row, col, isWhiteTurn))
+    possibleMoves.extend(bishopMovement(board, row, col, isWhiteTurn))
+    return possibleMoves
+
+#finds valid moves for kings
+def kingMovement(board, row, col, isWhiteTurn):
+    possibleMoves = []
+    #Regular Movement
+    moveShape = [[1,1], [-1,1], [0,1], [1,0], [1,-1], [-1,-1], [0,-1], [-1,0]]
+    for move in moveShape:
+        if getSquareState(board, row+move[0], col+move[1]) == SquareState.EMPTY or getSquareState(board, row+move[0], col+move[1]) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
+            possibleMoves.append([row+move[0], col+move[1]])
+    #castling
+    if not board[row][col].hasMoved and isWhiteTurn:
+        if getSquareState(board, 0, 0) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK) and not board[0][0].hasMoved and getSquareState(board, 1, 0) == SquareState.EMPTY and getSquareState(board, 2, 0) == SquareState.EMPTY and getSquareState(board, 3, 0) == SquareState.EMPTY:
+            possibleMoves.append([2, 0])
+        if getSquareState(board, 7, 0) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK) and not board[7][0].hasMoved and getSquareState(board, 6, 0) == SquareState.EMPTY and getSquareState(board, 5, 0) == SquareState.EMPTY:
+            possibleMoves.append([6, 0])
+    if not board[row][col].hasMoved and not isWhiteTurn:
+        if getSquareState(board, 0, 7) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK) and not board[0][7].hasMoved and getSquareState(board, 1, 7) == SquareState.EMPTY and getSquareState(board, 2, 7) == SquareState.EMPTY and getSquareState(board, 3, 7) == SquareState.EMPTY:
+            possibleMoves.append([2, 7])
+        if getSquareState(board, 7, 7) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK) and not board[7][7].hasMoved and getSquareState(board, 6, 7) == SquareState.EMPTY and getSquareState(board, 5, 7) == SquareState.EMPTY:
+            possibleMoves.append([6, 7])
+
+    return possibleMoves
+
+#finds the index of an item in a 2d array
+def getIndexOf(array2d, item):
+    for array1d in array2d:
+        for arrayItem in array1d:
+            if item == arrayItem:
+                return [array2d.index(array1d), array1d.index(arrayItem)]
+    return [-1, -1]
+
+#finds whether the current players king is in check
+def isCheck(board, isWhiteTurn):
+    r,c = getIndexOf(board, Piece(True if isWhiteTurn else False, PieceType.KING))
+    for row in range(0, len(board)):
+        for col in range(0, len(board[row])):
+            if getSquareState(board, row, col) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
+                if [r, c] in getValidMoves(board, None, row, col, not isWhiteTurn, False):
+                    return True
+    return False
@@ -0,0 +1,947 @@
+from enum import Enum
+import random
+
+#set up an enum for the state of squares
+class SquareState(Enum):
+    INVALID = -1
+    EMPTY = 0
+    LIGHT = 1
+    DARK = 2
+
+#set up an enum for the type of a piece
+class PieceType(Enum):
+    PAWN = "Pawn"
+    KNIGHT = "Knight"
+    BISHOP = "Bishop"
+    ROOK = "Rook"
+    QUEEN = "Queen"
+    KING = "King"
+
+#set up an enum for the ways a game can end
+class EndType(Enum):
+    PLAYING = "Still Playing"
+    CHECKMATE = "Checkmate"
+    STALEMATE = "Stalemate"
+    INSUFFICIENT = "Insufficient Material"
+
+#set up an enum for the kinds of turn a player can take
+class ActionType(Enum):
+    MOVE = "Move"
+    PLACE = "Place Platform"
+    SHIFT = "Move Platform"
+    REMOVE = "Remove Platform"
+
+#the types in the order pieceIndex numbers them
+pieceTypes = list(PieceType)
+typeIndexes = {type: index for index, type in enumerate(pieceTypes)}
+
+#numbers every kind of piece from 0 to 11, white first, so tables can be indexed by it directly
+def pieceIndex(isWhite, type):
+    return (0 if isWhite else 6) + typeIndexes[type]
+
+#set up a class for pieces
+#the slots keep pieces small, positions are copied for every move the engine tries
+class Piece:
+    __slots__ = ("isWhite", "type", "index", "justMoved2", "hasMoved")
+    #constructor
+    def __init__(self, isWhite, type):
+        self.isWhite = isWhite
+        self.type = type
+        self.index = pieceIndex(isWhite, type)
+        self.justMoved2 = False
+        self.hasMoved = False
+    #allows easier printing of the pieces
+    def __str__(self):
+        return f"{self.isWhite} {self.type.value}"
+    #allows for better direct comparisons of pieces
+    def __eq__(self, other):
+        return isinstance(other, Piece) and self.index == other.index
+    #makes a copy of the piece with its flags
+    def copy(self):
+        piece = Piece.__new__(Piece)
+        piece.isWhite = self.isWhite
+        piece.type = self.type
+        piece.index = self.index
+        piece.justMoved2 = self.justMoved2
+        piece.hasMoved = self.hasMoved
+        return piece
+
+#the pieces a pawn can promote to, in the order the promotion menu shows them
+promotionTypes = [PieceType.QUEEN, PieceType.ROOK, PieceType.BISHOP, PieceType.KNIGHT]
+
+#the back rank of both sides, from the top of the board to the bottom
+backRank = [PieceType.ROOK, PieceType.KNIGHT, PieceType.BISHOP, PieceType.QUEEN, PieceType.KING, PieceType.BISHOP, PieceType.KNIGHT, PieceType.ROOK]
+
+#builds the board with the pieces in their starting squares
+def startingBoard():
+    board = []
+    for type in backRank:
+        board.append([Piece(True, type), Piece(True, PieceType.PAWN), None, None, None, None, Piece(False, PieceType.PAWN), Piece(False, type)])
+    return board
+
+#builds the array with the moveable platforms
+#0 means no platform,
+#1 means it can be moved or removed,
+#>2 means it's locked,
+#<0 means none can be placed
+def emptyPlatforms():
+    return [[0 for col in range(8)] for row in range(7)]
+
+#random 64 bit numbers that are xored together into a key for each position
+#the seed is fixed so a position has the same key in every process
+zobristRandom = random.Random(2022)
+#a number for each piece on each square, indexed by pieceIndex and then row*8+col
+pieceKeys = [[zobristRandom.getrandbits(64) for square in range(64)] for index in range(12)]
+#added on top of the piece for the flags castling and en passant depend on
+hasMovedKeys = [zobristRandom.getrandbits(64) for square in range(64)]
+justMoved2Keys = [zobristRandom.getrandbits(64) for square in range(64)]
+#added when it's black's turn
+blackTurnKey = zobristRandom.getrandbits(64)
+#added when a side used a platform on their last turn
+justPlatformedKeys = {True: zobristRandom.getrandbits(64), False: zobristRandom.getrandbits(64)}
+#a number for each value each platform slot can have, made up front for cooldowns up to platformKeyRange
+platformKeyRange = 32
+platformKeys = [[{value: zobristRandom.getrandbits(64) for value in range(-platformKeyRange, platformKeyRange+1) if value != 0} for col in range(8)] for row in range(7)]
+
+#the number for a value of a platform slot, longer cooldowns get theirs the first time they're needed,
+#seeded by the slot and value so they're the same in every process too
+def platformKey(row, col, value):
+    keys = platformKeys[row][col]
+    key = keys.get(value)
+    if key is None:
+        key = keys[value] = random.Random(f"platform {row} {col} {value}").getrandbits(64)
+    return key
+
+#the part of the key for a piece standing on a square
+def pieceKey(piece, row, col):
+    if piece is None:
+        return 0
+    square = row*8+col
+    key = pieceKeys[piece.index][square]
+    if piece.hasMoved:
+        key ^= hasMovedKeys[square]
+    if piece.justMoved2:
+        key ^= justMoved2Keys[square]
+    return key
+
+#the part of the key for the platforms and their cooldowns
+def platformsKey(platforms):
+    key = 0
+    for row in range(len(platforms)):
+        for col in range(len(platforms[row])):
+            if platforms[row][col] != 0:
+                key ^= platformKey(row, col, platforms[row][col])
+    return key
+
+#works out the key of a position from scratch, GameState keeps its key up to date as it goes
+def zobristKey(game):
+    key = platformsKey(game.platforms)
+    for row in range(8):
+        for col in range(8):
+            key ^= pieceKey(game.board[row][col], row, col)
+    if not game.isWhiteTurn:
+        key ^= blackTurnKey
+    if game.whiteJustPlatformed:
+        key ^= justPlatformedKeys[True]
+    if game.blackJustPlatformed:
+        key ^= justPlatformedKeys[False]
+    return key
+
+#the full state of a game, with no display attached
+class GameState:
+    #constructor
+    def __init__(self, board=None, platforms=None, isWhiteTurn=True, maxPlatforms=4, platformCooldown=7):
+        self.board = board if board is not None else startingBoard()
+        self.platforms = platforms if platforms is not None else emptyPlatforms()
+        self.isWhiteTurn = isWhiteTurn
+        #where each king is, kept up to date as pieces move and fall
+        self.kings = {True: findKing(self.board, True), False: findKing(self.board, False)}
+        self.amtPlatforms = sum(1 for row in self.platforms for value in row if value > 0)
+        self.whiteJustPlatformed = False
+        self.blackJustPlatformed = False
+        self.maxPlatforms = maxPlatforms
+        self.platformCooldown = platformCooldown
+        #the zobrist key of the position, updated by every change below
+        self.key = zobristKey(self)
+        #how many of each piece each side has by pieceIndex, kept up to date as pieces are taken and promoted
+        self.material = countMaterial(self.board)
+        #the last result of checkEnding and the key of the position it was for
+        self.ending = None
+        self.endingKey = None
+        #the last result of getPlatformActions and the key of the position it was for
+        self.platformActions = None
+        self.platformActionsKey = None
+        #the pieces that fell after the last action
+        self.lastDrops = []
+        #a Delta for every action taken, and the actions taken back that can be redone
+        self.history = []
+        self.redoActions = []
+
+    #makes an independent copy of the state
+    def copy(self):
+        game = GameState.__new__(GameState)
+        game.__dict__.update(self.__dict__)
+        game.board = [[None if piece is None else piece.copy() for piece in row] for row in self.board]
+        game.platforms = [row[:] for row in self.platforms]
+        game.kings = dict(self.kings)
+        game.material = self.material[:]
+        #the history holds the pieces of this board, so a copy starts without one
+        game.history = []
+        game.redoActions = []
+        return game
+
+    #finds the state of a square
+    def getSquareState(self, row, col):
+        return getSquareState(self.board, row, col)
+
+    #finds all the valid moves for the piece on a square
+    def getValidMoves(self, row, col, checkingChecks=True):
+        return getValidMoves(self.board, self.platforms, row, col, self.isWhiteTurn, checkingChecks, self.kings[self.isWhiteTurn])
+
+    #finds whether the current players king is in check
+    def isCheck(self, isWhite=None):
+        isWhite = self.isWhiteTurn if isWhite is None else isWhite
+        return isCheck(self.board, isWhite, self.kings[isWhite])
+
+    #lets the pieces in the columns an action disturbed fall and follows the kings down
+    #the falls are kept in lastDrops as (fromRow, toRow, col) so a display can animate them afterwards
+    #with onGravityPass the drops are worked out first, then taken back and shown pass by pass
+    def applyGravity(self, cols, onGravityPass=None):
+        self.lastDrops = dropPieces(self.board, self.platforms, cols)
+        for fromRow, toRow, col in self.lastDrops:
+            piece = self.board[toRow][col]
+            self.key ^= pieceKey(piece, fromRow, col) ^ pieceKey(piece, toRow, col)
+            for isWhite, king in self.kings.items():
+                if king == [fromRow, col]:
+                    self.kings[isWhite] = [toRow, col]
+        if onGravityPass is not None:
+            liftPieces(self.board, self.lastDrops)
+            gravity(self.board, self.platforms, onGravityPass)
+
+    #runs the platform cooldowns and keeps the key in step
+    def tickPlatforms(self):
+        for row, platformRow in enumerate(self.platforms):
+            for col, value in enumerate(platformRow):
+                if value < 0:
+                    self.setPlatform(row, col, value+1)
+                elif value > 1:
+                    self.setPlatform(row, col, value-1)
+
+    #sets a platform slot and keeps the key in step
+    def setPlatform(self, row, col, value):
+        old = self.platforms[row][col]
+        if old != 0:
+            self.key ^= platformKey(row, col, old)
+        if value != 0:
+            self.key ^= platformKey(row, col, value)
+        self.platforms[row][col] = value
+
+    #whether moving a piece there would promote it
+    def isPromotion(self, pieceFrom, pieceTo):
+        return getPiece(self.board, pieceFrom[0], pieceFrom[1]).type == PieceType.PAWN and (pieceTo[1] == 0 or pieceTo[1] == 7)
+
+    #whether the side to move has used a platform on their last turn
+    def justPlatformed(self):
+        return self.whiteJustPlatformed if self.isWhiteTurn else self.blackJustPlatformed
+
+    #hands the turn over once a move or platform action is done
+    def endTurn(self, platformed):
+        if self.justPlatformed() != platformed:
+            self.key ^= justPlatformedKeys[self.isWhiteTurn]
+        self.key ^= blackTurnKey
+        if platformed:
+            if self.isWhiteTurn:
+                self.whiteJustPlatformed = True
+            else:
+                self.blackJustPlatformed = True
+        elif self.isWhiteTurn:
+            self.whiteJustPlatformed = False
+        else:
+            self.blackJustPlatformed = False
+        self.isWhiteTurn = not self.isWhiteTurn
+
+    #updates the board once a move has been made
+    def makeMove(self, pieceFrom, pieceTo, promotion=PieceType.QUEEN, onGravityPass=None):
+        board = self.board
+        for row, pieces in enumerate(board):
+            for col, piece in enumerate(pieces):
+                if piece is not None and piece.justMoved2 and piece.isWhite == self.isWhiteTurn:
+                    self.key ^= justMoved2Keys[row*8+col]
+                    piece.justMoved2 = False
+        #every square the move can change, their part of the key is taken out now and put back at the end
+        touched = [(pieceFrom[0], pieceFrom[1]), (pieceTo[0], pieceTo[1])]
+        if pieceFrom[1] != pieceTo[1]:
+            touched.append((pieceTo[0], pieceFrom[1]))
+        if board[pieceFrom[0]][pieceFrom[1]].type == PieceType.KING and abs(pieceTo[0]-pieceFrom[0]) > 1:
+            touched.extend([(0, pieceFrom[1]), (3, pieceFrom[1]), (5, pieceFrom[1]), (7, pieceFrom[1])])
+        touched = set(touched)
+        for row, col in touched:
+            self.key ^= pieceKey(board[row][col], row, col)
+        promoting = False
+        if getPiece(board, pieceFrom[0], pieceFrom[1]).type == PieceType.PAWN:
+            #En Passant Stuff
+            if abs(pieceTo[1]-pieceFrom[1]) == 2:
+                board[pieceFrom[0]][pieceFrom[1]].justMoved2 = True
+            if pieceFrom[0] != pieceTo[0] and pieceFrom[1] != pieceTo[1] and getSquareState(board, pieceTo[0], pieceFrom[1]) == (SquareState.DARK if self.isWhiteTurn else SquareState.LIGHT) and board[pieceTo[0]][pieceFrom[1]].justMoved2:
+                self.takeMaterial(board[pieceTo[0]][pieceFrom[1]])
+                board[pieceTo[0]][pieceFrom[1]] = None
+            #Pawn promotion stuff
+            promoting = pieceTo[1] == 0 or pieceTo[1] == 7
+        #Castling
+        if getPiece(board, pieceFrom[0], pieceFrom[1]).type == PieceType.KING:
+            if abs(pieceTo[0]-pieceFrom[0]) > 1:
+                if pieceTo[0] == 6:
+                    board[5][pieceFrom[1]] = board[7][pieceFrom[1]]
+                    board[7][pieceFrom[1]] = None
+                else:
+                    board[3][pieceFrom[1]] = board[0][pieceFrom[1]]
+                    board[0][pieceFrom[1]] = None
+
+        for isWhite, king in self.kings.items():
+            if king == [pieceTo[0], pieceTo[1]]:
+                self.kings[isWhite] = None
+        if board[pieceFrom[0]][pieceFrom[1]].type == PieceType.KING:
+            self.kings[self.isWhiteTurn] = [pieceTo[0], pieceTo[1]]
+        if board[pieceTo[0]][pieceTo[1]] is not None:
+            self.takeMaterial(board[pieceTo[0]][pieceTo[1]])
+        board[pieceTo[0]][pieceTo[1]] = board[pieceFrom[0]][pieceFrom[1]]
+        board[pieceFrom[0]][pieceFrom[1]] = None
+        board[pieceTo[0]][pieceTo[1]].hasMoved = True
+        #the promoted piece is a fresh piece, it falls the same column as the pawn would have
+        if promoting:
+            self.takeMaterial(board[pieceTo[0]][pieceTo[1]])
+            board[pieceTo[0]][pieceTo[1]] = Piece(self.isWhiteTurn, promotion)
+            self.material[pieceIndex(self.isWhiteTurn, promotion)] += 1
+        for row, col in touched:
+            self.key ^= pieceKey(board[row][col], row, col)
+        self.endTurn(False)
+        #castling and en passant stay in the column the piece left
+        self.applyGravity((pieceFrom[1], pieceTo[1]) if pieceFrom[1] != pieceTo[1] else (pieceFrom[1],), onGravityPass)
+        self.tickPlatforms()
+
+    #counts a piece as gone from the board
+    def takeMaterial(self, piece):
+        self.material[piece.index] -= 1
+
+    #how many pieces of a type both sides have
+    def amtOfType(self, type):
+        return self.material[pieceIndex(True, type)] + self.material[pieceIndex(False, type)]
+
+    #how many pieces of a type one side has
+    def amtOfPiece(self, isWhite, type):
+        return self.material[pieceIndex(isWhite, type)]
+
+    #whether the side to move can put a new platform there
+    def canPlacePlatform(self, row, col):
+        return (ActionType.PLACE, row, col, -1, -1, None) in self.getPlatformActions()
+
+    #whether the side to move can move a platform from one line to another
+    def canMovePlatform(self, oldRow, oldCol, newRow, newCol):
+        return (ActionType.SHIFT, oldRow, oldCol, newRow, newCol, None) in self.getPlatformActions()
+
+    #whether the side to move can remove a platform
+    def canRemovePlatform(self, row, col):
+        return (ActionType.REMOVE, row, col, -1, -1, None) in self.getPlatformActions()
+
+    #adds a platform, nothing can fall from adding one
+    def placePlatform(self, row, col):
+        self.amtPlatforms += 1
+        self.setPlatform(row, col, self.platformCooldown)
+        self.lastDrops = []
+        self.endTurn(True)
+        self.tickPlatforms()
+
+    #moves a platform to a different line
+    def movePlatform(self, oldRow, oldCol, newRow, newCol, onGravityPass=None):
+        self.setPlatform(newRow, newCol, self.platformCooldown)
+        self.setPlatform(oldRow, oldCol, -self.platformCooldown + 3)
+        self.endTurn(True)
+        self.applyGravity((oldCol,), onGravityPass)
+        self.tickPlatforms()
+
+    #removes a platform
+    def removePlatform(self, row, col, onGravityPass=None):
+        self.amtPlatforms -= 1
+        self.setPlatform(row, col, -self.platformCooldown + 3)
+        self.endTurn(True)
+        self.applyGravity((col,), onGravityPass)
+        self.tickPlatforms()
+
+    #finds every turn the side to move can take, piece moves first and then platform actions
+    #each action is (ActionType, row, col, toRow, toCol, promotion), with -1 and None where unused
+    def getActions(self):
+        actions = []
+        board = self.board
+        for row in range(8):
+            for col in range(8):
+                if getSquareState(board, row, col) != (SquareState.LIGHT if self.isWhiteTurn else SquareState.DARK):
+                    continue
+                seen = set()
+                for move in self.getValidMoves(row, col):
+                    #en passant and a capture can land on the same square
+                    if move in seen:
+                        continue
+                    seen.add(move)
+                    if self.isPromotion([row, col], move):
+                        for promotion in promotionTypes:
+                            actions.append((ActionType.MOVE, row, col, move[0], move[1], promotion))
+                    else:
+                        actions.append((ActionType.MOVE, row, col, move[0], move[1], None))
+        actions.extend(self.getPlatformActions())
+        return actions
+
+    #finds every platform action the side to move can take, worked out once per position
+    def getPlatformActions(self):
+        if self.platformActionsKey != self.key:
+            self.platformActions = self.findPlatformActions()
+            self.platformActionsKey = self.key
+        return self.platformActions
+
+    #works out the platform actions from the board
+    #actions that leave the same board after gravity share one gravity and check
+    def findPlatformActions(self):
+        actions = []
+        if self.justPlatformed():
+            return actions
+        board = self.board
+        platforms = self.platforms
+        king = self.kings[self.isWhiteTurn]
+        inCheck = self.isCheck()
+        canPlace = self.amtPlatforms < self.maxPlatforms and not inCheck
+        freeSlots = [(row, col) for row in range(len(platforms)) for col in range(len(platforms[row])) if platforms[row][col] == 0]
+        for row in range(len(platforms)):
+            for col in range(len(platforms[row])):
+                if platforms[row][col] == 0 and canPlace:
+                    actions.append((ActionType.PLACE, row, col, -1, -1, None))
+                elif platforms[row][col] == 1:
+                    #nothing stands on the platform, so nothing falls when it goes
+                    holdsNothing = board[row][col] is None
+                    removeSafe = not inCheck if holdsNothing else checkPlatform(board, platforms, self.isWhiteTurn, row, col, -1, -1, king)
+                    if removeSafe:
+                        actions.append((ActionType.REMOVE, row, col, -1, -1, None))
+                    #a new platform never stops anything, the board is settled so it's already held up
+                    #so moving a platform to another column drops the same pieces as removing it
+                    for newRow, newCol in freeSlots:
+                        if holdsNothing or newCol != col:
+                            safe = removeSafe
+                        else:
+                            safe = checkPlatform(board, platforms, self.isWhiteTurn, row, col, newRow, newCol, king)
+                        if safe:
+                            actions.append((ActionType.SHIFT, row, col, newRow, newCol, None))
+        return actions
+
+    #whether an action is one getActions would list, without listing them all
+    #only the piece's own moves are generated for a move, platform actions come from the cached list
+    def isLegal(self, action):
+        type, row, col, toRow, toCol, promotion = action
+        if self.checkEnding() != EndType.PLAYING:
+            return False
+        if type != ActionType.MOVE:
+            return action in self.getPlatformActions()
+        if getSquareState(self.board, row, col) != (SquareState.LIGHT if self.isWhiteTurn else SquareState.DARK):
+            return False
+        if (toRow, toCol) not in self.getValidMoves(row, col):
+            return False
+        if self.isPromotion((row, col), (toRow, toCol)):
+            return promotion in promotionTypes
+        return promotion is None
+
+    #takes a turn given as an action from getActions, remembering how to take it back
+    def doAction(self, action, onGravityPass=None):
+        delta = Delta(self, action)
+        type, row, col, toRow, toCol, promotion = action
+        if type == ActionType.MOVE:
+            self.makeMove([row, col], [toRow, toCol], promotion if promotion is not None else PieceType.QUEEN, onGravityPass)
+        elif type == ActionType.PLACE:
+            self.placePlatform(row, col)
+        elif type == ActionType.SHIFT:
+            self.movePlatform(row, col, toRow, toCol, onGravityPass)
+        else:
+            self.removePlatform(row, col, onGravityPass)
+        delta.drops = self.lastDrops
+        self.history.append(delta)
+        self.redoActions = []
+
+    #takes the last action back, only the squares and platforms it changed are touched
+    #returns the action, or None if there is nothing to undo
+    def undo(self):
+        if not self.history:
+            return None
+        delta = self.history.pop()
+        delta.restore(self)
+        self.redoActions.append(delta.action)
+        return delta.action
+
+    #takes the last undone action again, returns it or None if there is nothing to redo
+    def redo(self, onGravityPass=None):
+        if not self.redoActions:
+            return None
+        redoActions = self.redoActions
+        action = redoActions.pop()
+        self.doAction(action, onGravityPass)
+        self.redoActions = redoActions
+        return action
+
+    #determines whether the game is over, worked out once per position
+    def checkEnding(self):
+        if self.endingKey != self.key:
+            self.ending = self.findEnding()
+            self.endingKey = self.key
+        return self.ending
+
+    #works out whether the game is over from the board
+    def findEnding(self):
+        board = self.board
+        hasMove = False
+        pawnHasMove = False
+        for row in range(len(board)):
+            for col in range(len(board[row])):
+                piece = board[row][col]
+                if piece is None:
+                    continue
+                #if no piece can move --> stalemate or checkmate
+                if not hasMove and piece.isWhite == self.isWhiteTurn and len(getValidMoves(board, self.platforms, row, col, self.isWhiteTurn, True, self.kings[self.isWhiteTurn])) > 0:
+                    hasMove = True
+                if pawnHasMove or piece.type != PieceType.PAWN:
+                    continue
+                #if a pawn can move --> still life in the position
+                if piece.isWhite and (len(getValidMoves(board, self.platforms, row, col, True, True, self.kings[True])) > 0 or col == 7):
+                    pawnHasMove = True
+                elif not piece.isWhite and (len(getValidMoves(board, self.platforms, row, col, False, True, self.kings[False])) > 0 or col == 0):
+                    pawnHasMove = True
+                #if a pawn is not on the bottom --> still life in the position
+                elif row < 7:
+                    pawnHasMove = True
+        #Checkmate vs Stalemate
+        if not hasMove:
+            if not self.isCheck(True) and not self.isCheck(False):
+                return EndType.STALEMATE
+            return EndType.CHECKMATE
+        #If any rook, queen, bishop, or more than 2 knights are on a team, checkmate is possible
+        if self.amtOfType(PieceType.ROOK) > 0 or self.amtOfType(PieceType.QUEEN) > 0 or self.amtOfType(PieceType.BISHOP) > 0 or self.amtOfPiece(True, PieceType.KNIGHT) > 2 or self.amtOfPiece(False, PieceType.KNIGHT) > 2:
+            return EndType.PLAYING
+        #If a pawn can move then play on
+        if pawnHasMove:
+            return EndType.PLAYING
+        #If no queens, rooks, bishops
+        if self.amtOfType(PieceType.ROOK) == 0 and self.amtOfType(PieceType.QUEEN) == 0 and self.amtOfType(PieceType.BISHOP) == 0:
+            #if no knights and pawns cant move --> insufficient material
+            if self.amtOfType(PieceType.KNIGHT) == 0 and not pawnHasMove:
+                return EndType.INSUFFICIENT
+            #if no pawns and not enough knights --> Insufficient material
+            if self.amtOfPiece(True, PieceType.PAWN) == 0 and self.amtOfPiece(True, PieceType.KNIGHT) <= 2 and self.amtOfPiece(False, PieceType.PAWN) == 0 and self.amtOfPiece(False, PieceType.KNIGHT) <= 2:
+                return EndType.INSUFFICIENT
+        return EndType.PLAYING
+
+#what an action changes, recorded before it happens so it can be taken back
+class Delta:
+    #constructor
+    def __init__(self, game, action):
+        self.action = action
+        self.isWhiteTurn = game.isWhiteTurn
+        self.whiteJustPlatformed = game.whiteJustPlatformed
+        self.blackJustPlatformed = game.blackJustPlatformed
+        self.amtPlatforms = game.amtPlatforms
+        self.key = game.key
+        self.kings = dict(game.kings)
+        self.material = game.material[:]
+        self.ending = game.ending
+        self.endingKey = game.endingKey
+        self.lastDrops = game.lastDrops
+        #filled in once gravity is done
+        self.drops = []
+        board = game.board
+        type, row, col, toRow, toCol, promotion = action
+        #every square a move can write to, with the piece that was there
+        self.squares = []
+        #the flags of every piece a move can change
+        self.flags = []
+        if type == ActionType.MOVE:
+            touched = {(row, col), (toRow, toCol), (toRow, col)}
+            if board[row][col].type == PieceType.KING and abs(toRow-row) > 1:
+                touched.update([(0, col), (3, col), (5, col), (7, col)])
+            self.squares = [(r, c, board[r][c]) for r, c in touched]
+            mover = board[row][col]
+            self.flags.append((mover, mover.justMoved2, mover.hasMoved))
+            for pieces in board:
+                for piece in pieces:
+                    if piece is not None and piece.justMoved2 and piece.isWhite == game.isWhiteTurn and piece is not mover:
+                        self.flags.append((piece, True, piece.hasMoved))
+        #the platform slots the action or the cooldowns can change
+        self.platforms = [(r, c, value) for r, platformRow in enumerate(game.platforms) for c, value in enumerate(platformRow) if value != 0]
+        if type != ActionType.MOVE:
+            self.platforms.append((row, col, game.platforms[row][col]))
+        if type == ActionType.SHIFT:
+            self.platforms.append((toRow, toCol, game.platforms[toRow][toCol]))
+
+    #puts the game back the way it was before the action
+    def restore(self, game):
+        liftPieces(game.board, self.drops)
+        for row, col, piece in self.squares:
+            game.board[row][col] = piece
+        for piece, justMoved2, hasMoved in self.flags:
+            piece.justMoved2 = justMoved2
+            piece.hasMoved = hasMoved
+        for row, col, value in self.platforms:
+            game.platforms[row][col] = value
+        game.isWhiteTurn = self.isWhiteTurn
+        game.whiteJustPlatformed = self.whiteJustPlatformed
+        game.blackJustPlatformed = self.blackJustPlatformed
+        game.amtPlatforms = self.amtPlatforms
+        game.key = self.key
+        game.kings = self.kings
+        game.material = self.material
+        game.ending = self.ending
+        game.endingKey = self.endingKey
+        game.lastDrops = self.lastDrops
+
+#checks to see if removing the platform would result in its own king in check
+def checkPlatform(board, platforms, isWhiteTurn, oldRow, oldCol, newRow, newCol, kingPos=None):
+    oldValue = platforms[oldRow][oldCol]
+    platforms[oldRow][oldCol] = 0
+    if newRow != -1:
+        newValue = platforms[newRow][newCol]
+        platforms[newRow][newCol] = 1
+    if kingPos is None:
+        kingPos = findKing(board, isWhiteTurn)
+    drops = dropPieces(board, platforms, (oldCol,))
+    safe = not isCheck(board, isWhiteTurn, followDrops(kingPos, drops))
+    liftPieces(board, drops)
+    if newRow != -1:
+        platforms[newRow][newCol] = newValue
+    platforms[oldRow][oldCol] = oldValue
+    return safe
+
+#counts how many of each piece each side has, indexed by pieceIndex
+def countMaterial(board):
+    material = [0] * 12
+    for row in board:
+        for piece in row:
+            if piece is not None:
+                material[piece.index] += 1
+    return material
+
+#runs the cooldowns on the platforms
+def setPlatforms(platforms):
+    for row in range(len(platforms)):
+        for col in range(len(platforms[row])):
+            if platforms[row][col] < 0:
+                platforms[row][col]+=1
+            elif platforms[row][col] > 1:
+                platforms[row][col]-=1
+    return platforms
+
+#enact gravity on the board, onPass is called with the board after every pass
+def gravity(board, platforms, onPass=None):
+    if onPass is None:
+        dropPieces(board, platforms)
+        return board
+    for stop in range(8):
+        for row in reversed(range(stop+1, 8)):
+            for col in range(len(board)):
+                if getSquareState(board, row, col) == SquareState.EMPTY and platforms[row-1][col] < 1:
+                    board[row][col] = board[row-1][col]
+                    board[row-1][col] = None
+        onPass(board)
+    return board
+
+#lets every piece in the columns fall as far as it can in one pass per column
+#the board is settled after every action, so only the columns an action disturbed need to be given
+#returns the drops as [fromRow, toRow, col] so liftPieces can put them back
+def dropPieces(board, platforms, cols=range(8)):
+    drops = []
+    for col in cols:
+        bottom = 7
+        for row in range(7, -1, -1):
+            #a platform under this row starts a new stack
+            if row < 7 and platforms[row][col] > 0:
+                bottom = row
+            piece = board[row][col]
+            if piece is not None:
+                if row != bottom:
+                    board[bottom][col] = piece
+                    board[row][col] = None
+                    drops.append((row, bottom, col))
+                bottom -= 1
+    return drops
+
+#finds where a square's piece ended up after the drops made by dropPieces
+def followDrops(pos, drops):
+    if pos is None:
+        return None
+    for fromRow, toRow, col in drops:
+        if fromRow == pos[0] and col == pos[1]:
+            return [toRow, col]
+    return pos
+
+#undoes the drops made by dropPieces
+def liftPieces(board, drops):
+    for fromRow, toRow, col in reversed(drops):
+        board[fromRow][col] = board[toRow][col]
+        board[toRow][col] = None
+
+#finds the state of a square
+def getSquareState(board, row, col):
+    if row < 0 or row > 7 or col < 0 or col > 7:
+        return SquareState.INVALID
+    piece = board[row][col]
+    if piece is None:
+        return SquareState.EMPTY
+    if piece.isWhite:
+        return SquareState.LIGHT
+    return SquareState.DARK
+
+#obtains the piece at a square
+def getPiece(board, row, col):
+    return board[row][col]
+
+#finds all the valid moves from a given position
+#kingPos is where the mover's king is, it's searched for if not given
+def getValidMoves(board, platforms, row, col, isWhiteTurn, checkingChecks, kingPos=None):
+    validMoves = []
+    if getPiece(board, row, col).type == PieceType.PAWN:
+        validMoves = pawnMovement(board, row, col, isWhiteTurn)
+    elif getPiece(board, row, col).type == PieceType.ROOK:
+        validMoves = rookMovement(board, row, col, isWhiteTurn)
+    elif getPiece(board, row, col).type == PieceType.KNIGHT:
+        validMoves = knightMovement(board, row, col, isWhiteTurn)
+    elif getPiece(board, row, col).type == PieceType.BISHOP:
+        validMoves = bishopMovement(board, row, col, isWhiteTurn)
+    elif getPiece(board, row, col).type == PieceType.QUEEN:
+        validMoves = queenMovement(board, row, col, isWhiteTurn)
+    elif getPiece(board, row, col).type == PieceType.KING:
+        validMoves = kingMovement(board, row, col, isWhiteTurn)
+    else:
+        return False
+    if checkingChecks:
+        safeMoves = []
+        movingKing = board[row][col].type == PieceType.KING
+        if kingPos is None and not movingKing:
+            kingPos = findKing(board, isWhiteTurn)
+        for move in validMoves:
+            #try the move on the board itself and put everything back afterwards
+            captured = board[move[0]][move[1]]
+            board[move[0]][move[1]] = board[row][col]
+            board[row][col] = None
+            drops = dropPieces(board, platforms, (col, move[1]) if col != move[1] else (col,))
+            if movingKing:
+                king = followDrops(move, drops)
+            elif kingPos is not None and kingPos[0] == move[0] and kingPos[1] == move[1]:
+                king = None
+            else:
+                king = followDrops(kingPos, drops)
+            if king is None or not isAttacked(board, king[0], king[1], not isWhiteTurn):
+                safeMoves.append(move)
+            liftPieces(board, drops)
+            board[row][col] = board[move[0]][move[1]]
+            board[move[0]][move[1]] = captured
+        return safeMoves
+    return validMoves
+
+#finds valid moves for pawns
+def pawnMovement(board, row, col, isWhiteTurn):
+    possibleMoves = []
+    square = row*8+col
+    doublePush = pawnDoublePushes[isWhiteTurn][square]
+    if doublePush is not None and board[doublePush[0][0]][doublePush[0][1]] is None and board[doublePush[1][0]][doublePush[1][1]] is None:
+        possibleMoves.append(doublePush[0])
+    #En Passant
+    for (passedRow, passedCol), move in pawnPassings[isWhiteTurn][square]:
+        piece = board[passedRow][passedCol]
+        if piece is not None and piece.isWhite != isWhiteTurn and piece.justMoved2:
+            possibleMoves.append(move)
+    #Move Forward
+    push = pawnPushes[isWhiteTurn][square]
+    if push is not None and board[push[0]][push[1]] is None:
+        possibleMoves.append(push)
+    #Attacking
+    for move in pawnCaptures[isWhiteTurn][square]:
+        piece = board[move[0]][move[1]]
+        if piece is not None and piece.isWhite != isWhiteTurn:
+            possibleMoves.append(move)
+    return possibleMoves
+
+#adds the moves along rays, up to and including the first enemy piece
+def slidingMovement(board, rays, isWhiteTurn, possibleMoves):
+    for ray in rays:
+        for move in ray:
+            piece = board[move[0]][move[1]]
+            if piece is None:
+                possibleMoves.append(move)
+                continue
+            if piece.isWhite != isWhiteTurn:
+                possibleMoves.append(move)
+            break
+    return possibleMoves
+
+#adds the squares of a jump table that are empty or hold an enemy piece
+def jumpingMovement(board, targets, isWhiteTurn, possibleMoves):
+    for move in targets:
+        piece = board[move[0]][move[1]]
+        if piece is None or piece.isWhite != isWhiteTurn:
+            possibleMoves.append(move)
+    return possibleMoves
+
+#finds valid moves for rooks
+def rookMovement(board, row, col, isWhiteTurn):
+    return slidingMovement(board, rookRayTable[row*8+col], isWhiteTurn, [])
+
+#finds valid moves for knights
+def knightMovement(board, row, col, isWhiteTurn):
+    return jumpingMovement(board, knightTable[row*8+col], isWhiteTurn, [])
+
+#finds valid moves for bishops
+def bishopMovement(board, row, col, isWhiteTurn):
+    return slidingMovement(board, bishopRayTable[row*8+col], isWhiteTurn, [])
+
+#finds valid moves for queens
+def queenMovement(board, row, col, isWhiteTurn):
+    possibleMoves = slidingMovement(board, rookRayTable[row*8+col], isWhiteTurn, [])
+    return slidingMovement(board, bishopRayTable[row*8+col], isWhiteTurn, possibleMoves)
+
+#finds valid moves for kings
+def kingMovement(board, row, col, isWhiteTurn):
+    #Regular Movement
+    possibleMoves = jumpingMovement(board, kingTable[row*8+col], isWhiteTurn, [])
+    #castling, with whatever unmoved piece of the side is in the corner
+    if not board[row][col].hasMoved:
+        backCol = 0 if isWhiteTurn else 7
+        corner = board[0][backCol]
+        if corner is not None and corner.isWhite == isWhiteTurn and not corner.hasMoved and board[1][backCol] is None and board[2][backCol] is None and board[3][backCol] is None:
+            possibleMoves.append((2, backCol))
+        corner = board[7][backCol]
+        if corner is not None and corner.isWhite == isWhiteTurn and not corner.hasMoved and board[6][backCol] is None and board[5][backCol] is None:
+            possibleMoves.append((6, backCol))
+    return possibleMoves
+
+#finds the index of an item in a 2d array
+def getIndexOf(array2d, item):
+    for array1d in array2d:
+        for arrayItem in array1d:
+            if item == arrayItem:
+                return [array2d.index(array1d), array1d.index(arrayItem)]
+    return [-1, -1]
+
+#finds where a side's king is
+def findKing(board, isWhite):
+    for row in range(8):
+        for col in range(8):
+            piece = board[row][col]
+            if piece is not None and piece.type == PieceType.KING and piece.isWhite == isWhite:
+                return [row, col]
+    return None
+
+#the squares a knight or king can reach, as [row, col] steps
+knightShape = [[1,2], [2,1], [-1,2], [-2,1], [1,-2], [2,-1], [-1,-2], [-2,-1]]
+kingShape = [[1,1], [-1,1], [0,1], [1,0], [1,-1], [-1,-1], [0,-1], [-1,0]]
+rookRays = [[1,0], [0,1], [-1,0], [0,-1]]
+bishopRays = [[1,1], [1,-1], [-1,1], [-1,-1]]
+
+#whether a square is on the board
+def onBoard(row, col):
+    return 0 <= row < 8 and 0 <= col < 8
+
+#the (row, col) squares each steps reaches from every square, indexed by row*8+col
+def jumpTable(shape):
+    return [tuple((row+dRow, col+dCol) for dRow, dCol in shape if onBoard(row+dRow, col+dCol)) for row in range(8) for col in range(8)]
+
+#the squares along each ray from every square, nearest first, indexed by row*8+col
+def rayTable(rays):
+    table = []
+    for row in range(8):
+        for col in range(8):
+            squareRays = []
+            for dRow, dCol in rays:
+                ray = []
+                r, c = row+dRow, col+dCol
+                while onBoard(r, c):
+                    ray.append((r, c))
+                    r, c = r+dRow, c+dCol
+                squareRays.append(tuple(ray))
+            table.append(tuple(squareRays))
+    return table
+
+#the move tables, built once when the rules are loaded
+knightTable = jumpTable(knightShape)
+kingTable = jumpTable(kingShape)
+rookRayTable = rayTable(rookRays)
+bishopRayTable = rayTable(bishopRays)
+#pawns of each side move this way along the columns
+pawnDirections = {True: 1, False: -1}
+#the square a pawn pushes to
+pawnPushes = {isWhite: [(row, col+direction) if onBoard(row, col+direction) else None for row in range(8) for col in range(8)] for isWhite, direction in pawnDirections.items()}
+#the square a pawn double pushes to and the square it passes, only from its starting column
+pawnDoublePushes = {
+    True: [((row, 3), (row, 2)) if col == 1 else None for row in range(8) for col in range(8)],
+    False: [((row, 4), (row, 5)) if col == 6 else None for row in range(8) for col in range(8)],
+}
+#the squares a pawn takes on
+pawnCaptures = {isWhite: [tuple((r, col+direction) for r in (row-1, row+1) if onBoard(r, col+direction)) for row in range(8) for col in range(8)] for isWhite, direction in pawnDirections.items()}
+#the neighbours a pawn can take en passant, with the square it lands on
+pawnPassings = {isWhite: [tuple(((r, col), (r, col+direction)) for r in (row+1, row-1) if onBoard(r, col+direction)) for row in range(8) for col in range(8)] for isWhite, direction in pawnDirections.items()}
+#the squares a pawn of a side attacks a square from, white pawns attack towards column 7 and black pawns towards column 0
+pawnAttackers = {isWhite: [tuple((r, col-direction) for r in (row-1, row+1) if onBoard(r, col-direction)) for row in range(8) for col in range(8)] for isWhite, direction in pawnDirections.items()}
+
+#whether a piece of a side and type is on any of the squares
+def anyPieceOn(board, squares, byWhite, type):
+    for row, col in squares:
+        piece = board[row][col]
+        if piece is not None and piece.isWhite == byWhite and piece.type == type:
+            return True
+    return False
+
+#whether the first piece along any of the rays belongs to a side and is one of two types
+def anySliderOn(board, rays, byWhite, type):
+    for ray in rays:
+        for row, col in ray:
+            piece = board[row][col]
+            if piece is not None:
+                if piece.isWhite == byWhite and (piece.type == type or piece.type == PieceType.QUEEN):
+                    return True
+                break
+    return False
+
+#whether a side attacks a square, looking outward from the square along every way it can be reached
+def isAttacked(board, row, col, byWhite):
+    square = row*8+col
+    return anyPieceOn(board, knightTable[square], byWhite, PieceType.KNIGHT) or anyPieceOn(board, kingTable[square], byWhite, PieceType.KING) or anyPieceOn(board, pawnAttackers[byWhite][square], byWhite, PieceType.PAWN) or anySliderOn(board, rookRayTable[square], byWhite, PieceType.ROOK) or anySliderOn(board, bishopRayTable[square], byWhite, PieceType.BISHOP)
+
+#finds whether the current players king is in check
+#kingPos is where the king is, it's searched for if not given
+def isCheck(board, isWhiteTurn, kingPos=None):
+    if kingPos is None:
+        kingPos = findKing(board, isWhiteTurn)
+        if kingPos is None:
+            return False
+    return isAttacked(board, kingPos[0], kingPos[1], not isWhiteTurn)
+
+#the letters used for promotions when writing actions down
+promotionLetters = {PieceType.QUEEN: "Q", PieceType.ROOK: "R", PieceType.BISHOP: "B", PieceType.KNIGHT: "N"}
+
+#writes an action down as text, squares and platform lines are a row digit then a column digit
+#moves are "41-43" or "46-47=Q", placing is "+25", removing is "-25" and moving a platform is "25>35"
+def actionName(action):
+    type, row, col, toRow, toCol, promotion = action
+    if type == ActionType.MOVE:
+        name = f"{row}{col}-{toRow}{toCol}"
+        if promotion is not None:
+            name += "=" + promotionLetters[promotion]
+        return name
+    if type == ActionType.PLACE:
+        return f"+{row}{col}"
+    if type == ActionType.REMOVE:
+        return f"-{row}{col}"
+    return f"{row}{col}>{toRow}{toCol}"
+
+#reads an action written by actionName
+def parseAction(name):
+    if name[0] == "+":
+        return (ActionType.PLACE, int(name[1]), int(name[2]), -1, -1, None)
+    if name[0] == "-":
+        return (ActionType.REMOVE, int(name[1]), int(name[2]), -1, -1, None)
+    if name[2] == ">":
+        return (ActionType.SHIFT, int(name[0]), int(name[1]), int(name[3]), int(name[4]), None)
+    promotion = None
+    if len(name) > 5:
+        promotion = next(type for type, letter in promotionLetters.items() if letter == name[6])
+    return (ActionType.MOVE, int(name[0]), int(name[1]), int(name[3]), int(name[4]), promotion)
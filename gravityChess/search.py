@@ -0,0 +1,258 @@
+import argparse
+import time
+from gravityChess.rules import ActionType, EndType, PieceType, actionName
+from gravityChess.perft import positionAfter
+from gravityChess.notation import parsePosition
+from gravityChess.transposition import Bound, TranspositionTable
+from gravityChess.tablebase import defaultDirectory, openTablebase
+from gravityChess.book import defaultPath, openBook
+
+#how much each piece is worth to the evaluation
+pieceValues = {
+    PieceType.PAWN: 100,
+    PieceType.KNIGHT: 300,
+    PieceType.BISHOP: 320,
+    PieceType.ROOK: 500,
+    PieceType.QUEEN: 900,
+    PieceType.KING: 0,
+}
+#a pawn is worth this much more for every column it has advanced
+pawnAdvance = 10
+#the score of giving checkmate right now, mates further away score a little less
+mateScore = 100000
+
+#raised to unwind the search once its time is up
+class SearchTimeout(Exception):
+    pass
+
+#what a search found and how much work it took
+class SearchResult:
+    #constructor, an action from the opening book wasn't searched at all
+    def __init__(self, action, score, depth, nodes, seconds, fromBook=False):
+        self.action = action
+        self.fromBook = fromBook
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.seconds = seconds
+        self.nodesPerSecond = nodes / seconds if seconds > 0 else 0
+    #allows easier printing of the result
+    def __str__(self):
+        name = actionName(self.action) if self.action is not None else "none"
+        if self.fromBook:
+            return f"{name} from the opening book in {self.seconds:.3f}s"
+        return f"{name} score {self.score} depth {self.depth} nodes {self.nodes} in {self.seconds:.3f}s ({self.nodesPerSecond:.0f} nodes/s)"
+
+#scores a position from the side to move's point of view
+def evaluate(game):
+    score = 0
+    for row in game.board:
+        for col, piece in enumerate(row):
+            if piece is None:
+                continue
+            value = pieceValues[piece.type]
+            if piece.type == PieceType.PAWN:
+                value += pawnAdvance * (col-1 if piece.isWhite else 6-col)
+            score += value if piece.isWhite else -value
+    return score if game.isWhiteTurn else -score
+
+#alpha-beta search over piece moves and platform actions with iterative deepening
+class Searcher:
+    #constructor, the table can be shared between searches to keep what they found
+    #with endgame tables the positions they cover are scored exactly instead of searched
+    #with an opening book the positions it knows are played from it without searching
+    def __init__(self, timeLimitMs=1000, maxDepth=32, table=None, tablebase=None, book=None):
+        self.timeLimitMs = timeLimitMs
+        self.maxDepth = maxDepth
+        self.table = table if table is not None else TranspositionTable()
+        self.tablebase = tablebase
+        self.book = book
+        #set from another thread to end the search early with what it has so far
+        self.stopped = False
+        self.nodes = 0
+        self.deadline = 0
+        #two quiet actions per ply that caused a cutoff before
+        self.killers = []
+
+    #finds the best action for the side to move within the time limit
+    #the search plays and takes back actions on its own copy of the game
+    def findBestMove(self, game):
+        start = time.perf_counter()
+        game = game.copy()
+        self.deadline = start + self.timeLimitMs / 1000
+        self.nodes = 0
+        self.killers = [[None, None] for ply in range(self.maxDepth+1)]
+        self.table.newSearch()
+        ending = self.endingOf(game, self.table.probe(game.key))
+        actions = game.getActions() if ending == EndType.PLAYING else []
+        if not actions:
+            return SearchResult(None, self.terminalScore(ending, 0), 0, 0, time.perf_counter() - start)
+        if self.book is not None:
+            action = self.book.chooseAction(game)
+            if action is not None:
+                return SearchResult(action, 0, 0, 0, time.perf_counter() - start, True)
+        bestAction, bestScore, bestDepth = actions[0], 0, 0
+        try:
+            for depth in range(1, self.maxDepth+1):
+                action, score = self.searchRoot(game, actions, bestAction, depth)
+                bestAction, bestScore, bestDepth = action, score, depth
+                self.table.store(game.key, depth, score, Bound.EXACT, action)
+                #a forced mate won't get any better by searching deeper
+                if abs(score) >= mateScore - self.maxDepth:
+                    break
+        except SearchTimeout:
+            pass
+        self.stopped = False
+        return SearchResult(bestAction, bestScore, bestDepth, self.nodes, time.perf_counter() - start)
+
+    #ends a running search, findBestMove returns the best action of the last finished depth
+    def stop(self):
+        self.stopped = True
+
+    #searches every root action to a depth, trying the previous best first
+    def searchRoot(self, game, actions, previousBest, depth):
+        alpha, beta = -mateScore-1, mateScore+1
+        bestAction = None
+        for action in self.orderedActions(game, actions, 0, previousBest):
+            game.doAction(action)
+            score = -self.search(game, depth-1, -beta, -alpha, 1)
+            game.undo()
+            if bestAction is None or score > alpha:
+                bestAction, alpha = action, score
+        return bestAction, alpha
+
+    #scores a finished game for the side to move
+    def terminalScore(self, ending, ply):
+        if ending == EndType.CHECKMATE:
+            return -mateScore + ply
+        return 0
+
+    #turns an endgame table value into a score, mates are counted from the root like terminalScore does
+    def tablebaseScore(self, value, ply):
+        if value > 0:
+            return mateScore - (ply + value)
+        if value < 0:
+            return -mateScore + ply + (-value-1)
+        return 0
+
+    #finds how the game stands, reusing what the table knows
+    def endingOf(self, game, entry):
+        if entry is not None and entry.ending is not None:
+            return entry.ending
+        ending = game.checkEnding()
+        self.table.storeEnding(game.key, ending)
+        return ending
+
+    #mate scores are stored as the distance from the position instead of from the root
+    def toTable(self, score, ply):
+        if score >= mateScore - 1000:
+            return score + ply
+        if score <= -mateScore + 1000:
+            return score - ply
+        return score
+
+    #turns a stored score back into one from the root
+    def fromTable(self, score, ply):
+        if score >= mateScore - 1000:
+            return score - ply
+        if score <= -mateScore + 1000:
+            return score + ply
+        return score
+
+    #negamax alpha-beta, returns the score for the side to move
+    def search(self, game, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.stopped or time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        entry = self.table.probe(game.key)
+        if entry is not None and entry.depth >= depth and entry.depth > 0:
+            score = self.fromTable(entry.score, ply)
+            if entry.bound == Bound.EXACT or (entry.bound == Bound.LOWER and score >= beta) or (entry.bound == Bound.UPPER and score <= alpha):
+                return score
+        if self.tablebase is not None:
+            value = self.tablebase.probe(game)
+            if value is not None:
+                #a position the tables win is still a draw when the rules call the material insufficient
+                ending = self.endingOf(game, entry) if value != 0 else EndType.PLAYING
+                if ending != EndType.PLAYING:
+                    return self.terminalScore(ending, ply)
+                return self.tablebaseScore(value, ply)
+        if depth <= 0:
+            #only a king in check can be mated, so only then is the ending worth finding
+            if game.isCheck():
+                ending = self.endingOf(game, entry)
+                if ending != EndType.PLAYING:
+                    return self.terminalScore(ending, ply)
+            return evaluate(game)
+        ending = self.endingOf(game, entry)
+        if ending != EndType.PLAYING:
+            return self.terminalScore(ending, ply)
+        originalAlpha = alpha
+        bestScore, bestAction = None, None
+        for action in self.orderedActions(game, game.getActions(), ply, entry.action if entry is not None else None):
+            game.doAction(action)
+            score = -self.search(game, depth-1, -beta, -alpha, ply+1)
+            game.undo()
+            if bestScore is None or score > bestScore:
+                bestScore, bestAction = score, action
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.storeKiller(game, action, ply)
+                break
+        if bestScore >= beta:
+            bound = Bound.LOWER
+        elif bestScore <= originalAlpha:
+            bound = Bound.UPPER
+        else:
+            bound = Bound.EXACT
+        self.table.store(game.key, depth, self.toTable(bestScore, ply), bound, bestAction)
+        return bestScore
+
+    #whether an action takes a piece
+    def isCapture(self, game, action):
+        type, row, col, toRow, toCol, promotion = action
+        return type == ActionType.MOVE and game.board[toRow][toCol] is not None
+
+    #remembers a quiet action that caused a cutoff
+    def storeKiller(self, game, action, ply):
+        if ply < len(self.killers) and not self.isCapture(game, action) and self.killers[ply][0] != action:
+            self.killers[ply] = [action, self.killers[ply][0]]
+
+    #orders the actions: best move, captures, checks, killers, then the rest
+    #piece moves are played and taken back to find the checks
+    def orderedActions(self, game, actions, ply, first):
+        killers = self.killers[ply] if ply < len(self.killers) else []
+        scored = []
+        for action in actions:
+            type, row, col, toRow, toCol, promotion = action
+            order = 0
+            if action == first:
+                order += 1000000
+            if type == ActionType.MOVE:
+                victim = game.board[toRow][toCol]
+                if victim is not None:
+                    order += 10000 + pieceValues[victim.type] - pieceValues[game.board[row][col].type] // 100
+                if promotion is not None:
+                    order += pieceValues[promotion]
+                game.doAction(action)
+                if game.isCheck():
+                    order += 5000
+                game.undo()
+            if action in killers:
+                order += 4000
+            scored.append((order, len(scored), action))
+        scored.sort(key=lambda entry: (-entry[0], entry[1]))
+        return [action for order, index, action in scored]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Finds the best gravity chess action for a position")
+    parser.add_argument("--actions", default="", help="actions to play from the start first, e.g. \"41-43 +25\"")
+    parser.add_argument("--position", help="a position string to start from instead of the start")
+    parser.add_argument("--time", type=int, default=1000, help="time budget in milliseconds")
+    parser.add_argument("--depth", type=int, default=32, help="deepest iteration to search")
+    parser.add_argument("--tablebases", default=defaultDirectory, help="directory of endgame tables to use if it has any")
+    parser.add_argument("--book", default=defaultPath, help="opening book to play from if it exists")
+    args = parser.parse_args()
+    game = positionAfter(args.actions.split(), parsePosition(args.position) if args.position else None)
+    print(Searcher(args.time, args.depth, tablebase=openTablebase(args.tablebases), book=openBook(args.book)).findBestMove(game))
@@ -0,0 +1,234 @@
+import argparse
+import asyncio
+import itertools
+import json
+from concurrent.futures import ThreadPoolExecutor
+from gravityChess.rules import EndType, GameState, actionName, parseAction
+from gravityChess.notation import GameRecord, positionString, writeRecord
+
+#hosts games between people over tcp, every message is one line of json
+#a client sends:
+#  {"type": "join"} to take a seat in the game waiting for a second player, or a new one
+#  {"type": "join", "game": id} to take the free seat of a particular game
+#  {"type": "action", "action": "41-43"} to play an action written the way actionName does
+#  {"type": "leave"} to give up the seat, closing the connection does the same
+#the server sends:
+#  {"type": "joined", "game": id, "colour": "white" or "black", "position": ...} once seated
+#  {"type": "start", "game": id, "position": ...} to both players once the second one sits down
+#  {"type": "update", "game": id, "colour": who played, "action": ..., "position": ..., "ending": ...} to both players after every action
+#  {"type": "left", "game": id, "colour": ...} when a player leaves
+#  {"type": "error", "message": ..., "position": ...} when a message can't be done, the position lets the client catch up
+
+#what the server remembers about a connected player
+class Player:
+    #constructor, written is the set the server drains, the player goes in it whenever something is sent to them
+    def __init__(self, writer, written):
+        self.writer = writer
+        self.written = written
+        self.game = None
+        self.isWhite = None
+
+    #queues a message for the player, the writer sends it when it can
+    def send(self, message):
+        if not self.writer.is_closing():
+            self.writer.write((json.dumps(message, separators=(",", ":")) + "\n").encode())
+            self.written.add(self)
+
+#a game being played on the server
+class ServerGame:
+    #constructor
+    def __init__(self, id, maxPlatforms, platformCooldown):
+        self.id = id
+        self.game = GameState(maxPlatforms=maxPlatforms, platformCooldown=platformCooldown)
+        self.seats = {True: None, False: None}
+        self.actions = []
+
+    #whether both seats are taken
+    def full(self):
+        return self.seats[True] is not None and self.seats[False] is not None
+
+    #sends a message to whoever is seated
+    def broadcast(self, message):
+        for player in self.seats.values():
+            if player is not None:
+                player.send(message)
+
+#keeps every game in memory and checks each action with the rules before it's played
+class GameServer:
+    #constructor, finished games are appended to the records file when there is one
+    def __init__(self, maxPlatforms=4, platformCooldown=7, recordsPath=None):
+        self.maxPlatforms = maxPlatforms
+        self.platformCooldown = platformCooldown
+        self.recordsPath = recordsPath
+        self.games = {}
+        self.waiting = None
+        self.ids = itertools.count(1)
+        self.actionsPlayed = 0
+        #the players sent something since the last flush
+        self.written = set()
+        #writes the finished games off the event loop, one thread so they go in the file in the order they finished
+        self.recorder = ThreadPoolExecutor(max_workers=1)
+
+    #serves one connection until it closes
+    async def handle(self, reader, writer):
+        player = Player(writer, self.written)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    #the rest of a line too long to buffer can't be told apart from the next message, so the connection goes
+                    player.send(self.error(player, "message too long"))
+                    await self.flush()
+                    break
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    self.receive(player, message)
+                except (ValueError, KeyError, IndexError, TypeError, StopIteration) as error:
+                    player.send(self.error(player, f"bad message: {error}"))
+                await self.flush()
+        except ConnectionError:
+            pass
+        finally:
+            self.leave(player)
+            self.written.discard(player)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    #waits until what was sent to every player written to has gone out, the opponent's writer as well as the sender's,
+    #so a slow reader holds up whoever is sending to them instead of their messages piling up in memory
+    async def flush(self):
+        players = list(self.written)
+        self.written.clear()
+        for player in players:
+            try:
+                await player.writer.drain()
+            except ConnectionError:
+                #their own handler finds out when it next reads
+                pass
+
+    #does what a message asks for
+    def receive(self, player, message):
+        type = message["type"]
+        if type == "join":
+            self.join(player, message.get("game"))
+        elif type == "action":
+            self.play(player, message["action"])
+        elif type == "leave":
+            self.leave(player)
+        else:
+            player.send(self.error(player, f"unknown message type {type}"))
+
+    #an error message with the position of the player's game, if they're in one
+    def error(self, player, text):
+        message = {"type": "error", "message": text}
+        if player.game is not None:
+            message["position"] = positionString(player.game.game)
+        return message
+
+    #seats a player in a game, the waiting one unless one is asked for
+    def join(self, player, id):
+        if player.game is not None:
+            player.send(self.error(player, "already in a game"))
+            return
+        if id is not None:
+            served = self.games.get(id)
+            if served is None or served.full():
+                player.send(self.error(player, f"no free seat in game {id}"))
+                return
+        elif self.waiting is not None and not self.waiting.full():
+            served = self.waiting
+        else:
+            served = ServerGame(next(self.ids), self.maxPlatforms, self.platformCooldown)
+            self.games[served.id] = served
+            self.waiting = served
+        isWhite = served.seats[True] is None
+        served.seats[isWhite] = player
+        player.game, player.isWhite = served, isWhite
+        position = positionString(served.game)
+        player.send({"type": "joined", "game": served.id, "colour": colourName(isWhite), "position": position})
+        if served.full():
+            if self.waiting is served:
+                self.waiting = None
+            served.broadcast({"type": "start", "game": served.id, "position": position})
+
+    #plays an action for a player if it's their turn and the rules allow it
+    def play(self, player, name):
+        served = player.game
+        if served is None or not served.full():
+            player.send(self.error(player, "the game hasn't started"))
+            return
+        game = served.game
+        if game.isWhiteTurn != player.isWhite:
+            player.send(self.error(player, "it isn't your turn"))
+            return
+        action = parseAction(name)
+        if not game.isLegal(action):
+            player.send(self.error(player, f"{name} isn't a legal action"))
+            return
+        game.doAction(action)
+        #nobody can take actions back on the server, so there is no need to keep the deltas
+        game.history.clear()
+        served.actions.append(action)
+        self.actionsPlayed += 1
+        ending = game.checkEnding()
+        served.broadcast({"type": "update", "game": served.id, "colour": colourName(player.isWhite), "action": actionName(action), "position": positionString(game), "ending": ending.value})
+        if ending != EndType.PLAYING:
+            self.finish(served, ending.value, colourName(not game.isWhiteTurn) if ending == EndType.CHECKMATE else None)
+
+    #takes a player out of their game, which ends it
+    def leave(self, player):
+        served = player.game
+        if served is None:
+            return
+        served.seats[player.isWhite] = None
+        served.broadcast({"type": "left", "game": served.id, "colour": colourName(player.isWhite)})
+        player.game = None
+        #leaving after the first action counts as resigning
+        self.finish(served, "Resigned", colourName(not player.isWhite) if served.actions else None)
+
+    #forgets a game that's over, writing it down first
+    def finish(self, served, ending, winner):
+        if self.games.pop(served.id, None) is None:
+            return
+        if self.waiting is served:
+            self.waiting = None
+        for player in served.seats.values():
+            if player is not None:
+                player.game = None
+        if self.recordsPath is not None and served.actions:
+            record = GameRecord(served.actions, ending, winner, maxPlatforms=self.maxPlatforms, platformCooldown=self.platformCooldown)
+            asyncio.get_running_loop().run_in_executor(self.recorder, self.record, record)
+
+    #appends a finished game to the records file, run on the recorder thread
+    def record(self, record):
+        with open(self.recordsPath, "a") as file:
+            writeRecord(file, record)
+
+    #listens for players until cancelled
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+#the name of a side in the messages
+def colourName(isWhite):
+    return "white" if isWhite else "black"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hosts gravity chess games over tcp with line-delimited json")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on")
+    parser.add_argument("--max-platforms", type=int, default=4, help="how many platforms can be on the board")
+    parser.add_argument("--platform-cooldown", type=int, default=7, help="how many turns a platform stays locked")
+    parser.add_argument("--records", help="game record file to append finished games to")
+    args = parser.parse_args()
+    try:
+        asyncio.run(GameServer(args.max_platforms, args.platform_cooldown, args.records).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,481 @@
+import argparse
+import math
+import mmap
+import multiprocessing
+import os
+import struct
+import time
+from functools import lru_cache
+from gravityChess.rules import PieceType, Piece, GameState, ActionType, emptyPlatforms, promotionTypes
+
+#endgame tables for positions with few pieces and no platforms, worked out backwards from every mate
+#with no platforms every piece rests on the stack in its column, so a position is just which pieces
+#are stacked in which column in what order, and the side to move
+#castling isn't part of a table, every piece counts as having moved
+#the tables only know about piece moves, they answer for the game where nobody places a platform
+
+#where the tables are kept unless another directory is given
+defaultDirectory = os.path.join(os.path.dirname(__file__), "tablebases")
+#the first bytes of a table file and the version of the layout after them
+fileMagic = b"GCTB"
+#version 1 tables were built missing en passant after some double pushes, they're built again
+fileVersion = 2
+#values are from the side to move's point of view: 0 is a draw, d > 0 wins with mate in d plies,
+#-(d+1) loses to mate in d plies, so -1 is mated already, and invalid positions can't happen in a game
+invalidValue = -32768
+#the letters of the pieces in the name of a material set like "KRvK", white before the v
+pieceLetters = {PieceType.KING: "K", PieceType.QUEEN: "Q", PieceType.ROOK: "R", PieceType.BISHOP: "B", PieceType.KNIGHT: "N", PieceType.PAWN: "P"}
+letterTypes = {letter: type for type, letter in pieceLetters.items()}
+#the order letters are written in within a side
+letterOrder = "KQRBNP"
+#how many pieces a table can have, the stacks hold 8 and the index has to stay small
+maxPieces = 6
+
+#the letters of a side's pieces in the order they're written
+def sortLetters(letters):
+    return "".join(sorted(letters, key=letterOrder.index))
+
+#the two ways round of a material set are one table, the side written first is the one with more or stronger pieces
+def canonicalName(white, black):
+    white, black = sortLetters(white), sortLetters(black)
+    if (-len(black), [letterOrder.index(letter) for letter in black]) < (-len(white), [letterOrder.index(letter) for letter in white]):
+        return f"{black}v{white}", True
+    return f"{white}v{black}", False
+
+#the letters of each side of a material set's name
+def splitName(name):
+    white, black = name.split("v")
+    return white, black
+
+#the material a board has, as the letters of white's and black's pieces
+def boardMaterial(board):
+    white, black = "", ""
+    for pieces in board:
+        for piece in pieces:
+            if piece is not None:
+                if piece.isWhite:
+                    white += pieceLetters[piece.type]
+                else:
+                    black += pieceLetters[piece.type]
+    return sortLetters(white), sortLetters(black)
+
+#the material sets a set can turn into with one capture or promotion, both kings always stay
+def childNames(name):
+    white, black = splitName(name)
+    children = set()
+    for side in (0, 1):
+        letters = (white, black)[side]
+        other = (white, black)[1-side]
+        for index, letter in enumerate(letters):
+            if letter == "K":
+                continue
+            rest = letters[:index] + letters[index+1:]
+            children.add(canonicalName(*((rest, other) if side == 0 else (other, rest)))[0])
+            if letter == "P":
+                for promotion in "QRBN":
+                    children.add(canonicalName(*((rest+promotion, other) if side == 0 else (other, rest+promotion)))[0])
+    return children
+
+#every set a table depends on, including itself, with the smallest first
+def buildOrder(names):
+    order = []
+    #adds a set after everything it depends on
+    def visit(name):
+        if name in order:
+            return
+        for child in sorted(childNames(name)):
+            if child != "KvK":
+                visit(child)
+        order.append(name)
+    for name in names:
+        visit(canonicalName(*splitName(name))[0])
+    return order
+
+#how many different orders a multiset can be put in
+@lru_cache(maxsize=None)
+def arrangements(counts):
+    total = math.factorial(sum(counts))
+    for count in counts:
+        total //= math.factorial(count)
+    return total
+
+#the pieces of a set as (isWhite, type) in the order they're numbered, repeated pieces are one kind
+def pieceKinds(name):
+    white, black = splitName(name)
+    kinds, counts = [], []
+    for isWhite, letters in ((True, white), (False, black)):
+        for letter in letters:
+            kind = (isWhite, letterTypes[letter])
+            if kinds and kinds[-1] == kind:
+                counts[-1] += 1
+            else:
+                kinds.append(kind)
+                counts.append(1)
+    return kinds, counts
+
+#the layout of one material set: which piece each number stands for and how many positions there are
+class Material:
+    #constructor
+    def __init__(self, name):
+        self.name = name
+        self.kinds, counts = pieceKinds(name)
+        self.kindNumbers = {kind: number+1 for number, kind in enumerate(self.kinds)}
+        #a position is written column by column from the bottom up, with 7 separators (0) between the columns
+        self.counts = tuple([7] + counts)
+        self.arrangements = arrangements(self.counts)
+        self.size = self.arrangements * 2
+
+    #the index of a board, the side to move is the lowest bit
+    def index(self, board, isWhiteTurn):
+        counts = list(self.counts)
+        rank = 0
+        for symbol in self.sequence(board):
+            for smaller in range(symbol):
+                if counts[smaller]:
+                    counts[smaller] -= 1
+                    rank += arrangements(tuple(counts))
+                    counts[smaller] += 1
+            counts[symbol] -= 1
+        return rank*2 + (0 if isWhiteTurn else 1)
+
+    #the symbols of a board, column by column from the bottom up
+    def sequence(self, board):
+        symbols = []
+        for col in range(8):
+            if col > 0:
+                symbols.append(0)
+            for row in range(7, -1, -1):
+                piece = board[row][col]
+                if piece is None:
+                    break
+                symbols.append(self.kindNumbers[(piece.isWhite, piece.type)])
+        return symbols
+
+    #the board and side to move of an index, every piece has moved
+    def board(self, index):
+        rank, isWhiteTurn = index // 2, index % 2 == 0
+        counts = list(self.counts)
+        board = [[None]*8 for row in range(8)]
+        col, row = 0, 7
+        for position in range(sum(self.counts)):
+            for symbol in range(len(counts)):
+                if not counts[symbol]:
+                    continue
+                counts[symbol] -= 1
+                below = arrangements(tuple(counts))
+                if rank < below:
+                    break
+                rank -= below
+                counts[symbol] += 1
+            if symbol == 0:
+                col, row = col+1, 7
+                continue
+            isWhite, type = self.kinds[symbol-1]
+            piece = Piece(isWhite, type)
+            piece.hasMoved = True
+            board[row][col] = piece
+            row -= 1
+        return board, isWhiteTurn
+
+#the same position with the colours swapped, the columns mirrored and the other side to move
+#pawns, double pushes and promotions all mirror with the columns, gravity doesn't care about them
+def flipBoard(board):
+    flipped = [[None]*8 for row in range(8)]
+    for row in range(8):
+        for col in range(8):
+            piece = board[row][col]
+            if piece is not None:
+                copy = Piece(not piece.isWhite, piece.type)
+                copy.hasMoved = piece.hasMoved
+                copy.justMoved2 = piece.justMoved2
+                flipped[row][7-col] = copy
+    return flipped
+
+#whether a side could still castle, which a table doesn't know about
+def canCastle(board, isWhite):
+    backCol = 0 if isWhite else 7
+    for pieces in board:
+        for piece in pieces:
+            if piece is not None and piece.type == PieceType.KING and piece.isWhite == isWhite and not piece.hasMoved:
+                for corner in (board[0][backCol], board[7][backCol]):
+                    if corner is not None and corner.isWhite == isWhite and not corner.hasMoved:
+                        return True
+    return False
+
+#one table file, read through a memory map so only the pages that are looked at are loaded
+class Table:
+    #constructor, opens the file and checks its header
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, nameLength = struct.unpack_from("<4sHH", self.map, 0)
+        if magic != fileMagic or version != fileVersion:
+            raise ValueError(f"{path} is not a version {fileVersion} tablebase file")
+        self.name = self.map[8:8+nameLength].decode()
+        (self.size,) = struct.unpack_from("<I", self.map, 8+nameLength)
+        self.offset = 12+nameLength
+        self.material = Material(self.name)
+        if self.size != self.material.size:
+            raise ValueError(f"{path} has {self.size} positions, {self.name} needs {self.material.size}")
+
+    #the value stored for an index
+    def value(self, index):
+        return struct.unpack_from("<h", self.map, self.offset + 2*index)[0]
+
+    #closes the map and the file
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+#every table in a directory, opened the first time a position needs one
+class Tablebase:
+    #constructor
+    def __init__(self, directory=defaultDirectory):
+        self.directory = directory
+        self.tables = {}
+        names = os.listdir(directory) if os.path.isdir(directory) else []
+        #tables from an older version are left out until they're built again
+        self.names = set(name[:-len(".gctb")] for name in names if name.endswith(".gctb") and isCurrent(os.path.join(directory, name)))
+        self.maxPieces = max((len(name) - 1 for name in self.names), default=0)
+        self.probes = 0
+        self.hits = 0
+
+    #the table of a set, or None if there isn't one
+    def table(self, name):
+        if name not in self.names:
+            return None
+        if name not in self.tables:
+            self.tables[name] = Table(os.path.join(self.directory, name + ".gctb"))
+        return self.tables[name]
+
+    #the value of a board for the side to move, None when no table covers it
+    def boardValue(self, board, isWhiteTurn):
+        white, black = boardMaterial(board)
+        if white == "K" and black == "K":
+            return 0
+        name, flipped = canonicalName(white, black)
+        table = self.table(name)
+        if table is None:
+            return None
+        if flipped:
+            board, isWhiteTurn = flipBoard(board), not isWhiteTurn
+        return table.value(table.material.index(board, isWhiteTurn))
+
+    #the value of a game's position for the side to move, None when no table covers it
+    #a table covers a position without platforms, en passant or castling and with few enough pieces
+    def probe(self, game):
+        self.probes += 1
+        if not self.names or sum(game.material) > self.maxPieces:
+            return None
+        for row in game.platforms:
+            for value in row:
+                if value != 0:
+                    return None
+        if canPassant(game.board, game.isWhiteTurn) or canCastle(game.board, True) or canCastle(game.board, False):
+            return None
+        value = self.boardValue(game.board, game.isWhiteTurn)
+        if value is None or value == invalidValue:
+            return None
+        self.hits += 1
+        return value
+
+    #closes every open table
+    def close(self):
+        for table in self.tables.values():
+            table.close()
+        self.tables = {}
+
+#opens the tables in a directory, None if there aren't any so callers can skip probing
+def openTablebase(directory=defaultDirectory):
+    tablebase = Tablebase(directory)
+    return tablebase if tablebase.names else None
+
+#whether the side to move might take a pawn en passant, which a table doesn't know about
+def canPassant(board, isWhiteTurn):
+    for row in range(8):
+        for col in range(8):
+            piece = board[row][col]
+            if piece is None or piece.type != PieceType.PAWN or piece.isWhite == isWhiteTurn or not piece.justMoved2:
+                continue
+            #the pawn taking it stands next to it in the same column, the way rules.pawnPassings has it
+            for passingRow in (row-1, row+1):
+                if 0 <= passingRow < 8:
+                    passing = board[passingRow][col]
+                    if passing is not None and passing.type == PieceType.PAWN and passing.isWhite == isWhiteTurn:
+                        return True
+    return False
+
+#the piece moves of a game as (value of the child, index of the child in the same table or -1)
+#moves into smaller or promoted material are looked up in their tables straight away
+#a double push the other side can take en passant has no index, its own moves are listed in its place as ("passing", moves)
+def listMoves(game, material, tablebase):
+    board = game.board
+    moves = []
+    for row in range(8):
+        for col in range(8):
+            piece = board[row][col]
+            if piece is None or piece.isWhite != game.isWhiteTurn:
+                continue
+            for toRow, toCol in set(game.getValidMoves(row, col)):
+                promotions = promotionTypes if game.isPromotion((row, col), (toRow, toCol)) else [None]
+                for promotion in promotions:
+                    game.doAction((ActionType.MOVE, row, col, toRow, toCol, promotion))
+                    if boardMaterial(board) != splitName(material.name):
+                        moves.append((tablebase.boardValue(board, game.isWhiteTurn), -1))
+                    elif canPassant(board, game.isWhiteTurn):
+                        moves.append(("passing", (game.isCheck(), listMoves(game, material, tablebase))))
+                    else:
+                        moves.append((None, material.index(board, game.isWhiteTurn)))
+                    game.undo()
+    return moves
+
+#the moves of the position at an index as (in check, moves), None for positions that can't come up in a game
+def forwardMoves(material, tablebase, index):
+    board, isWhiteTurn = material.board(index)
+    for row in range(8):
+        white, black = board[row][7], board[row][0]
+        if (white is not None and white.isWhite and white.type == PieceType.PAWN) or (black is not None and not black.isWhite and black.type == PieceType.PAWN):
+            return None
+    game = GameState(board, emptyPlatforms(), isWhiteTurn)
+    #the side that just moved can't be left in check
+    if game.isCheck(not isWhiteTurn):
+        return None
+    return game.isCheck(), listMoves(game, material, tablebase)
+
+#works out the moves of a range of positions, run in the worker processes
+def generateChunk(task):
+    name, directory, start, end = task
+    material = Material(name)
+    tablebase = Tablebase(directory)
+    results = [forwardMoves(material, tablebase, index) for index in range(start, end)]
+    tablebase.close()
+    return start, results
+
+#the positions of a table while it's being built, with what's known about their moves
+class Graph:
+    #constructor, a value of None is still unknown
+    def __init__(self, size):
+        self.values = [0] * size
+        #how many moves of a position aren't known to lose for it yet, and the positions that lead into each one
+        self.remaining = [0] * size
+        self.parents = [[] for index in range(size)]
+        #positions whose value is known, by how many plies from mate they are
+        self.layers = {}
+
+    #adds what's known about a position from its moves
+    def addNode(self, node, result):
+        if result is None:
+            self.values[node] = invalidValue
+            return
+        inCheck, moves = result
+        if not moves:
+            #checkmated, or stalemate which stays a draw
+            if inCheck:
+                self.values[node] = -1
+                self.layers.setdefault(0, []).append(node)
+            return
+        self.values[node] = None
+        self.remaining[node] = len(moves)
+        for value, child in moves:
+            if value == "passing":
+                #positions after a double push that can be taken en passant go after the indexed ones
+                passing = len(self.values)
+                self.values.append(0)
+                self.remaining.append(0)
+                self.parents.append([node])
+                self.addNode(passing, child)
+            elif child >= 0:
+                self.parents[child].append(node)
+            elif value is not None and value != 0 and value != invalidValue:
+                #a finished table is only looked at once, its value goes into the layer it belongs to
+                plies = value if value > 0 else -value-1
+                self.layers.setdefault(plies, []).append((node, value))
+
+    #works back from the mates one ply at a time, whatever isn't reached is a draw
+    def propagate(self):
+        plies = 0
+        while self.layers:
+            for entry in self.layers.pop(plies, []):
+                if isinstance(entry, tuple):
+                    #a move into another table
+                    self.resolve(entry[0], entry[1], plies)
+                    continue
+                for parent in self.parents[entry]:
+                    self.resolve(parent, self.values[entry], plies)
+            plies += 1
+        self.values = [0 if value is None else value for value in self.values]
+
+    #a position learns the value of one of its moves, a move to a lost position wins and all moves to won positions lose
+    def resolve(self, parent, childValue, plies):
+        if self.values[parent] is not None:
+            return
+        if childValue < 0:
+            self.values[parent] = plies + 1
+        else:
+            self.remaining[parent] -= 1
+            if self.remaining[parent] > 0:
+                return
+            self.values[parent] = -(plies+1) - 1
+        self.layers.setdefault(plies+1, []).append(parent)
+
+#builds one table: the moves of every position across the processes, then mates worked back to every position
+def buildTable(name, directory, pool, chunkSize=2000):
+    material = Material(name)
+    graph = Graph(material.size)
+    tasks = [(name, directory, start, min(start+chunkSize, material.size)) for start in range(0, material.size, chunkSize)]
+    #the results are added in order so the en passant positions get the same numbers every time
+    for start, results in pool.imap(generateChunk, tasks):
+        for index, result in enumerate(results, start):
+            graph.addNode(index, result)
+    graph.propagate()
+    values = graph.values[:material.size]
+    writeTable(os.path.join(directory, name + ".gctb"), name, values)
+    return values
+
+#writes a table: the header, then a little endian 16 bit value per index
+def writeTable(path, name, values):
+    encoded = name.encode()
+    with open(path + ".tmp", "wb") as file:
+        file.write(struct.pack("<4sHH", fileMagic, fileVersion, len(encoded)))
+        file.write(encoded)
+        file.write(struct.pack("<I", len(values)))
+        file.write(struct.pack(f"<{len(values)}h", *values))
+    os.replace(path + ".tmp", path)
+
+#whether a table file has the layout and values of this version
+def isCurrent(path):
+    with open(path, "rb") as file:
+        start = file.read(6)
+    return len(start) == 6 and struct.unpack("<4sH", start) == (fileMagic, fileVersion)
+
+#builds the tables of the sets and everything they turn into, skipping ones already built with this version
+def buildTables(names, directory=defaultDirectory, workers=None, rebuild=False):
+    os.makedirs(directory, exist_ok=True)
+    with multiprocessing.Pool(workers) as pool:
+        for name in buildOrder(names):
+            path = os.path.join(directory, name + ".gctb")
+            if os.path.exists(path) and not rebuild and isCurrent(path):
+                print(f"{name}: already built")
+                continue
+            start = time.perf_counter()
+            values = buildTable(name, directory, pool)
+            wins = sum(1 for value in values if value > 0)
+            losses = sum(1 for value in values if value < 0 and value != invalidValue)
+            draws = sum(1 for value in values if value == 0)
+            longest = max((value for value in values if value > 0), default=0)
+            print(f"{name}: {len(values)} positions, {wins} wins {draws} draws {losses} losses, longest mate {longest} plies, {os.path.getsize(path)} bytes in {time.perf_counter()-start:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds gravity chess endgame tables by retrograde analysis")
+    parser.add_argument("names", nargs="*", default=["KQvK", "KRvK", "KBvK", "KNvK", "KNNvK", "KPvK"], help="material sets like KRvK, white's pieces before the v")
+    parser.add_argument("--directory", default=defaultDirectory, help="where to write the tables")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="how many processes generate moves")
+    parser.add_argument("--rebuild", action="store_true", help="build tables again even if they exist")
+    args = parser.parse_args()
+    for name in args.names:
+        if name.count("v") != 1:
+            parser.error(f"{name} should be written like KRvK")
+        white, black = splitName(name)
+        if "K" not in white or "K" not in black or len(white) + len(black) > maxPieces or any(letter not in letterTypes for letter in white + black):
+            parser.error(f"{name} needs a king on each side, known letters and at most {maxPieces} pieces")
+    buildTables(args.names, args.directory, args.workers, args.rebuild)
@@ -0,0 +1,144 @@
+import argparse
+import contextlib
+import json
+import math
+import multiprocessing
+import random
+import time
+from gravityChess.rules import EndType, GameState
+from gravityChess.search import Searcher
+from gravityChess.notation import GameRecord
+from gravityChess.book import Book
+
+#what a game is recorded as when it runs out of moves before it ends
+moveLimitEnding = "Move Limit"
+
+#plays random legal actions
+class RandomPlayer:
+    #constructor
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+
+    #picks the action to play
+    def chooseAction(self, game):
+        return self.random.choice(game.getActions())
+
+#plays the best action the search finds in its time
+class SearchPlayer:
+    #constructor
+    def __init__(self, timeLimitMs, book=None):
+        self.searcher = Searcher(timeLimitMs, book=book)
+
+    #picks the action to play
+    def chooseAction(self, game):
+        return self.searcher.findBestMove(game).action
+
+#builds a player from its name, "random" or "search:<milliseconds>"
+#search players play from the book when there is one, picking its actions at random by how often they were played
+def makePlayer(spec, seed, bookPath=None):
+    name, _, option = spec.partition(":")
+    if name == "random":
+        return RandomPlayer(seed)
+    if name == "search":
+        book = Book(bookPath, seed) if bookPath is not None else None
+        return SearchPlayer(int(option) if option else 100, book)
+    raise ValueError(f"unknown engine {spec}")
+
+#plays one game from the start and returns how it went, run inside the worker processes
+def playGame(task):
+    index, white, black, maxPlatforms, platformCooldown, maxMoves, seed, bookPath = task
+    players = {True: makePlayer(white, seed, bookPath), False: makePlayer(black, seed+1, bookPath)}
+    game = GameState(maxPlatforms=maxPlatforms, platformCooldown=platformCooldown)
+    start = time.perf_counter()
+    actions = []
+    ending = game.checkEnding()
+    while ending == EndType.PLAYING and len(actions) < maxMoves:
+        action = players[game.isWhiteTurn].chooseAction(game)
+        game.doAction(action)
+        actions.append(action)
+        ending = game.checkEnding()
+    winner = None
+    if ending == EndType.CHECKMATE:
+        #the side to move is the one that got mated
+        winner = "black" if game.isWhiteTurn else "white"
+    ending = ending.value if ending != EndType.PLAYING else moveLimitEnding
+    return {
+        "game": index,
+        "white": white,
+        "black": black,
+        "ending": ending,
+        "winner": winner,
+        "moves": len(actions),
+        "seconds": round(time.perf_counter() - start, 3),
+        "record": GameRecord(actions, ending, winner, maxPlatforms=maxPlatforms, platformCooldown=platformCooldown).toLine(),
+    }
+
+#the 95% wilson score interval for a rate out of a number of games
+def wilsonInterval(successes, total, z=1.96):
+    if total == 0:
+        return 0, 0
+    rate = successes / total
+    center = (rate + z*z/(2*total)) / (1 + z*z/total)
+    spread = z * math.sqrt(rate*(1-rate)/total + z*z/(4*total*total)) / (1 + z*z/total)
+    return max(0, center-spread), min(1, center+spread)
+
+#describes a rate with its interval
+def formatRate(label, successes, total):
+    low, high = wilsonInterval(successes, total)
+    rate = successes / total if total else 0
+    return f"{label} {rate*100:5.1f}% [{low*100:5.1f}%, {high*100:5.1f}%]"
+
+#the colour the first engine played in a game, they swap every game
+def firstColour(index):
+    return "white" if index % 2 == 0 else "black"
+
+#prints the win and draw rates of the first engine against the second
+def printSummary(results, first, second, seconds):
+    total = len(results)
+    wins = sum(1 for result in results if result["winner"] == firstColour(result["game"]))
+    losses = sum(1 for result in results if result["winner"] is not None and result["winner"] != firstColour(result["game"]))
+    draws = total - wins - losses
+    endings = {}
+    for result in results:
+        endings[result["ending"]] = endings.get(result["ending"], 0) + 1
+    print(f"{first} vs {second}: {total} games, +{wins} ={draws} -{losses}")
+    print("  " + formatRate("wins", wins, total))
+    print("  " + formatRate("draws", draws, total))
+    print("  " + formatRate("losses", losses, total))
+    print("  endings: " + ", ".join(f"{ending} {amount}" for ending, amount in sorted(endings.items())))
+    print(f"  {total/max(seconds, 1e-9):.2f} games/s, {sum(result['moves'] for result in results)/max(seconds, 1e-9):.0f} moves/s")
+
+#plays the games across a pool of processes, writing each result as soon as it's done
+#with a records path the games themselves are appended to it as well
+def runTournament(first, second, games, workers, maxPlatforms, platformCooldown, maxMoves, seed, resultsPath, recordsPath=None, bookPath=None):
+    tasks = [(index, first if firstColour(index) == "white" else second, second if firstColour(index) == "white" else first, maxPlatforms, platformCooldown, maxMoves, seed+index*2, bookPath) for index in range(games)]
+    results = []
+    start = time.perf_counter()
+    with open(resultsPath, "w") as file, open(recordsPath, "a") if recordsPath is not None else contextlib.nullcontext() as records, multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(playGame, tasks):
+            record = result.pop("record")
+            if records is not None:
+                records.write(record)
+                records.flush()
+            file.write(json.dumps(result) + "\n")
+            file.flush()
+            results.append(result)
+            print(f"game {result['game']:5}: {result['white']} vs {result['black']}, {result['ending']}, {result['moves']} moves, {result['seconds']:.2f}s")
+    printSummary(results, first, second, time.perf_counter() - start)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plays gravity chess engines against each other without a display")
+    parser.add_argument("first", help="engine: random or search:<milliseconds>")
+    parser.add_argument("second", help="engine: random or search:<milliseconds>")
+    parser.add_argument("--games", type=int, default=100, help="how many games to play")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="how many processes to play on")
+    parser.add_argument("--max-platforms", type=int, default=4, help="how many platforms can be on the board")
+    parser.add_argument("--platform-cooldown", type=int, default=7, help="how many turns a platform stays locked")
+    parser.add_argument("--max-moves", type=int, default=300, help="turns before a game counts as a draw")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random engines")
+    parser.add_argument("--results", default="results.jsonl", help="file to write a line per game to")
+    parser.add_argument("--records", help="game record file to append the games to")
+    parser.add_argument("--book", help="opening book for the search engines to play from")
+    args = parser.parse_args()
+    runTournament(args.first, args.second, args.games, args.workers, args.max_platforms, args.platform_cooldown, args.max_moves, args.seed, args.results, args.records, args.book)
@@ -0,0 +1,83 @@
+from enum import Enum
+
+#set up an enum for what a stored score means
+class Bound(Enum):
+    EXACT = "Exact"
+    LOWER = "Lower"
+    UPPER = "Upper"
+
+#what the table remembers about a position
+class Entry:
+    __slots__ = ("key", "depth", "score", "bound", "action", "ending", "generation")
+    #constructor
+    def __init__(self, key, depth, score, bound, action, ending, generation):
+        self.key = key
+        self.depth = depth
+        self.score = score
+        self.bound = bound
+        self.action = action
+        self.ending = ending
+        self.generation = generation
+
+#a fixed number of slots indexed by the low bits of the zobrist key
+#a slot is replaced by a deeper search, by the same position, or once its entry is from an older search
+class TranspositionTable:
+    #constructor, the size is rounded down to a power of two
+    def __init__(self, maxEntries=1 << 18):
+        size = 1
+        while size*2 <= maxEntries:
+            size *= 2
+        self.mask = size - 1
+        self.slots = [None] * size
+        self.generation = 0
+        self.hits = 0
+        self.probes = 0
+
+    #starts a new search, entries from earlier searches become the first to go
+    def newSearch(self):
+        self.generation += 1
+
+    #finds the entry for a key, or None
+    def probe(self, key):
+        self.probes += 1
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        return None
+
+    #remembers a search result, keeping what's already known about the ending
+    def store(self, key, depth, score, bound, action, ending=None):
+        index = key & self.mask
+        entry = self.slots[index]
+        if entry is not None and entry.key == key:
+            if ending is None:
+                ending = entry.ending
+            if action is None:
+                action = entry.action
+            #a shallower result only replaces a deeper one of the same search if it's exact
+            if depth < entry.depth and entry.generation == self.generation and bound != Bound.EXACT:
+                entry.ending = ending
+                return
+        elif entry is not None and entry.generation == self.generation and entry.depth > depth:
+            return
+        self.slots[index] = Entry(key, depth, score, bound, action, ending, self.generation)
+
+    #remembers how a position ended without a search result
+    def storeEnding(self, key, ending):
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry.key == key:
+            entry.ending = ending
+        else:
+            self.store(key, -1, 0, Bound.UPPER, None, ending)
+
+    #how many slots are in use
+    def filled(self):
+        return sum(1 for entry in self.slots if entry is not None)
+
+    #forgets everything
+    def clear(self):
+        self.slots = [None] * len(self.slots)
+        self.generation = 0
+        self.hits = 0
+        self.probes = 0
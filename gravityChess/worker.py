@@ -0,0 +1,87 @@
+import queue
+import threading
+from gravityChess.search import Searcher
+from gravityChess.transposition import TranspositionTable
+
+#runs searches on a background thread so a display keeps drawing while the engine thinks
+#positions are copied when they're handed over, results come back through a queue
+class SearchWorker:
+    #constructor, the endgame tables and opening book are handed to every search
+    def __init__(self, maxDepth=32, tablebase=None, book=None):
+        self.maxDepth = maxDepth
+        self.tablebase = tablebase
+        self.book = book
+        #kept between searches so the next move starts with what the last one found
+        self.table = TranspositionTable()
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        #only the result of this job is handed out, anything older was cancelled
+        self.wantedId = None
+        self.lastId = 0
+        self.searcher = None
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    #takes jobs off the queue until it's closed
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            jobId, tag, game, timeLimitMs = job
+            with self.lock:
+                if jobId != self.wantedId:
+                    continue
+                searcher = Searcher(timeLimitMs, self.maxDepth, self.table, self.tablebase, self.book)
+                self.searcher = searcher
+            result = searcher.findBestMove(game)
+            with self.lock:
+                self.searcher = None
+            self.results.put((jobId, tag, result))
+
+    #starts searching a snapshot of the position, cancelling whatever was running
+    #the tag comes back with the result so the caller knows what it asked for
+    def submit(self, game, timeLimitMs, tag=None):
+        with self.lock:
+            self.lastId += 1
+            self.wantedId = self.lastId
+            if self.searcher is not None:
+                self.searcher.stop()
+        self.jobs.put((self.lastId, tag, game.copy(), timeLimitMs))
+        return self.lastId
+
+    #stops the running search and throws its result away
+    def cancel(self):
+        with self.lock:
+            self.wantedId = None
+            if self.searcher is not None:
+                self.searcher.stop()
+
+    #stops the running search early but still hands out the best action it found so far
+    def hurry(self):
+        with self.lock:
+            if self.searcher is not None:
+                self.searcher.stop()
+
+    #whether a search was asked for and hasn't been picked up by poll yet
+    def busy(self):
+        return self.wantedId is not None
+
+    #returns (tag, SearchResult) once the wanted search is done, otherwise None, never waits
+    def poll(self):
+        while True:
+            try:
+                jobId, tag, result = self.results.get_nowait()
+            except queue.Empty:
+                return None
+            with self.lock:
+                if jobId == self.wantedId:
+                    self.wantedId = None
+                    return tag, result
+
+    #stops the thread once the running search is done
+    def close(self):
+        self.cancel()
+        self.jobs.put(None)
+        self.thread.join()
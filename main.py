@@ -1,174 +1,84 @@
-import pygame
-from enum import Enum
+import argparse
 import time
-import copy
-
-#set up an enum for the state of squares
-class SquareState(Enum):
-    INVALID = -1
-    EMPTY = 0
-    LIGHT = 1
-    DARK = 2
-
-#set up an enum for the type of a piece
-class PieceType(Enum):
-    PAWN = "Pawn"
-    KNIGHT = "Knight"
-    BISHOP = "Bishop"
-    ROOK = "Rook"
-    QUEEN = "Queen"
-    KING = "King"
-
-#set up an enum for the ways a game can end
-class EndType(Enum):
-    PLAYING = "Still Playing"
-    CHECKMATE = "Checkmate"
-    STALEMATE = "Stalemate"
-    INSUFFICIENT = "Insufficient Material"
-
-#set up a class for pieces
-class Piece:
-    #constructor
-    def __init__(self, isWhite, type):
-        self.isWhite = isWhite
-        self.type = type
-        self.justMoved2 = False
-        self.hasMoved = False
-    #allows easier printing of the pieces
-    def __str__(self):
-        return f"{self.isWhite} {self.type.value}"
-    #allows for better direct comparisons of pieces
-    def __eq__(self, other):
-        if isinstance(other, Piece):
-            return self.type == other.type and self.isWhite == other.isWhite
-        return False
-    
-#initialize the board with pieces
-board =[
-    [Piece(True, PieceType.ROOK), Piece(True, PieceType.PAWN), None, None, None, None, Piece(False, PieceType.PAWN), Piece(False, PieceType.ROOK)], 
-    [Piece(True, PieceType.KNIGHT), Piece(True, PieceType.PAWN), None, None, None, None, Piece(False, PieceType.PAWN), Piece(False, PieceType.KNIGHT)], 
-    [Piece(True, PieceType.BISHOP), Piece(True, PieceType.PAWN), None, None, None, None, Piece(False, PieceType.PAWN), Piece(False, PieceType.BISHOP)], 
-    [Piece(True, PieceType.QUEEN), Piece(True, PieceType.PAWN), None, None, None, None, Piece(False, PieceType.PAWN), Piece(False, PieceType.QUEEN)], 
-    [Piece(True, PieceType.KING), Piece(True, PieceType.PAWN), None, None, None, None, Piece(False, PieceType.PAWN), Piece(False, PieceType.KING)], 
-    [Piece(True, PieceType.BISHOP), Piece(True, PieceType.PAWN), None, None, None, None, Piece(False, PieceType.PAWN), Piece(False, PieceType.BISHOP)], 
-    [Piece(True, PieceType.KNIGHT), Piece(True, PieceType.PAWN), None, None, None, None, Piece(False, PieceType.PAWN), Piece(False, PieceType.KNIGHT)], 
-    [Piece(True, PieceType.ROOK), Piece(True, PieceType.PAWN), None, None, None, None, Piece(False, PieceType.PAWN), Piece(False, PieceType.ROOK)]
-    ]
-
-#initialize the array with the moveable platforms
-#0 means no platform, 
-#1 means it can be moved or removed, 
-#>2 means it's locked, 
-#<0 means none can be placed
-platforms = [
-    [0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 0, 0, 0, 0, 0, 0, 0],
-    ]
-
-#set up the the icons for the pieces
-lightPawnIcon = pygame.image.load("assets/lightPawn.png")
-lightRookIcon = pygame.image.load("assets/lightRook.png")
-lightKnightIcon = pygame.image.load("assets/lightKnight.png")
-lightBishopIcon = pygame.image.load("assets/lightBishop.png")
-lightQueenIcon = pygame.image.load("assets/lightQueen.png")
-lightKingIcon = pygame.image.load("assets/lightKing.png")
-darkPawnIcon = pygame.image.load("assets/darkPawn.png")
-darkRookIcon = pygame.image.load("assets/darkRook.png")
-darkKnightIcon = pygame.image.load("assets/darkKnight.png")
-darkBishopIcon = pygame.image.load("assets/darkBishop.png")
-darkQueenIcon = pygame.image.load("assets/darkQueen.png")
-darkKingIcon = pygame.image.load("assets/darkKing.png")
-lockIcon = pygame.image.load("assets/lock.png")
-lockIcon = pygame.transform.rotozoom(lockIcon, 0, .01)
-
-#set up a dictionary to map the piece abbreviations to their icons
-pieceIcons = {
-    "True Rook": lightRookIcon,
-    "True Pawn": lightPawnIcon,
-    "True Knight": lightKnightIcon,
-    "True Bishop": lightBishopIcon,
-    "True Queen": lightQueenIcon,
-    "True King": lightKingIcon,
-    "False Rook": darkRookIcon,
-    "False Pawn": darkPawnIcon,
-    "False Knight": darkKnightIcon,
-    "False Bishop": darkBishopIcon,
-    "False Queen": darkQueenIcon,
-    "False King": darkKingIcon
-}
+#when the program started, to time how long the first frame takes
+startTime = time.perf_counter()
+from gravityChess.assets import importPygame, loadSprites
+pygame = importPygame()
+from gravityChess import rules
+from gravityChess.rules import SquareState, EndType, ActionType, GameState, promotionTypes, pieceIndex, getSquareState, findKing, isCheck, actionName, parseAction
+from gravityChess.notation import parsePosition, positionString
+from gravityChess.profiling import Profiler, profilingRequested, rulesFunctions
+
+#which sides the computer plays and how long it thinks
+parser = argparse.ArgumentParser(description="Plays gravity chess in a window")
+parser.add_argument("--computer", choices=["white", "black", "both"], help="let the computer play a side")
+parser.add_argument("--think", type=int, default=1000, help="how long the computer thinks per move, in milliseconds")
+parser.add_argument("--position", help="a position string to start from, as positionString writes them")
+parser.add_argument("--connect", help="play on a game server at host:port instead of sharing this window")
+parser.add_argument("--profile", action="store_true", help="time the rules and the frames, shown on the left (P hides it) and printed on exit")
+parser.add_argument("--tablebases", help="directory of endgame tables for the computer, if it has any, gravityChess/tablebases by default")
+parser.add_argument("--book", help="opening book for the computer to play from, if it exists, gravityChess/book.gcob by default")
+parser.add_argument("--startup", action="store_true", help="print how long the first frame took to show and close")
+args = parser.parse_args()
+
+#only when profiling is on are the rules swapped for timed ones, otherwise they're left alone
+profiler = Profiler() if args.profile or profilingRequested() else None
+if profiler is not None:
+    profiler.instrument(rules, rulesFunctions)
+    profiler.instrument(GameState, ["checkEnding"])
+    isCheck = rules.isCheck
+computerSides = {True: args.computer in ("white", "both"), False: args.computer in ("black", "both")}
+
+#the game being played in the window
+game = parsePosition(args.position) if args.position else GameState()
+
+#when playing on a server, the sides played from elsewhere, both until the server seats us and the game starts
+client = None
+onlineColour = None
+remoteSides = {True: args.connect is not None, False: args.connect is not None}
+
+#what a square with no piece uses instead of an index
+noPiece = -1
+
+#the instructions down the left of the window as (font, text, x, y)
+instructionLines = [
+    (50, "Gravity Chess", 120, 40),
+    (25, "Chess with gravity after every move and platforms", 30, 110),
+    (25, "Pieces: The chess pieces work like normal chess,", 30, 150),
+    (25, "except at the end of each move they fall down to the", 10, 170),
+    (25, "bottom of the board (gravity). Checks are processed", 10, 190),
+    (25, "after gravity is applied. To move a piece, click on", 10, 210),
+    (25, "the piece and click on the square you want it to move", 10, 230),
+    (25, "to. Yellow highlights mean that piece is selected.", 10, 250),
+    (25, "Blue highlights mean possible moves. Red highlights", 10, 270),
+    (25, "mean the king is in check.", 10, 290),
+    (25, "Platforms: Platforms can counter the effects of", 30, 340),
+    (25, "gravity. To place a platform, click a horizontal line on", 10, 360),
+    (25, "the board, and click again to confirm. To move a", 10, 380),
+    (25, "platform, click a platform and click a different", 10, 400),
+    (25, "horizontal line. To Remove a platform, click a platform", 10, 420),
+    (25, "and click it again to confirms its removal. Finally, to", 10, 440),
+    (25, "unselect a platform, click anywhere else on the board", 10, 460),
+    (25, "that is not a current platform. There is a max of 4", 10, 480),
+    (25, "platforms on the board at any time, a user can never", 10, 500),
+    (25, "do 2 platform moves in a row, and a platform is locked", 10, 520),
+    (25, "for 5 turns.", 10, 540),
+    (25, "Press H for a hint, click to make the computer move now.", 10, 562),
+    (25, "Ctrl+Z takes back a turn, Ctrl+Y plays it again.", 10, 580),
+]
+
+#renders the instructions once into a panel the size of the window, the board is drawn over it
+def buildInstructionPanel():
+    global instructionPanel
+    fonts = {50: font50, 25: font25}
+    instructionPanel = pygame.Surface(screen.get_size()).convert()
+    instructionPanel.fill("beige")
+    for size, line, x, y in instructionLines:
+        instructionPanel.blit(fonts[size].render(line, True, "black"), (x, y))
 
 #write instructions for the game
 def initializeInstructions():
-    screen.fill("beige")
-    #Instructions
-    text = font50.render("Gravity Chess", True, "black")
-    screen.blit(text, (120, 40))
-
-    text = font25.render("Chess with gravity after every move and platforms", True, "black")
-    screen.blit(text, (30, 110))
-
-    text = font25.render("Pieces: The chess pieces work like normal chess,", True, "black")
-    screen.blit(text, (30, 150))
-
-    text = font25.render("except at the end of each move they fall down to the", True, "black")
-    screen.blit(text, (10, 170))
-
-    text = font25.render("bottom of the board (gravity). Checks are processed", True, "black")
-    screen.blit(text, (10, 190))
-
-    text = font25.render("after gravity is applied. To move a piece, click on", True, "black")
-    screen.blit(text, (10, 210))
-
-    text = font25.render("the piece and click on the square you want it to move", True, "black")
-    screen.blit(text, (10, 230))
-
-    text = font25.render("to. Yellow highlights mean that piece is selected.", True, "black")
-    screen.blit(text, (10, 250))
-
-    text = font25.render("Blue highlights mean possible moves. Red highlights", True, "black")
-    screen.blit(text, (10, 270))
-
-    text = font25.render("mean the king is in check.", True, "black")
-    screen.blit(text, (10, 290))
-
-    text = font25.render("Platforms: Platforms can counter the effects of", True, "black")
-    screen.blit(text, (30, 340))
-
-    text = font25.render("gravity. To place a platform, click a horizontal line on", True, "black")
-    screen.blit(text, (10, 360))
-
-    text = font25.render("the board, and click again to confirm. To move a", True, "black")
-    screen.blit(text, (10, 380))
-
-    text = font25.render("platform, click a platform and click a different", True, "black")
-    screen.blit(text, (10, 400))
-
-    text = font25.render("horizontal line. To Remove a platform, click a platform", True, "black")
-    screen.blit(text, (10, 420))
-
-    text = font25.render("and click it again to confirms its removal. Finally, to", True, "black")
-    screen.blit(text, (10, 440))
-
-    text = font25.render("unselect a platform, click anywhere else on the board", True, "black")
-    screen.blit(text, (10, 460))
-
-    text = font25.render("that is not a current platform. There is a max of 4", True, "black")
-    screen.blit(text, (10, 480))
-
-    text = font25.render("platforms on the board at any time, a user can never", True, "black")
-    screen.blit(text, (10, 500))
-
-    text = font25.render("do 2 platform moves in a row, and a platform is locked", True, "black")
-    screen.blit(text, (10, 520))
-
-    text = font25.render("for 5 turns.", True, "black")
-    screen.blit(text, (10, 540))
-
+    screen.blit(instructionPanel, (0, 0))
     #flip() the display to put your work on screen
     pygame.display.flip()
 
@@ -187,457 +97,349 @@ def locatePressedSquare(mousePos):
         col = (mousePos[0] - gameX) // cellSize
     return [row, col]
 
-#determines whether the game is over
-def checkEnding():
-    global board, platforms, isWhiteTurn
-    hasMove = False
-    pawnHasMove = False
-    for row in range(len(board)):
-        for col in range(len(board[row])):
-            #if no piece can move --> stalemate or checkmate
-            if not hasMove and getSquareState(board, row, col) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK) and len(getValidMoves(board, row, col, isWhiteTurn, True)) > 0:
-                hasMove = True
-            #if a pawn can move --> still life in the position
-            if not pawnHasMove and getPiece(board, row, col) == Piece(True, PieceType.PAWN) and (len(getValidMoves(board, row, col, True, True)) > 0 or col == 7):
-                pawnHasMove = True
-            elif not pawnHasMove and getPiece(board, row, col) == Piece(False, PieceType.PAWN) and (len(getValidMoves(board, row, col, False, True)) > 0 or col == 0):
-                pawnHasMove = True
-            #if a pawn is not on the bottom --> still life in the position
-            elif not pawnHasMove and row < 7 and (getPiece(board, row, col) == Piece(False, PieceType.PAWN) or getPiece(board, row, col) == Piece(True, PieceType.PAWN)):
-                pawnHasMove = True
-    #Checkmate vs Stalemate
-    if not hasMove:
-        if not isCheck(board, True) and not isCheck(board, False):
-            return EndType.STALEMATE
-        elif isWhiteTurn:
-            return EndType.CHECKMATE       
-        else:
-            return EndType.CHECKMATE
-    #If any rook, queen, bishop, or more than 2 knights are on a team, checkmate is possible
-    if amtOfType(PieceType.ROOK) > 0 or amtOfType(PieceType.QUEEN) > 0 or amtOfType(PieceType.BISHOP) > 0 or amtOfPiece(Piece(True, PieceType.KNIGHT)) > 2 or amtOfPiece(Piece(False, PieceType.KNIGHT)) > 2:
-        return EndType.PLAYING
-    #If a pawn can move then play on
-    if pawnHasMove:
-        return EndType.PLAYING
-    #If no queens, rooks, bishops
-    if amtOfType(PieceType.ROOK) == 0 and amtOfType(PieceType.QUEEN) == 0 and amtOfType(PieceType.BISHOP) == 0:
-        #if no knights and pawns cant move --> insufficient material
-        if amtOfType(PieceType.KNIGHT) == 0 and not pawnHasMove:
-            return EndType.INSUFFICIENT
-        #if no pawns and not enough knights --> Insufficient material
-        if amtOfPiece(Piece(True, PieceType.PAWN)) == 0 and amtOfPiece(Piece(True, PieceType.KNIGHT)) <= 2 and amtOfPiece(Piece(False, PieceType.PAWN)) == 0 and amtOfPiece(Piece(False, PieceType.KNIGHT)) <= 2:
-            return EndType.INSUFFICIENT
-    return EndType.PLAYING
-    
-#checks to see if removing the platform would result in its own king in check
-def checkPlatform(board, platforms, oldRow, oldCol, newRow, newCol):
-    tempBoard = copy.deepcopy(board)
-    tempPlatforms = copy.deepcopy(platforms)
-    global isWhiteTurn
-    tempPlatforms[oldRow][oldCol] = 0
-    if newRow != -1:
-        tempPlatforms[newRow][newCol] = 1
-    if isCheck(gravity(tempBoard, tempPlatforms, False), isWhiteTurn):
-        return False
-    return True
-
-#finds amt of pieces of a type
-def amtOfType(type):
-    total = 0
-    for row in board:
-        total += row.count(Piece(True, type))+row.count(Piece(False, type))
-    return total
-
-#finds amt of pieces of a piece
-def amtOfPiece(piece):
-    total = 0
-    for row in board:
-        total += row.count(piece)
-    return total
-
-#updates the board once a move has been made
-def makeMove(board, isWhiteTurn, pieceFrom, pieceTo):
-    global promotionPending, promotionSquare, pressedPos, validMoves, platforms, whiteJustPlatformed, blackJustPlatformed
-    for row in range(len(board)):
-        for col in range(len(board[row])):
-            if getSquareState(board, row, col) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
-                board[row][col].justMoved2 = False
-    if getPiece(board, pieceFrom[0], pieceFrom[1]).type == PieceType.PAWN:
-        #En Passant Stuff
-        if abs(pieceTo[1]-pieceFrom[1]) == 2:
-            board[pieceFrom[0]][pieceFrom[1]].justMoved2 = True
-        if pieceFrom[0] != pieceTo[0] and pieceFrom[1] != pieceTo[1] and getSquareState(board, pieceTo[0], pieceFrom[1]) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT) and board[pieceTo[0]][pieceFrom[1]].justMoved2:
-            board[pieceTo[0]][pieceFrom[1]] = None 
-        #Pawn promotion stuff
-        if pieceTo[1] == 0 or pieceTo[1] == 7:
-            promotionPending = True
-            promotionSquare = pieceTo
-    #Castling
-    if getPiece(board, pieceFrom[0], pieceFrom[1]).type == PieceType.KING:
-        if abs(pieceTo[0]-pieceFrom[0]) > 1:
-            if pieceTo[0] == 6:
-                board[5][pieceFrom[1]] = board[7][pieceFrom[1]]
-                board[7][pieceFrom[1]] = None
-            else:
-                board[3][pieceFrom[1]] = board[0][pieceFrom[1]]
-                board[0][pieceFrom[1]] = None
-
-    board[pieceTo[0]][pieceTo[1]] = board[pieceFrom[0]][pieceFrom[1]]
-    board[pieceFrom[0]][pieceFrom[1]] = None
-    board[pieceTo[0]][pieceTo[1]].hasMoved = True
-    isWhiteTurn = not isWhiteTurn
+#starts showing the pieces that fell after the last action, the game itself is already past it
+def startFall():
+    global fallingPieces, fallStart
+    fallingPieces = [(game.board[toRow][col].index, fromRow, toRow, col) for fromRow, toRow, col in game.lastDrops]
+    fallStart = pygame.time.get_ticks()
+
+#finds where the falling pieces are drawn now, as (icon, rect, toRow, col), and forgets the ones that landed
+def fallingSprites():
+    global fallingPieces
+    seconds = (pygame.time.get_ticks() - fallStart) / 1000
+    fallen = fallAcceleration * seconds * seconds / 2
+    sprites = []
+    for piece, fromRow, toRow, col in fallingPieces:
+        if fromRow + fallen < toRow:
+            sprites.append((piece, pygame.Rect(gameX+col*cellSize, round(gameY+(fromRow+fallen)*cellSize), cellSize, cellSize), toRow, col))
+    if not sprites:
+        fallingPieces = []
+    return sprites
+
+#finds the squares a rectangle on the board covers
+def squaresUnder(rect):
+    squares = []
+    for row in range(max(0, (rect.top-gameY)//cellSize), min(8, (rect.bottom-1-gameY)//cellSize+1)):
+        for col in range(max(0, (rect.left-gameX)//cellSize), min(8, (rect.right-1-gameX)//cellSize+1)):
+            squares.append((row, col))
+    return squares
+
+#the squares of the hinted piece move, if the hint is for this position
+def hintSquares():
+    if hint is None or hint[0] != game.key or hint[1][0] != ActionType.MOVE:
+        return []
+    type, row, col, toRow, toCol, promotion = hint[1]
+    return [[row, col], [toRow, toCol]]
+
+#the platform lines of the hinted platform action, if the hint is for this position
+def hintLines():
+    if hint is None or hint[0] != game.key or hint[1][0] == ActionType.MOVE:
+        return []
+    type, row, col, toRow, toCol, promotion = hint[1]
+    return [[row, col], [toRow, toCol]]
+
+#clears anything the player had picked before the position changed
+def clearSelection():
+    global pressedPos, validMoves, pressedPlatform
     pressedPos = [-1, -1]
-    validMoves = [-1, -1]
-    board = gravity(board, platforms, True)
-    platforms = setPlatforms(platforms)
-    if not isWhiteTurn:
-        whiteJustPlatformed = False
-    else:
-        blackJustPlatformed = False
-    return board, isWhiteTurn
-
-#runs the cooldowns on the platforms
-def setPlatforms(platforms):
-    for row in range(len(platforms)):
-        for col in range(len(platforms[row])):
-            if platforms[row][col] < 0:
-                platforms[row][col]+=1
-            elif platforms[row][col] > 1:
-                platforms[row][col]-=1
-    return platforms
-
-#enact gravity on the board
-def gravity(board, platforms, show):
-    for stop in range(8):
-        for row in reversed(range(stop+1, 8)):
-            for col in range(len(board)):
-                if getSquareState(board, row, col) == SquareState.EMPTY and platforms[row-1][col] < 1:
-                    board[row][col] = board[row-1][col]
-                    board[row-1][col] = None
-            if show:
-                draw(board)
-                time.sleep(.01)
-    return board
-
-#finds the state of a square
-def getSquareState(board, row, col):
-    if row < 0 or row > 7 or col < 0 or col > 7:
-        return SquareState.INVALID
-    if getPiece(board, row, col) == None:
-        return SquareState.EMPTY
-    if getPiece(board, row, col).isWhite == True:
-        return SquareState.LIGHT
-    return SquareState.DARK
-
-#obtains the piece at a square
-def getPiece(board, row, col):
-    return board[row][col]
-
-#finds all the valid moves from a given position
-def getValidMoves(board, row, col, isWhiteTurn, checkingChecks):
     validMoves = []
-    if getPiece(board, row, col).type == PieceType.PAWN:
-        validMoves = pawnMovement(board, row, col, isWhiteTurn)
-    elif getPiece(board, row, col).type == PieceType.ROOK:
-        validMoves = rookMovement(board, row, col, isWhiteTurn)
-    elif getPiece(board, row, col).type == PieceType.KNIGHT:
-        validMoves = knightMovement(board, row, col, isWhiteTurn)
-    elif getPiece(board, row, col).type == PieceType.BISHOP:
-        validMoves = bishopMovement(board, row, col, isWhiteTurn)
-    elif getPiece(board, row, col).type == PieceType.QUEEN:
-        validMoves = queenMovement(board, row, col, isWhiteTurn)
-    elif getPiece(board, row, col).type == PieceType.KING:
-        validMoves = kingMovement(board, row, col, isWhiteTurn)
-    else:
+    pressedPlatform = [-1, -1]
+
+#takes back or replays turns until it's a person's turn again, the computer's turns come along with them
+def stepHistory(backwards):
+    global gameOver, promotionPending, promotionMove, fallingPieces, thinkingFor
+    step = game.undo if backwards else game.redo
+    if step() is None:
+        return
+    while computerSides[game.isWhiteTurn] and not computerSides[not game.isWhiteTurn] and step() is not None:
+        pass
+    worker.cancel()
+    thinkingFor = None
+    clearSelection()
+    promotionPending = False
+    promotionMove = None
+    gameOver = EndType.PLAYING
+    fallingPieces = []
+    if not backwards:
+        startFall()
+
+#whether an event is ctrl+z or ctrl+y, handling it if it is, turns can't be taken back on a server
+def historyKey(event):
+    if client is not None or event.type != pygame.KEYDOWN or not event.mod & pygame.KMOD_CTRL or event.key not in (pygame.K_z, pygame.K_y):
         return False
-    if checkingChecks:
-        safeMoves = []
-        for move in validMoves:
-            tempBoard = copy.deepcopy(board)
-            tempBoard[move[0]][move[1]] = tempBoard[row][col]
-            tempBoard[row][col] = None
-            tempBoard = gravity(tempBoard, platforms, False)
-            if not isCheck(tempBoard, isWhiteTurn):
-                safeMoves.append(move)
-        return safeMoves
-    return validMoves
-
-#finds valid moves for pawns
-def pawnMovement(board, row, col, isWhiteTurn):
-    possibleMoves = []
-    playerCoef = 0
-    if isWhiteTurn:
-        playerCoef = 1
-        if col == 1 and getSquareState(board, row, 3) == SquareState.EMPTY and getSquareState(board, row, 2) == SquareState.EMPTY:
-            possibleMoves.append([row, 3])
+    stepHistory(event.key == pygame.K_z)
+    return True
+
+#plays an action chosen at this window, and tells the server about it when playing on one
+def takeAction(action):
+    game.doAction(action)
+    startFall()
+    if client is not None:
+        client.send({"type": "action", "action": actionName(action)})
+
+#starts again from the server's position when this window has gone out of step with it
+def catchUp(position):
+    global game, gameOver, fallingPieces, promotionPending, promotionMove
+    game = parsePosition(position, game.maxPlatforms, game.platformCooldown)
+    gameOver = EndType.PLAYING
+    fallingPieces = []
+    promotionPending = False
+    promotionMove = None
+    clearSelection()
+
+#handles everything the server sent since the last frame
+def receiveMessages():
+    global onlineColour, remoteSides
+    while True:
+        message = client.poll()
+        if message is False:
+            return
+        if message is None:
+            pygame.display.set_caption("Gravity Chess - disconnected")
+            remoteSides = {True: True, False: True}
+            return
+        if message["type"] == "joined":
+            onlineColour = message["colour"]
+            pygame.display.set_caption(f"Gravity Chess - game {message['game']} as {onlineColour}, waiting for an opponent")
+        elif message["type"] == "start":
+            remoteSides = {True: onlineColour != "white", False: onlineColour != "black"}
+            catchUp(message["position"])
+            pygame.display.set_caption(f"Gravity Chess - game {message['game']} as {onlineColour}")
+        elif message["type"] == "update":
+            if message["colour"] != onlineColour:
+                clearSelection()
+                game.doAction(parseAction(message["action"]))
+                startFall()
+            if positionString(game) != message["position"]:
+                catchUp(message["position"])
+        elif message["type"] == "error":
+            print(f"server: {message['message']}")
+            if "position" in message:
+                catchUp(message["position"])
+        elif message["type"] == "left" and message["colour"] != onlineColour:
+            remoteSides = {True: True, False: True}
+            pygame.display.set_caption(f"Gravity Chess - game {message['game']}, the {message['colour']} player left")
+
+#draws the checkerboard and the grid once, the squares are copied from it when they change
+def buildBoardLayers():
+    global boardLayer, gridLayer
+    boardLayer = pygame.Surface((gameSize+1, gameSize+1))
+    boardLayer.fill("beige")
+    gridLayer = pygame.Surface((gameSize+1, gameSize+1), pygame.SRCALPHA)
+    for row in range(8):
+        for col in range(8):
+            pygame.draw.rect(boardLayer, "white" if row % 2 == col % 2 else "gray", (col*cellSize, row*cellSize, cellSize, cellSize))
+    for layer in (boardLayer, gridLayer):
+        #outlining the board
+        pygame.draw.lines(layer, "black", False, [(gameSize, 0), (gameSize, gameSize), (0, gameSize)])
+        #outline the squares
+        for row in range(8):
+            pygame.draw.line(layer, "black", (0, row*cellSize), (gameSize, row*cellSize))
+            pygame.draw.line(layer, "black", (row*cellSize, 0), (row*cellSize, gameSize))
+
+#finds the squares with a king in check, only worked out again once the position changes
+def findCheckedKings(board):
+    global checkedKingsKey, checkedKings
+    if checkedKingsKey == game.key:
+        return checkedKings
+    checkedKings = []
+    for isWhite in (True, False):
+        kingPos = findKing(board, isWhite)
+        if kingPos is not None and isCheck(board, isWhite, kingPos):
+            checkedKings.append(kingPos)
+    checkedKingsKey = game.key
+    return checkedKings
+
+#how a platform line looks, or None if there's nothing to draw
+def platformLook(row, col):
+    if row < 0 or row > 6:
+        return None
+    platform = game.platforms[row][col]
+    if [row, col] in hintLines():
+        return ("green", platform > 1)
+    if platform > 0:
+        if (platformHovering and platform == 1 and (hoveredPos[0] == row and hoveredPos[1] == col)) or (pressedPlatform[0] == row and pressedPlatform[1] == col):
+            return ("yellow", platform > 1)
+        return ("black", platform > 1)
+    elif platform == 0 and platformHovering and (hoveredPos[0] == row and hoveredPos[1] == col) or (pressedPlatform[0] == row and pressedPlatform[1] == col):
+        return ("yellow", False)
+    return None
+
+#how a square looks: its highlight, its piece and the platform lines above and below it
+#the lines of the square to the left are part of it too, their ends reach one pixel in
+def squareLook(board, row, col, checkedKings, hidden):
+    highlight = None
+    #highlight yellow if hovering or clicking on square
+    if ([row, col] == pressedPos and getSquareState(board, row, col) == (SquareState.LIGHT if game.isWhiteTurn else SquareState.DARK)) or (not platformHovering and [row, col] == hoveredPos):
+        highlight = "yellow"
+    #highlight blue for possible moves
+    elif (row, col) in validMoves:
+        highlight = "blue"
+    #highlight green for the hinted move
+    elif [row, col] in hintSquares():
+        highlight = "green"
+    #highlight red if king is in check
+    if [row, col] in checkedKings:
+        highlight = "red"
+    platformLooks = tuple(platformLook(lineRow, lineCol) if lineCol >= 0 else None for lineRow in (row-1, row) for lineCol in (col-1, col))
+    #a piece that is still falling is drawn on its way down instead
+    piece = noPiece if (row, col) in hidden or board[row][col] is None else board[row][col].index
+    return (highlight, piece, platformLooks)
+
+#draws a platform line, only the part inside the clip area shows
+def drawPlatform(row, col, look):
+    colour, locked = look
+    pygame.draw.line(screen, colour, (gameX+col*cellSize, gameY+(row+1)*cellSize), (gameX+(col+1)*cellSize, gameY+(row+1)*cellSize), platformHeight)
+    if locked:
+        screen.blit(lockIcon, (gameX+col*cellSize+cellSize/2-7, gameY+(row+1)*cellSize+cellSize/2-37))
+
+#redraws one square and returns the area that changed
+def drawSquare(row, col, look):
+    highlight, piece, platformLooks = look
+    rect = pygame.Rect(gameX+col*cellSize, gameY+row*cellSize, cellSize, cellSize)
+    area = rect.move(-gameX, -gameY)
+    screen.set_clip(rect)
+    if highlight is None:
+        screen.blit(boardLayer, rect, area)
     else:
-        playerCoef = -1
-        if col == 6 and getSquareState(board, row, 4) == SquareState.EMPTY and getSquareState(board, row, 5) == SquareState.EMPTY:
-            possibleMoves.append([row, 4])
-    #En Passant
-    if getSquareState(board, row+1, col) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT) and board[row+1][col].justMoved2:
-        possibleMoves.append([row+1, col+playerCoef])
-    if getSquareState(board, row-1, col) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT) and board[row-1][col].justMoved2:
-        possibleMoves.append([row-1, col+playerCoef])
-    #Move Forward
-    if getSquareState(board, row, col+playerCoef) == SquareState.EMPTY:
-        possibleMoves.append([row, col+playerCoef])
-    #Attacking
-    if getSquareState(board, row-1, col+playerCoef) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
-        possibleMoves.append([row-1, col+playerCoef])
-    if getSquareState(board, row+1, col+playerCoef) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
-        possibleMoves.append([row+1, col+playerCoef])
-    return possibleMoves
-
-#finds valid moves for rooks
-def rookMovement(board, row, col, isWhiteTurn):
-    possibleMoves = []
-    for r in range(row+1, 8):
-        if getSquareState(board, r, col) == SquareState.EMPTY:
-            possibleMoves.append([r, col])
-        elif getSquareState(board, r, col) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
-            possibleMoves.append([r, col])
-            break
-        elif getSquareState(board, r, col) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
-            break
-        else:
-            break
-    for c in range(col+1, 8):
-        if getSquareState(board, row, c) == SquareState.EMPTY:
-            possibleMoves.append([row, c])
-        elif getSquareState(board, row, c) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
-            possibleMoves.append([row, c])
-            break
-        elif getSquareState(board, row, c) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
-            break
-        else:
-            break
-    for r in reversed(range(0, row)):
-        if getSquareState(board, r, col) == SquareState.EMPTY:
-            possibleMoves.append([r, col])
-        elif getSquareState(board, r, col) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
-            possibleMoves.append([r, col])
-            break
-        elif getSquareState(board, r, col) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
-            break
-        else:
-            break
-    for c in reversed(range(0, col)):
-        if getSquareState(board, row, c) == SquareState.EMPTY:
-            possibleMoves.append([row, c])
-        elif getSquareState(board, row, c) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
-            possibleMoves.append([row, c])
-            break
-        elif getSquareState(board, row, c) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
-            break
-        else:
-            break
-    return possibleMoves
-
-#finds valid moves for knights
-def knightMovement(board, row, col, isWhiteTurn):
-    possibleMoves = []
-    moveShape = [[1,2], [2,1], [-1,2], [-2,1], [1,-2], [2,-1], [-1,-2], [-2,-1]]
-    for move in moveShape:
-        if getSquareState(board, row+move[0], col+move[1]) == SquareState.EMPTY or getSquareState(board, row+move[0], col+move[1]) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
-            possibleMoves.append([row+move[0], col+move[1]])
-    return possibleMoves
-
-#finds valid moves for bishops
-def bishopMovement(board, row, col, isWhiteTurn):
-    possibleMoves = []
-    for r, c in zip(range(row+1, 8), range(col+1, 8)):
-        if getSquareState(board, r, c) == SquareState.EMPTY:
-            possibleMoves.append([r, c])
-        elif getSquareState(board, r, c) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
-            possibleMoves.append([r, c])
-            break
-        elif getSquareState(board, r, c) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
-            break
-        else:
-            break
-    for r, c in zip(range(row+1, 8), range(col-1, -1, -1)):
-        if getSquareState(board, r, c) == SquareState.EMPTY:
-            possibleMoves.append([r, c])
-        elif getSquareState(board, r, c) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
-            possibleMoves.append([r, c])
-            break
-        elif getSquareState(board, r, c) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
-            break
-        else:
-            break
-    for r, c in zip(range(row-1, -1, -1), range(col+1, 8)):
-        if getSquareState(board, r, c) == SquareState.EMPTY:
-            possibleMoves.append([r, c])
-        elif getSquareState(board, r, c) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
-            possibleMoves.append([r, c])
-            break
-        elif getSquareState(board, r, c) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
-            break
-        else:
-            break
-    for r, c in zip(range(row-1, -1, -1), range(col-1, -1, -1)):
-        if getSquareState(board, r, c) == SquareState.EMPTY:
-            possibleMoves.append([r, c])
-        elif getSquareState(board, r, c) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
-            possibleMoves.append([r, c])
-            break
-        elif getSquareState(board, r, c) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
-            break
-        else:
-            break
-    return possibleMoves
-
-#finds valid moves for queens
-def queenMovement(board, row, col, isWhiteTurn):
-    possibleMoves = []
-    possibleMoves.extend(rookMovement(board, row, col, isWhiteTurn))
-    possibleMoves.extend(bishopMovement(board, row, col, isWhiteTurn))
-    return possibleMoves
-
-#finds valid moves for kings
-def kingMovement(board, row, col, isWhiteTurn):
-    possibleMoves = []
-    #Regular Movement
-    moveShape = [[1,1], [-1,1], [0,1], [1,0], [1,-1], [-1,-1], [0,-1], [-1,0]]
-    for move in moveShape:
-        if getSquareState(board, row+move[0], col+move[1]) == SquareState.EMPTY or getSquareState(board, row+move[0], col+move[1]) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
-            possibleMoves.append([row+move[0], col+move[1]])
-    #castling
-    if not board[row][col].hasMoved and isWhiteTurn:
-        if getSquareState(board, 0, 0) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK) and not board[0][0].hasMoved and getSquareState(board, 1, 0) == SquareState.EMPTY and getSquareState(board, 2, 0) == SquareState.EMPTY and getSquareState(board, 3, 0) == SquareState.EMPTY:
-            possibleMoves.append([2, 0])
-        if getSquareState(board, 7, 0) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK) and not board[7][0].hasMoved and getSquareState(board, 6, 0) == SquareState.EMPTY and getSquareState(board, 5, 0) == SquareState.EMPTY:
-            possibleMoves.append([6, 0])
-    if not board[row][col].hasMoved and not isWhiteTurn:
-        if getSquareState(board, 0, 7) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK) and not board[0][7].hasMoved and getSquareState(board, 1, 7) == SquareState.EMPTY and getSquareState(board, 2, 7) == SquareState.EMPTY and getSquareState(board, 3, 7) == SquareState.EMPTY:
-            possibleMoves.append([2, 7])
-        if getSquareState(board, 7, 7) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK) and not board[7][7].hasMoved and getSquareState(board, 6, 7) == SquareState.EMPTY and getSquareState(board, 5, 7) == SquareState.EMPTY:
-            possibleMoves.append([6, 7])
-
-        
-
-    return possibleMoves
-
-#finds the index of an item in a 2d array
-def getIndexOf(array2d, item):
-    for array1d in array2d:
-        for arrayItem in array1d:
-            if item == arrayItem:
-                return [array2d.index(array1d), array1d.index(arrayItem)]
-    return [-1, -1]
-
-#finds whether the current players king is in check         
-def isCheck(board, isWhiteTurn):
-    r,c = getIndexOf(board, Piece(True if isWhiteTurn else False, PieceType.KING))
-    for row in range(0, len(board)):
-        for col in range(0, len(board[row])):
-            if getSquareState(board, row, col) == (SquareState.DARK if isWhiteTurn else SquareState.LIGHT):
-                if [r, c] in getValidMoves(board, row, col, not isWhiteTurn, False):
-                    return True
-    return False
+        screen.fill(highlight, rect)
+        screen.blit(gridLayer, rect, area)
+    #making thick lines for the platforms
+    for index, platform in enumerate(platformLooks):
+        if platform is not None:
+            drawPlatform(row-1+index//2, col-1+index%2, platform)
+    #draw the piece icon
+    if piece != noPiece:
+        screen.blit(pieceIcons[piece], rect)
+    screen.set_clip(None)
+    return rect
+
+#draws the promotion menu and returns its area
+def drawPromotionMenu():
+    menuRect = pygame.Rect(promotionX, promotionY, 2*promotionSize, 2*promotionSize)
+    pygame.draw.rect(screen, "white", menuRect)
+    isWhite = game.isWhiteTurn
+    for i, type in enumerate(promotionTypes):
+        cellCol = i % 2
+        cellRow = i // 2
+        cellX = promotionX + cellCol * promotionSize
+        cellY = promotionY + cellRow * promotionSize
+        # Highlight if hovered
+        if promotionHovered == i:
+            pygame.draw.rect(screen, "yellow", (cellX, cellY, promotionSize, promotionSize))
+        icon = pieceIcons[pieceIndex(isWhite, type)]
+        pygame.draw.rect(screen, "black", menuRect, 1)
+        screen.blit(icon, (cellX+(promotionSize-60)/2, cellY+(promotionSize-60)/2))
+    return menuRect
 
 #draw the board - the board goes from (460, 60) to (940, 540)
+#only the squares that look different from the last frame are drawn and sent to the display
 def draw(board):
-    #outlining the board
-    pygame.draw.lines(screen, "black", False, [(gameX+gameSize, gameY), (gameX+gameSize, gameY+gameSize), (gameX, gameY+gameSize)])
+    global lastLooks, lastMenu, lastGameOver, gameOverRect, lastSpriteRects
+    dirtyRects = []
+    if lastLooks is None:
+        screen.blit(boardLayer, (gameX, gameY))
+        dirtyRects.append(pygame.Rect(gameX, gameY, gameSize+1, gameSize+1))
+        lastLooks = {}
+    menu = (promotionHovered, game.isWhiteTurn) if promotionPending else None
+    menuRect = pygame.Rect(promotionX, promotionY, 2*promotionSize, 2*promotionSize)
+    checkedKings = findCheckedKings(board)
+    sprites = fallingSprites()
+    hidden = set((toRow, col) for piece, rect, toRow, col in sprites)
+    spriteRects = [rect for piece, rect, toRow, col in sprites]
+    #the squares the falling pieces were and are over get drawn again underneath them
+    underSprites = set(square for rect in lastSpriteRects + spriteRects for square in squaresUnder(rect))
+    menuCovered = False
     for row in range(len(board)):
         for col in range(len(board[row])):
-            #highlight yellow if hovering or clicking on square
-            if ([row, col] == pressedPos and getSquareState(board, row, col) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK)) or (not platformHovering and [row, col] == hoveredPos):
-                pygame.draw.rect(screen, "yellow", (gameX+col*cellSize, gameY+row*cellSize, cellSize, cellSize))
-            #highlight blue for possible moves
-            elif [row, col] in validMoves:
-                pygame.draw.rect(screen, "blue", (gameX+col*cellSize, gameY+row*cellSize, cellSize, cellSize))
-            #else make a checkerboard style
-            elif row % 2 == 0:
-                if col % 2 == 0:
-                    pygame.draw.rect(screen, "white", (gameX+col*cellSize, gameY+row*cellSize, cellSize, cellSize))
-                else:
-                    pygame.draw.rect(screen, "gray", (gameX+col*cellSize, gameY+row*cellSize, cellSize, cellSize))
-            else:
-                if col % 2 == 0:
-                    pygame.draw.rect(screen, "gray", (gameX+col*cellSize, gameY+row*cellSize, cellSize, cellSize))
-                else:
-                    pygame.draw.rect(screen, "white", (gameX+col*cellSize, gameY+row*cellSize, cellSize, cellSize))
-    #highlight red if king is in check
-    if isCheck(board, True):
-        kingPos = getIndexOf(board, Piece(True, PieceType.KING))
-        pygame.draw.rect(screen, "red", (gameX+kingPos[1]*cellSize, gameY+kingPos[0]*cellSize, cellSize, cellSize))
-    if isCheck(board, False):
-        kingPos = getIndexOf(board, Piece(False, PieceType.KING))
-        pygame.draw.rect(screen, "red", (gameX+kingPos[1]*cellSize, gameY+kingPos[0]*cellSize, cellSize, cellSize))
-    #outline the squares
-    for row in range(len(board)):
-        pygame.draw.line(screen, "black", (gameX, gameY+row*cellSize), (gameX+gameSize, gameY+row*cellSize))
-        pygame.draw.line(screen, "black", (gameX+row*cellSize, cellSize), (gameX+row*cellSize, gameY+gameSize))
-    #making thick lines for the platforms
-    for row in range(len(platforms)):
-        for col in range(len(platforms[row])):
-            if platforms[row][col] > 0:
-                if (platformHovering and platforms[row][col] == 1 and (hoveredPos[0] == row and hoveredPos[1] == col)) or (pressedPlatform[0] == row and pressedPlatform[1] == col): 
-                    pygame.draw.line(screen, "yellow", (gameX+col*cellSize, gameY+(row+1)*cellSize), (gameX+(col+1)*cellSize, gameY+(row+1)*cellSize), platformHeight)
-                else:
-                    pygame.draw.line(screen, "black", (gameX+col*cellSize, gameY+(row+1)*cellSize), (gameX+(col+1)*cellSize, gameY+(row+1)*cellSize), platformHeight)
-                if platforms[row][col] > 1:
-                    screen.blit(lockIcon, (gameX+col*cellSize+cellSize/2-7, gameY+(row+1)*cellSize+cellSize/2-37))
-            elif platforms[row][col] == 0 and platformHovering and (hoveredPos[0] == row and hoveredPos[1] == col) or (pressedPlatform[0] == row and pressedPlatform[1] == col):
-                pygame.draw.line(screen, "yellow", (gameX+col*cellSize, gameY+(row+1)*cellSize), (gameX+(col+1)*cellSize, gameY+(row+1)*cellSize), platformHeight)
-                
-    #draw the piece icons
-    for rowIndex, row in enumerate(board):
-        for colIndex, cell in enumerate(row):
-            if str(cell) in pieceIcons:
-                screen.blit(pieceIcons[str(cell)], (gameX + colIndex * cellSize, gameY + rowIndex * cellSize))
+            look = squareLook(board, row, col, checkedKings, hidden)
+            #the squares under a menu that just closed have to come back
+            if look != lastLooks.get((row, col)) or (row, col) in underSprites or (lastMenu is not None and menu is None and menuRect.colliderect(gameX+col*cellSize, gameY+row*cellSize, cellSize, cellSize)):
+                dirtyRects.append(drawSquare(row, col, look))
+                lastLooks[(row, col)] = look
+                menuCovered = menuCovered or menuRect.colliderect(dirtyRects[-1])
+    #the falling pieces go over the squares
+    for piece, rect, toRow, col in sprites:
+        screen.blit(pieceIcons[piece], rect)
+        dirtyRects.append(rect)
+        menuCovered = menuCovered or menuRect.colliderect(rect)
+    lastSpriteRects = spriteRects
     #Pick new piece for pawn promotion
-    if promotionPending:
-        pygame.draw.rect(screen, "white", (promotionX, promotionY, 2*promotionSize, 2*promotionSize))
-        row, col = promotionSquare
-        isWhite = board[row][col].isWhite if board[row][col] else isWhiteTurn
-        iconKeys = [
-            f"{isWhite} Queen",
-            f"{isWhite} Rook",
-            f"{isWhite} Bishop",
-            f"{isWhite} Knight"
-        ]
-        for i, key in enumerate(iconKeys):
-            cellCol = i % 2
-            cellRow = i // 2
-            cellX = promotionX + cellCol * promotionSize
-            cellY = promotionY + cellRow * promotionSize
-            # Highlight if hovered
-            if promotionHovered == i:
-                pygame.draw.rect(screen, "yellow", (cellX, cellY, promotionSize, promotionSize))
-            icon = pieceIcons.get(key)
-            pygame.draw.rect(screen, "black", (promotionX, promotionY, 2*promotionSize, 2*promotionSize), 1)
-            screen.blit(icon, (cellX+(promotionSize-60)/2, cellY+(promotionSize-60)/2))
-    #Checkmates and Stalemates
-    if gameOver != EndType.PLAYING:
+    if menu is not None and (menu != lastMenu or menuCovered):
+        dirtyRects.append(drawPromotionMenu())
+    lastMenu = menu
+    #Checkmates and Stalemates, the old message is covered with the panel first so undoing out of an ending clears it
+    if gameOver != lastGameOver:
+        lastGameOver = gameOver
+        if gameOverRect is not None:
+            screen.blit(instructionPanel, gameOverRect, gameOverRect)
+            dirtyRects.append(gameOverRect)
+            gameOverRect = None
         if gameOver == EndType.STALEMATE:
             text = font36.render("Draw - Stalemate", True, "black")
-        elif gameOver == EndType.CHECKMATE and isWhiteTurn:
+        elif gameOver == EndType.CHECKMATE and game.isWhiteTurn:
             text = font36.render("Checkmate - Black Wins", True, "black")
         elif gameOver == EndType.CHECKMATE:
             text = font36.render("Checkmate - White Wins", True, "black")
         elif gameOver == EndType.INSUFFICIENT:
             text = font36.render("Draw - Insufficient Material", True, "black")
-        screen.blit(text, (500, 20))
-
-    #flip() the display to put your work on screen
-    pygame.display.flip()
+        if gameOver != EndType.PLAYING:
+            gameOverRect = screen.blit(text, (500, 20))
+            dirtyRects.append(gameOverRect)
+
+    if profiler is not None:
+        rect = drawProfile()
+        if rect is not None:
+            dirtyRects.append(rect)
+
+    #only send the parts that changed to the display
+    if dirtyRects:
+        pygame.display.update(dirtyRects)
+
+if profiler is not None:
+    draw = profiler.wrap(draw, "draw")
+
+#draws the live profile over the bottom of the instructions a couple of times a second
+#once it's hidden the instructions under it are put back
+def drawProfile():
+    global lastProfileDraw, profileDrawn
+    if not profileShown:
+        if not profileDrawn:
+            return None
+        profileDrawn = False
+        return screen.blit(instructionPanel, profileRect, profileRect)
+    now = pygame.time.get_ticks()
+    if now - lastProfileDraw < profileInterval:
+        return None
+    lastProfileDraw = now
+    profileDrawn = True
+    screen.fill("beige", profileRect)
+    for index, line in enumerate(profiler.liveLines()[:12]):
+        screen.blit(font18.render(line, True, "darkblue"), (10, 405+index*15))
+    return profileRect
+
+#P hides the live profile or shows it again straight away
+def profileKey(event):
+    global profileShown, lastProfileDraw
+    if profiler is None or event.type != pygame.KEYDOWN or event.key != pygame.K_p:
+        return False
+    profileShown = not profileShown
+    lastProfileDraw = -profileInterval
+    return True
 
 # pygame setup
 pygame.init()
 screen = pygame.display.set_mode((1000, 600))
 running = True
+#the icons of the pieces by pieceIndex and the lock on locked platforms, from the atlas
+pieceIcons, lockIcon = loadSprites()
 
 #random variables
 pressedPos = [-1, -1]
 hoveredPos = [-1, -1]
 validMoves = []
-isWhiteTurn = True
 promotionPending = False
-promotionSquare = None
+promotionMove = None
 promotionHovered = -1
 gameX = 460
 gameY = 60
@@ -650,36 +452,121 @@ platformHeight = 6
 platformHovering = False
 pressedPlatform = [-1, -1]
 gameOver = EndType.PLAYING
-amtPlatforms = 0
-maxPlatforms = 4
-whiteJustPlatformed = False
-blackJustPlatformed = False
-platformCooldown = 7
-#different font sizes
-font36 = pygame.font.SysFont(None, 36, bold=False)
-font50 = pygame.font.SysFont(None, 50, bold=False)
-font25 = pygame.font.SysFont(None, 25, bold=False)
-
+#what was drawn last frame, so only the changes are drawn again
+lastLooks = None
+lastMenu = None
+lastGameOver = EndType.PLAYING
+#where the game over message was drawn, None when there isn't one
+gameOverRect = None
+checkedKingsKey = None
+checkedKings = []
+#the pieces falling after the last action, drawn between squares until they land
+fallingPieces = []
+fallStart = 0
+lastSpriteRects = []
+#how fast the falling pieces speed up, in squares per second per second
+fallAcceleration = 80
+#the last hint as (key of the position, action)
+hint = None
+#the key of the position the computer is looking for a move in
+thinkingFor = None
+#caps the frame rate so the loop sleeps when there's nothing to do
+clock = pygame.time.Clock()
+framesPerSecond = 60
+#different font sizes, SysFont(None) is the same default font but looks through the system's fonts first
+font36 = pygame.font.Font(None, 36)
+font50 = pygame.font.Font(None, 50)
+font25 = pygame.font.Font(None, 25)
+font18 = pygame.font.Font(None, 18)
+#how often the profile overlay is drawn again, in milliseconds
+profileInterval = 500
+lastProfileDraw = -profileInterval
+#where the profile overlay goes, whether it's wanted and whether it's on screen now
+profileRect = pygame.Rect(0, 400, gameX-10, 200)
+profileShown = True
+profileDrawn = False
+
+buildInstructionPanel()
 initializeInstructions()
-
+buildBoardLayers()
+draw(game.board)
+#the window is up with the board on it
+startupSeconds = time.perf_counter() - startTime
+if profiler is not None:
+    profiler.startupSeconds = startupSeconds
+if args.startup:
+    print(f"first frame after {startupSeconds*1000:.1f} ms")
+    running = False
+
+#the search and the server connection aren't needed for the first frame so they're started after it
+from gravityChess.worker import SearchWorker
+from gravityChess.tablebase import defaultDirectory, openTablebase
+from gravityChess.book import defaultPath, openBook
+#the endgame tables the computer searches with, None when none have been built
+tablebase = openTablebase(args.tablebases or defaultDirectory)
+#searches for the computer's moves and hints without stopping the window
+worker = SearchWorker(tablebase=tablebase, book=openBook(args.book or defaultPath))
+if args.connect:
+    from gravityChess.client import GameClient
+    host, _, port = args.connect.rpartition(":")
+    client = GameClient(host, int(port))
+    client.send({"type": "join"})
 
 while running:
-    #fill the screen with a color to wipe away anything from last frame
-    screen.fill("beige", pygame.Rect(460, 60, 480, 480))
+    if profiler is not None:
+        profiler.endFrame()
+    clock.tick(framesPerSecond)
+    if profiler is not None:
+        profiler.startFrame()
     #poll for events
     events = pygame.event.get()
+    if profiler is not None and any(event.type in (pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN) for event in events):
+        profiler.inputSeen()
+    if client is not None:
+        receiveMessages()
     if gameOver == EndType.PLAYING:
-        gameOver = checkEnding()
+        gameOver = game.checkEnding()
     if gameOver != EndType.PLAYING:
         for event in events:
             if event.type == pygame.QUIT:
                 running = False
-        draw(board)
+            historyKey(event)
+            profileKey(event)
+        draw(game.board)
         continue
+    #pick up whatever the worker has found, results for positions that have passed are dropped
+    found = worker.poll()
+    if found is not None:
+        (purpose, key), result = found
+        if key == game.key and result.action is not None:
+            if purpose == "move":
+                clearSelection()
+                takeAction(result.action)
+            else:
+                hint = (key, result.action)
+    #the computer starts thinking as soon as it's their turn
+    if computerSides[game.isWhiteTurn] and not remoteSides[game.isWhiteTurn] and thinkingFor != game.key:
+        thinkingFor = game.key
+        worker.submit(game, args.think, ("move", game.key))
     for event in events:
         #pygame.QUIT event means the user clicked X to close your window
         if event.type == pygame.QUIT:
             running = False
+        if historyKey(event) or profileKey(event):
+            continue
+        #the other player's turn on a server is theirs to take
+        if remoteSides[game.isWhiteTurn]:
+            continue
+        #while the computer thinks a click makes it play the best move it has so far
+        if computerSides[game.isWhiteTurn]:
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                worker.hurry()
+            continue
+        #ask the worker for a hint, a click cancels it if it's still thinking
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_h and not promotionPending:
+            worker.submit(game, args.think, ("hint", game.key))
+        if event.type == pygame.MOUSEBUTTONDOWN and worker.busy():
+            worker.cancel()
         #pawn promotion handling
         if promotionPending:
             #find what piece user is hovering during promotion
@@ -697,26 +584,28 @@ while running:
                     row = (y - promotionY) // promotionSize
                     option = row * 2 + col
                     if 0 <= option < 4:
-                        pieceType = [PieceType.QUEEN, PieceType.ROOK, PieceType.BISHOP, PieceType.KNIGHT][option]
-                        board[promotionSquare[0]][promotionSquare[1]] = Piece(not isWhiteTurn, pieceType)
+                        pressedPos = [-1, -1]
+                        validMoves = []
                         promotionPending = False
-                        promotionSquare = None
+                        takeAction((ActionType.MOVE, promotionMove[0][0], promotionMove[0][1], promotionMove[1][0], promotionMove[1][1], promotionTypes[option]))
+                        promotionMove = None
         else:
             #find mouse position when hovering
             if event.type == pygame.MOUSEMOTION:
                 hoveredPos = locatePressedSquare(event.pos)
-                if platformHovering and amtPlatforms >= maxPlatforms and pressedPlatform == [-1, -1] and platforms[hoveredPos[0]][hoveredPos[1]] < 1:
+                if platformHovering and game.amtPlatforms >= game.maxPlatforms and pressedPlatform == [-1, -1] and game.platforms[hoveredPos[0]][hoveredPos[1]] < 1:
                     hoveredPos = [-1, -1]
-                elif platformHovering and (whiteJustPlatformed if isWhiteTurn else blackJustPlatformed):
+                elif platformHovering and game.justPlatformed():
                     hoveredPos = [-1, -1]
             #if mouse is over a platform
             if platformHovering:
+                platforms = game.platforms
                 #find mouse position when clicking
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     #if no prior platform was selected, select the platform
-                    if pressedPlatform == [-1, -1] and (amtPlatforms < maxPlatforms or platforms[locatePressedSquare(event.pos)[0]][locatePressedSquare(event.pos)[1]] > 0):
+                    if pressedPlatform == [-1, -1] and (game.amtPlatforms < game.maxPlatforms or platforms[locatePressedSquare(event.pos)[0]][locatePressedSquare(event.pos)[1]] > 0):
                         pressedPlatform = locatePressedSquare(event.pos)
-                        if platforms[pressedPlatform[0]][pressedPlatform[1]] > 1 or platforms[pressedPlatform[0]][pressedPlatform[1]] < 0 or (whiteJustPlatformed if isWhiteTurn else blackJustPlatformed):
+                        if platforms[pressedPlatform[0]][pressedPlatform[1]] > 1 or platforms[pressedPlatform[0]][pressedPlatform[1]] < 0 or game.justPlatformed():
                             pressedPlatform = [-1, -1]
                             hoveredPos = [-1, -1]
                         pressedPos = [-1, -1]
@@ -724,47 +613,25 @@ while running:
                     #if selected platform is a platform
                     elif platforms[pressedPlatform[0]][pressedPlatform[1]] == 1:
                         #move a platform to there
-                        if hoveredPos != pressedPlatform and platforms[hoveredPos[0]][hoveredPos[1]] == 0 and checkPlatform(board, platforms, pressedPlatform[0], pressedPlatform[1], hoveredPos[0], hoveredPos[1]):
-                            platforms[hoveredPos[0]][hoveredPos[1]] = platformCooldown
-                            platforms[pressedPlatform[0]][pressedPlatform[1]] = -platformCooldown + 3
-                            isWhiteTurn = not isWhiteTurn
-                            if not isWhiteTurn:
-                                whiteJustPlatformed = True
-                            else:
-                                blackJustPlatformed = True
+                        if hoveredPos != pressedPlatform and platforms[hoveredPos[0]][hoveredPos[1]] == 0 and game.canMovePlatform(pressedPlatform[0], pressedPlatform[1], hoveredPos[0], hoveredPos[1]):
+                            oldPlatform = pressedPlatform
                             pressedPlatform = [-1, -1]
                             validMoves = []
-                            board = gravity(board, platforms, True)
-                            platforms = setPlatforms(platforms)
+                            takeAction((ActionType.SHIFT, oldPlatform[0], oldPlatform[1], hoveredPos[0], hoveredPos[1], None))
                         #unselect a platform
                         elif hoveredPos != pressedPlatform and platforms[hoveredPos[0]][hoveredPos[1]] == 1:
                             pressedPlatform = locatePressedSquare(event.pos)
                         #remove a platform
-                        elif hoveredPos == pressedPlatform and checkPlatform(board, platforms, pressedPlatform[0], pressedPlatform[1], -1, -1):
-                            amtPlatforms-=1
-                            platforms[hoveredPos[0]][hoveredPos[1]] = -platformCooldown + 3
-                            isWhiteTurn = not isWhiteTurn
-                            if not isWhiteTurn:
-                                whiteJustPlatformed = True
-                            else:
-                                blackJustPlatformed = True
+                        elif hoveredPos == pressedPlatform and game.canRemovePlatform(pressedPlatform[0], pressedPlatform[1]):
                             pressedPlatform = [-1, -1]
-                            board = gravity(board, platforms, True)
                             validMoves = []
-                            platforms = setPlatforms(platforms)
-                    elif platforms[pressedPlatform[0]][pressedPlatform[1]] == 0 and amtPlatforms < maxPlatforms and not isCheck(board, isWhiteTurn): 
+                            takeAction((ActionType.REMOVE, hoveredPos[0], hoveredPos[1], -1, -1, None))
+                    elif platforms[pressedPlatform[0]][pressedPlatform[1]] == 0 and game.canPlacePlatform(pressedPlatform[0], pressedPlatform[1]):
                         #add a platform
                         if hoveredPos == pressedPlatform:
-                            amtPlatforms+=1
-                            platforms[hoveredPos[0]][hoveredPos[1]] = platformCooldown
-                            isWhiteTurn = not isWhiteTurn
-                            if not isWhiteTurn:
-                                whiteJustPlatformed = True
-                            else:
-                                blackJustPlatformed = True
                             pressedPlatform = [-1, -1]
                             validMoves = []
-                            platforms = setPlatforms(platforms)
+                            takeAction((ActionType.PLACE, hoveredPos[0], hoveredPos[1], -1, -1, None))
                         #select a different platform
                         elif hoveredPos != pressedPlatform and platforms[hoveredPos[0]][hoveredPos[1]] == 0:
                             pressedPlatform = locatePressedSquare(event.pos)
@@ -777,23 +644,37 @@ while running:
                     if pressedPos == [-1, -1]:
                         pressedPos = locatePressedSquare(event.pos)
                         #check to make sure the piece is the right color
-                        if getSquareState(board, pressedPos[0], pressedPos[1]) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
-                            validMoves = getValidMoves(board, pressedPos[0], pressedPos[1], isWhiteTurn, True)
+                        if game.getSquareState(pressedPos[0], pressedPos[1]) == (SquareState.LIGHT if game.isWhiteTurn else SquareState.DARK):
+                            validMoves = game.getValidMoves(pressedPos[0], pressedPos[1])
                             #If there are no valid moves then dont select the piece
                             if validMoves == []:
                                 pressedPos = [-1, -1]
                         else:
                             pressedPos = [-1, -1]
                     #check if mouse pos falls in a valid square
-                    elif locatePressedSquare(event.pos) in validMoves:
-                        board, isWhiteTurn = makeMove(board, isWhiteTurn, pressedPos, locatePressedSquare(event.pos))
+                    elif tuple(locatePressedSquare(event.pos)) in validMoves:
+                        #wait for the promotion menu before the move is made
+                        if game.isPromotion(pressedPos, locatePressedSquare(event.pos)):
+                            promotionPending = True
+                            promotionMove = [pressedPos, locatePressedSquare(event.pos)]
+                        else:
+                            pieceFrom = pressedPos
+                            pressedPos = [-1, -1]
+                            validMoves = []
+                            pieceTo = locatePressedSquare(event.pos)
+                            takeAction((ActionType.MOVE, pieceFrom[0], pieceFrom[1], pieceTo[0], pieceTo[1], None))
                     #check if user is clicking a different piece to make a move
-                    elif getSquareState(board, locatePressedSquare(event.pos)[0], locatePressedSquare(event.pos)[1]) == (SquareState.LIGHT if isWhiteTurn else SquareState.DARK):
+                    elif game.getSquareState(locatePressedSquare(event.pos)[0], locatePressedSquare(event.pos)[1]) == (SquareState.LIGHT if game.isWhiteTurn else SquareState.DARK):
                         pressedPos = locatePressedSquare(event.pos)
-                        validMoves = getValidMoves(board, pressedPos[0], pressedPos[1], isWhiteTurn, True)
+                        validMoves = game.getValidMoves(pressedPos[0], pressedPos[1])
                         if validMoves == []:
                             pressedPos = [-1, -1]
     #drawing the board
-    draw(board)
-
-pygame.quit()
\ No newline at end of file
+    draw(game.board)
+
+worker.close()
+if client is not None:
+    client.close()
+pygame.quit()
+if profiler is not None:
+    print(profiler.summary())
\ No newline at end of file
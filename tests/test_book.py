@@ -0,0 +1,95 @@
+import pytest
+from gravityChess.book import Book, buildBook, encodeAction, entry, fileMagic, fileVersion, header
+from gravityChess.notation import GameRecord, writeRecord
+from gravityChess.perft import positionAfter
+from gravityChess.rules import ActionType, GameState, parseAction
+
+#games opening with two different double pushes, which white wins and draws, and a single push, which black wins,
+#31-33 gets to the same position as 41-43 once the pawn falls, and a game with other settings that's left out
+records = [
+    GameRecord([parseAction(name) for name in "41-43 46-44 21-22".split()], "Checkmate", "white"),
+    GameRecord([parseAction(name) for name in "31-33 46-45".split()], "Draw", None),
+    GameRecord([parseAction(name) for name in "41-42 46-44".split()], "Checkmate", "black"),
+    GameRecord([parseAction(name) for name in "41-42".split()], "Resigned", "white", maxPlatforms=3),
+]
+
+#writes the records to a file in the test's directory
+def writeRecords(tmp_path):
+    path = str(tmp_path / "games.jsonl")
+    with open(path, "w") as file:
+        for record in records:
+            writeRecord(file, record)
+    return path
+
+#the book has every action played in the first plies, counted from the side that played it
+def testBuiltBookCountsTheGames(tmp_path):
+    path = str(tmp_path / "book.gcob")
+    assert buildBook([writeRecords(tmp_path)], path, plies=2) == 6
+    book = Book(path)
+    start = GameState()
+    moves = book.movesFor(start.key)
+    assert [(move.action, move.games, move.wins, move.draws, move.losses) for move in moves] == [
+        (parseAction("41-43"), 1, 1, 0, 0),
+        (parseAction("31-33"), 1, 0, 1, 0),
+        (parseAction("41-42"), 1, 0, 0, 1),
+    ]
+    #the two double pushes get to the same position, so its replies are counted together, the better scoring first
+    replies = book.moves(positionAfter(["41-43"]))
+    assert [(move.action, move.games, move.wins, move.draws, move.losses) for move in replies] == [
+        (parseAction("46-45"), 1, 0, 1, 0),
+        (parseAction("46-44"), 1, 0, 0, 1),
+    ]
+    #the third ply is past the book
+    assert book.movesFor(positionAfter("41-43 46-44".split()).key) == []
+    assert book.chooseAction(start) == parseAction("41-43")
+    assert book.chooseAction(positionAfter("41-43 46-44".split())) is None
+    assert (book.lookups, book.hits) == (2, 1)
+    #games with other settings aren't in the book and aren't looked up in it
+    assert book.moves(GameState(maxPlatforms=3)) == []
+    book.close()
+
+#spilling runs to disk builds the same book as counting everything in memory
+def testSpilledRunsBuildTheSameBook(tmp_path):
+    recordsPath = writeRecords(tmp_path)
+    buildBook([recordsPath], str(tmp_path / "memory.gcob"), plies=3)
+    buildBook([recordsPath], str(tmp_path / "runs.gcob"), plies=3, runEntries=2)
+    assert (tmp_path / "memory.gcob").read_bytes() == (tmp_path / "runs.gcob").read_bytes()
+    assert not list(tmp_path.glob("*.run"))
+
+#actions played in too few games are left out, both when building and when reading
+def testMinGames(tmp_path):
+    recordsPath = writeRecords(tmp_path)
+    againPath = str(tmp_path / "again.jsonl")
+    with open(againPath, "w") as file:
+        writeRecord(file, GameRecord([parseAction(name) for name in "41-43 46-44".split()], "Draw", None))
+    path = str(tmp_path / "book.gcob")
+    buildBook([recordsPath, againPath], path, plies=2)
+    book = Book(path, minGames=2)
+    assert [move.action for move in book.moves(GameState())] == [parseAction("41-43")]
+    assert [move.action for move in book.moves(positionAfter(["41-43"]))] == [parseAction("46-44")]
+    book.close()
+    assert buildBook([recordsPath, againPath], path, plies=2, minGames=2) == 2
+
+#entries a key collision would give a position are only offered if they're legal there
+def testIllegalEntriesAreLeftOut(tmp_path):
+    path = tmp_path / "book.gcob"
+    key = GameState().key
+    illegal = (ActionType.MOVE, 4, 1, 4, 5, None)
+    legal = parseAction("41-43")
+    entries = sorted([(key, encodeAction(illegal), 9, 9, 0), (key, encodeAction(legal), 1, 0, 1)])
+    path.write_bytes(header.pack(fileMagic, fileVersion, 4, 7, 2, len(entries)) + b"".join(entry.pack(*values) for values in entries))
+    book = Book(str(path))
+    assert [move.action for move in book.movesFor(key)] == [illegal, legal]
+    assert [move.action for move in book.moves(GameState())] == [legal]
+    assert book.chooseAction(GameState()) == legal
+    book.close()
+
+#a file that isn't a book, or is cut short, isn't read as one
+def testBadFilesRaise(tmp_path):
+    path = tmp_path / "book.gcob"
+    path.write_bytes(header.pack(b"GCTB", fileVersion, 4, 7, 2, 0))
+    with pytest.raises(ValueError):
+        Book(str(path))
+    path.write_bytes(header.pack(fileMagic, fileVersion, 4, 7, 2, 3) + entry.pack(1, 1, 1, 1, 0))
+    with pytest.raises(ValueError):
+        Book(str(path))
@@ -0,0 +1,69 @@
+import json
+import random
+import pytest
+from gravityChess.notation import GameRecord, parsePosition, positionString
+from gravityChess.rules import EndType, GameState
+
+#plays random actions from the game, giving them back as it goes
+def randomActions(game, rng, plies):
+    actions = []
+    for _ in range(plies):
+        choices = game.getActions()
+        if not choices or game.checkEnding() != EndType.PLAYING:
+            break
+        action = rng.choice(choices)
+        game.doAction(action)
+        actions.append(action)
+    return actions
+
+#every position of random games is written and read back as the same position
+def testPositionStringsRoundTrip():
+    rng = random.Random(0)
+    for _ in range(5):
+        game = GameState()
+        for _ in range(100):
+            text = positionString(game)
+            parsed = parsePosition(text)
+            assert positionString(parsed) == text
+            assert parsed.platforms == game.platforms
+            assert parsed.key == game.key
+            if not randomActions(game, rng, 1):
+                break
+
+#records are read back with the same actions, result, start and settings
+def testGameRecordsRoundTrip():
+    rng = random.Random(1)
+    game = GameState()
+    randomActions(game, rng, 20)
+    start = positionString(game)
+    for record in [GameRecord(), GameRecord(randomActions(GameState(), rng, 80), "checkmate", "white"),
+                   GameRecord(randomActions(parsePosition(start, 3, 5), rng, 40), "draw", None, start, 3, 5)]:
+        line = record.toLine()
+        assert line.endswith("\n") and "\n" not in line[:-1]
+        read = GameRecord.fromLine(line)
+        assert (read.actions, read.ending, read.winner, read.start, read.maxPlatforms, read.platformCooldown) == (record.actions, record.ending, record.winner, record.start, record.maxPlatforms, record.platformCooldown)
+        for (readGame, readAction), (game, action) in zip(read.replay(), record.replay()):
+            assert readAction == action
+            assert positionString(readGame) == positionString(game)
+
+#positions that can't be read say what's wrong with them
+@pytest.mark.parametrize("text", [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w -",
+    "8/8/8/8/8/8/K6k w - 0 -",
+    "8/8/8/8/8/8/8/K5xk w - 0 -",
+    "8/8/8/8/8/8/8/K7k w - 0 -",
+    "8/8/8/8/8/8/8/K5k w - 0 -",
+    "8/8/8/8/8/8/8/K6k x - 0 -",
+    "8/8/8/8/8/8/8/K6k w 70:3 1 -",
+    "8/8/8/8/8/8/8/K6k w 08:3 1 -",
+])
+def testMalformedPositionsRaise(text):
+    with pytest.raises(ValueError):
+        parsePosition(text)
+
+#a line that isn't json isn't a record
+def testMalformedRecordLinesRaise():
+    with pytest.raises(ValueError):
+        GameRecord.fromLine("{\"actions\": \"41-43\"")
+    with pytest.raises(ValueError):
+        GameRecord.fromLine(json.dumps({"actions": "4x-43"}))
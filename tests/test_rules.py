@@ -0,0 +1,41 @@
+import random
+from gravityChess.notation import positionString
+from gravityChess.rules import EndType, GameState, findKing, countMaterial, zobristKey
+
+#everything about a position that undo and redo have to put back
+def snapshot(game):
+    squares = tuple(tuple(None if piece is None else (piece.isWhite, piece.type, piece.hasMoved, piece.justMoved2) for piece in row) for row in game.board)
+    return (positionString(game), squares, tuple(map(tuple, game.platforms)), game.isWhiteTurn, game.amtPlatforms,
+            game.whiteJustPlatformed, game.blackJustPlatformed, game.key, dict(game.kings), tuple(game.material))
+
+#the cached parts have to agree with the board they're cached for
+def checkConsistent(game):
+    assert game.key == zobristKey(game)
+    assert game.kings == {True: findKing(game.board, True), False: findKing(game.board, False)}
+    assert game.material == countMaterial(game.board)
+
+#random games are undone to the start and redone to the end, matching what was played at every ply
+def testUndoAndRedoRetraceRandomGames():
+    rng = random.Random(0)
+    for _ in range(10):
+        game = GameState()
+        snapshots = [snapshot(game)]
+        played = []
+        for _ in range(120):
+            actions = game.getActions()
+            if not actions or game.checkEnding() != EndType.PLAYING:
+                break
+            action = rng.choice(actions)
+            game.doAction(action)
+            played.append(action)
+            snapshots.append(snapshot(game))
+        for ply in range(len(played), 0, -1):
+            assert game.undo() == played[ply-1]
+            assert snapshot(game) == snapshots[ply-1]
+            checkConsistent(game)
+        assert game.undo() is None
+        for ply in range(1, len(played)+1):
+            assert game.redo() == played[ply-1]
+            assert snapshot(game) == snapshots[ply]
+            checkConsistent(game)
+        assert game.redo() is None
@@ -0,0 +1,103 @@
+import asyncio
+import json
+from gravityChess.notation import readRecords
+from gravityChess.server import GameServer
+
+#runs a test against a server listening on a free port
+def withServer(test, server=None):
+    server = server if server is not None else GameServer()
+    async def run():
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        async with listener:
+            await test(listener.sockets[0].getsockname()[1])
+    asyncio.run(run())
+    return server
+
+#a connection to the test server, sending and reading lines of json
+class Client:
+    #constructor
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    #connects to the server on the port
+    @staticmethod
+    async def connect(port):
+        return Client(*await asyncio.open_connection("127.0.0.1", port))
+
+    #sends a message, as json unless it's already text
+    async def send(self, message):
+        self.writer.write((message if isinstance(message, str) else json.dumps(message)).encode() + b"\n")
+        await self.writer.drain()
+
+    #the next message from the server
+    async def receive(self):
+        return json.loads(await asyncio.wait_for(self.reader.readline(), 5))
+
+    #closes the connection
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+#seats two clients in a game and reads the messages about it starting
+async def startGame(port):
+    white = await Client.connect(port)
+    await white.send({"type": "join"})
+    assert (await white.receive())["colour"] == "white"
+    black = await Client.connect(port)
+    await black.send({"type": "join"})
+    assert (await black.receive())["colour"] == "black"
+    assert (await white.receive())["type"] == "start"
+    assert (await black.receive())["type"] == "start"
+    return white, black
+
+#messages that aren't json, or don't say what to do, get an error back and the connection stays up
+def testMalformedMessagesGetErrors():
+    async def test(port):
+        client = await Client.connect(port)
+        await client.send("{\"type\": \"join\"")
+        reply = await client.receive()
+        assert reply["type"] == "error" and reply["message"].startswith("bad message")
+        await client.send({"game": 1})
+        assert (await client.receive())["message"].startswith("bad message")
+        await client.send({"type": "dance"})
+        assert (await client.receive())["message"] == "unknown message type dance"
+        await client.send({"type": "action", "action": "41-43"})
+        assert (await client.receive())["message"] == "the game hasn't started"
+        await client.close()
+    withServer(test)
+
+#actions the rules don't allow, or out of turn, are turned down with the position to catch up with
+def testIllegalActionsGetErrors():
+    async def test(port):
+        white, black = await startGame(port)
+        await white.send({"type": "action", "action": "41-45"})
+        reply = await white.receive()
+        assert reply["message"] == "41-45 isn't a legal action"
+        assert reply["position"].split()[1] == "w"
+        await black.send({"type": "action", "action": "46-44"})
+        assert (await black.receive())["message"] == "it isn't your turn"
+        await white.send({"type": "action", "action": "41-43"})
+        assert (await white.receive())["action"] == "41-43"
+        assert (await black.receive())["action"] == "41-43"
+        await white.close()
+        await black.close()
+    withServer(test)
+
+#a game someone leaves is written to the records file once it's over
+def testLeftGamesAreRecorded(tmp_path):
+    path = str(tmp_path / "games.jsonl")
+    async def test(port):
+        white, black = await startGame(port)
+        await white.send({"type": "action", "action": "41-43"})
+        await white.receive()
+        await black.receive()
+        await black.send({"type": "leave"})
+        assert (await white.receive()) == {"type": "left", "game": 1, "colour": "black"}
+        await white.close()
+        await black.close()
+    server = withServer(test, GameServer(recordsPath=path))
+    server.recorder.shutdown(wait=True)
+    records = list(readRecords(path))
+    assert len(records) == 1
+    assert (records[0].ending, records[0].winner, len(records[0].actions)) == ("Resigned", "white", 1)
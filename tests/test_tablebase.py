@@ -0,0 +1,24 @@
+import pytest
+from gravityChess.notation import parsePosition
+from gravityChess.rules import ActionType
+from gravityChess.tablebase import Tablebase, canPassant
+
+#white's pawn on 54 can take black's pawn on 64 en passant by moving to 65, nothing can castle
+passantPosition = "8/8/8/8/8/4P+3/4p+^3/K+3N+2k+ w - 0 -"
+
+#the pawn taking en passant stands next to the one that moved two, in the same column
+def testCanPassantFindsTheCaptureFromTheSameColumn():
+    game = parsePosition(passantPosition)
+    assert (ActionType.MOVE, 5, 4, 6, 5, None) in game.getActions()
+    assert canPassant(game.board, True)
+    assert not canPassant(parsePosition(passantPosition.replace("^", "")).board, True)
+
+#a table covering the material isn't asked while en passant is possible, it doesn't know about it
+#the table file here is only a header, so asking it at all would fail
+def testProbeSkipsPositionsWithEnPassant(tmp_path):
+    (tmp_path / "KNPvKP.gctb").write_bytes(b"GCTB\x02\x00")
+    tablebase = Tablebase(str(tmp_path))
+    assert "KNPvKP" in tablebase.names
+    assert tablebase.probe(parsePosition(passantPosition)) is None
+    with pytest.raises(Exception):
+        tablebase.probe(parsePosition(passantPosition.replace("^", "")))